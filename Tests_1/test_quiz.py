@@ -1,12 +1,19 @@
 import logging
+from unittest import mock
 
 from django.contrib.auth import get_user_model
+from django.db import DatabaseError
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from Tests_1.utils import get_admin_user, create_member_user
-from quiz.models import QuestionCategory, Question, Answer
+from quiz.answer_key import AnswerKeyIndex, answer_key
+from quiz.attempts import AttemptBuffer, attempt_buffer
+from quiz.models import QuestionCategory, Question, Answer, QuizAttempt, AttemptAnswer, CatalogVersion
+from quiz.sampling import question_pools
+from quiz.versions import CATALOG_KEY
 
 # Получаем модель пользователя из Django
 User = get_user_model()
@@ -15,6 +22,8 @@ User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
+# Без фонового потока: буфер попыток сбрасывается в потоке теста, внутри его транзакции
+@override_settings(QUIZ_ATTEMPT_FLUSH_INTERVAL=0)
 class QuizTests(APITestCase):
     def setUp(self):
         """
@@ -23,6 +32,10 @@ class QuizTests(APITestCase):
         - Создаем обычного пользователя-участника.
         """
         logger.debug("Настройка тестового окружения...")
+        # Откат транзакции теста не вызывает сигналов, поэтому кэш ключа ответов сбрасываем сами
+        answer_key.clear()
+        question_pools.invalidate()
+        attempt_buffer.clear()
         self.admin_user = get_admin_user()
         self.member_user = create_member_user(
             username="member_test",
@@ -108,6 +121,435 @@ class QuizTests(APITestCase):
         # Проверяем результат
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_check_answers_batch(self):
+        """
+        Тест: Пакетная проверка ответов возвращает результат по каждой паре и итоговый счет.
+        """
+        category = QuestionCategory.objects.create(name="Test Category")
+        question1 = Question.objects.create(category=category, text="Question 1", difficulty="easy")
+        question2 = Question.objects.create(category=category, text="Question 2", difficulty="easy")
+        correct = Answer.objects.create(question=question1, text="Correct", is_correct=True)
+        incorrect = Answer.objects.create(question=question2, text="Incorrect", is_correct=False)
+
+        self.client.force_authenticate(user=self.member_user)
+        url = reverse('check_answers')
+        data = {'answers': [
+            {'question_id': question1.pk, 'answer_id': correct.pk},
+            {'question_id': question2.pk, 'answer_id': incorrect.pk},
+            {'question_id': question2.pk, 'answer_id': correct.pk},
+            {'question_id': 999, 'answer_id': correct.pk},
+            {'question_id': 'abc'},
+        ]}
+        # Версия каталога для сверки кэша ключа ответов, ключи всех вопросов пакета
+        with self.assertNumQueries(2):
+            response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertTrue(results[0]['is_correct'])
+        self.assertFalse(results[1]['is_correct'])
+        self.assertEqual(results[2]['error'], "Ответ не связан с вопросом")
+        self.assertEqual(results[3]['error'], "Вопрос не найден")
+        self.assertEqual(results[4]['error'], "Неверные данные")
+        self.assertEqual(response.data['total'], 5)
+        self.assertEqual(response.data['score'], 1)
+
+    def test_check_answers_empty_batch(self):
+        """
+        Тест: Пустой список ответов отклоняется.
+        """
+        self.client.force_authenticate(user=self.member_user)
+        response = self.client.post(reverse('check_answers'), {'answers': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_check_answer_uses_answer_key_cache(self):
+        """
+        Тест: Повторная проверка ответа не обращается к базе данных.
+        """
+        category = QuestionCategory.objects.create(name="Test Category")
+        question = Question.objects.create(category=category, text="Test Question", difficulty="easy")
+        answer = Answer.objects.create(question=question, text="Answer", is_correct=True)
+
+        self.client.force_authenticate(user=self.member_user)
+        url = reverse('check_answer')
+        data = {'question_id': question.pk, 'answer_id': answer.pk}
+        self.client.post(url, data)
+        with self.assertNumQueries(0):
+            response = self.client.post(url, data)
+        self.assertTrue(response.data['is_correct'])
+        self.assertEqual(answer_key.stats()['hits'], 1)
+
+    def test_answer_key_invalidated_on_answer_change(self):
+        """
+        Тест: Изменение и перенос ответа сбрасывают кэш затронутых вопросов.
+        """
+        category = QuestionCategory.objects.create(name="Test Category")
+        question1 = Question.objects.create(category=category, text="Question 1", difficulty="easy")
+        question2 = Question.objects.create(category=category, text="Question 2", difficulty="easy")
+        answer = Answer.objects.create(question=question1, text="Answer", is_correct=False)
+        self.assertFalse(answer_key.get(question1.pk).answers[answer.pk])
+
+        answer.is_correct = True
+        answer.save()
+        self.assertTrue(answer_key.get(question1.pk).answers[answer.pk])
+
+        answer.question = question2
+        answer.save()
+        self.assertNotIn(answer.pk, answer_key.get(question1.pk).answers)
+        self.assertIn(answer.pk, answer_key.get(question2.pk).answers)
+
+        question2.delete()
+        self.assertIsNone(answer_key.get(question2.pk))
+
+    def test_answer_key_revalidated_against_catalog_version(self):
+        """
+        Тест: Изменение из другого процесса (без сигналов) видно после смены версии каталога.
+        """
+        category = QuestionCategory.objects.create(name="Test Category")
+        question = Question.objects.create(category=category, text="Question", difficulty="easy")
+        answer = Answer.objects.create(question=question, text="Answer", is_correct=False)
+        index = AnswerKeyIndex(revalidate_seconds=0)
+        self.assertFalse(index.get(question.pk).answers[answer.pk])
+
+        Answer.objects.filter(pk=answer.pk).update(is_correct=True)
+        self.assertFalse(index.get(question.pk).answers[answer.pk])
+
+        CatalogVersion.objects.update_or_create(key=CATALOG_KEY, defaults={'version': 'other-worker'})
+        self.assertTrue(index.get(question.pk).answers[answer.pk])
+
+        cached = AnswerKeyIndex(revalidate_seconds=60)
+        cached.get(question.pk)
+        with self.assertNumQueries(0):
+            cached.get(question.pk)
+
+    def test_answer_key_lru_eviction(self):
+        """
+        Тест: При переполнении кэш вытесняет давно не использованные вопросы.
+        """
+        category = QuestionCategory.objects.create(name="Test Category")
+        questions = [
+            Question.objects.create(category=category, text=f"Question {i}", difficulty="easy")
+            for i in range(3)
+        ]
+        index = AnswerKeyIndex(max_size=2)
+        index.get(questions[0].pk)
+        index.get(questions[1].pk)
+        index.get(questions[0].pk)
+        index.get(questions[2].pk)
+
+        stats = index.stats()
+        self.assertEqual(stats['size'], 2)
+        self.assertEqual(stats['evictions'], 1)
+        with self.assertNumQueries(0):
+            index.get(questions[0].pk)
+
+    def test_quiz_metrics_admin_only(self):
+        """
+        Тест: Счетчики кэша доступны только администраторам.
+        """
+        url = reverse('quiz-metrics')
+        self.client.force_authenticate(user=self.member_user)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('hits', response.data['answer_key'])
+
+    def test_questions_full_query_count_independent_of_page_size(self):
+        """
+        Тест: Страница вопросов с ответами читается фиксированным числом запросов.
+        """
+        for i in range(12):
+            category = QuestionCategory.objects.create(name=f"Category {i}")
+            question = Question.objects.create(category=category, text=f"Question {i}", difficulty="easy")
+            Answer.objects.create(question=question, text="Correct", is_correct=True)
+            Answer.objects.create(question=question, text="Wrong", is_correct=False)
+
+        self.client.force_authenticate(user=self.member_user)
+        url = reverse('question-full-list')
+        for page_size in (2, 10):
+            # Версия каталога для ETag, COUNT, страница вопросов с категориями, ответы для всей страницы
+            with self.assertNumQueries(4):
+                response = self.client.get(url, {'page_size': page_size})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data['results']), page_size)
+
+        first = response.data['results'][0]
+        self.assertEqual(first['category_name'], "Category 0")
+        self.assertEqual([answer['text'] for answer in first['answers']], ["Correct", "Wrong"])
+
+    def test_questions_full_hides_is_correct_from_members(self):
+        """
+        Тест: Правильность ответов видна только сотрудникам.
+        """
+        category = QuestionCategory.objects.create(name="Test Category")
+        question = Question.objects.create(category=category, text="Test Question", difficulty="easy")
+        Answer.objects.create(question=question, text="Correct", is_correct=True)
+        url = reverse('question-full-detail', args=[question.pk])
+
+        self.client.force_authenticate(user=self.member_user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('is_correct', response.data['answers'][0])
+
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(url)
+        self.assertTrue(response.data['answers'][0]['is_correct'])
+
+    def _create_question_bank(self):
+        """
+        Создает две категории по десять вопросов разной сложности.
+        """
+        categories = [QuestionCategory.objects.create(name=f"Category {i}") for i in range(2)]
+        for category in categories:
+            for i in range(10):
+                question = Question.objects.create(
+                    category=category, text=f"{category.name} Q{i}", difficulty="easy" if i % 2 else "hard"
+                )
+                Answer.objects.create(question=question, text="Answer", is_correct=True)
+        return categories
+
+    def test_generate_quiz_reproducible_with_seed(self):
+        """
+        Тест: Одинаковый seed дает одинаковый набор вопросов в одинаковом порядке.
+        """
+        self._create_question_bank()
+        self.client.force_authenticate(user=self.member_user)
+        url = reverse('generate-quiz')
+
+        first = self.client.get(url, {'count': 5, 'seed': 'abc'})
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(2):
+            second = self.client.get(url, {'count': 5, 'seed': 'abc'})
+        ids = [question['id'] for question in first.data['questions']]
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(len(set(ids)), 5)
+        self.assertEqual(ids, [question['id'] for question in second.data['questions']])
+
+    def test_generate_quiz_filters_and_exclude(self):
+        """
+        Тест: Фильтры по категории и сложности и исключение уже показанных вопросов.
+        """
+        categories = self._create_question_bank()
+        pool = set(Question.objects.filter(category=categories[1], difficulty="easy").values_list('id', flat=True))
+        seen = sorted(pool)[:3]
+
+        self.client.force_authenticate(user=self.member_user)
+        response = self.client.get(reverse('generate-quiz'), {
+            'count': 10, 'category': categories[1].pk, 'difficulty': 'easy',
+            'exclude': ','.join(str(question_id) for question_id in seen),
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = {question['id'] for question in response.data['questions']}
+        self.assertEqual(ids, pool - set(seen))
+        self.assertTrue(response.data['seed'])
+
+    def test_generate_quiz_sees_new_questions(self):
+        """
+        Тест: Новый вопрос попадает в выборку сразу, не дожидаясь перестройки индекса по таймеру.
+        """
+        categories = self._create_question_bank()
+        self.client.force_authenticate(user=self.member_user)
+        params = {'count': 10, 'category': categories[0].pk, 'difficulty': 'hard'}
+        before = {question['id'] for question in self.client.get(reverse('generate-quiz'), params).data['questions']}
+
+        question = Question.objects.create(category=categories[0], text="Новый вопрос", difficulty="hard")
+        after = {question['id'] for question in self.client.get(reverse('generate-quiz'), params).data['questions']}
+        self.assertEqual(after, before | {question.pk})
+
+    def test_generate_quiz_invalid_count(self):
+        """
+        Тест: Некорректное число вопросов отклоняется.
+        """
+        self.client.force_authenticate(user=self.member_user)
+        response = self.client.get(reverse('generate-quiz'), {'count': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_question_list_cursor_pagination(self):
+        """
+        Тест: Keyset-пагинация обходит все вопросы без COUNT-запроса.
+        """
+        category = QuestionCategory.objects.create(name="Test Category")
+        created = [
+            Question.objects.create(category=category, text=f"Question {i}", difficulty="easy").pk
+            for i in range(5)
+        ]
+        self.client.force_authenticate(user=self.member_user)
+
+        seen = []
+        url = reverse('question-list-create') + '?pagination=cursor&page_size=2'
+        while url:
+            # Версия каталога для ETag и страница без COUNT
+            with self.assertNumQueries(2):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            seen.extend(question['id'] for question in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, created)
+
+    def test_check_answers_records_attempt(self):
+        """
+        Тест: Проверка теста записывает попытку через буфер отложенной записи.
+        """
+        category = QuestionCategory.objects.create(name="Test Category")
+        question = Question.objects.create(category=category, text="Question", difficulty="easy")
+        correct = Answer.objects.create(question=question, text="Correct", is_correct=True)
+        wrong = Answer.objects.create(question=question, text="Wrong", is_correct=False)
+
+        self.client.force_authenticate(user=self.member_user)
+        response = self.client.post(reverse('check_answers'), {'answers': [
+            {'question_id': question.pk, 'answer_id': correct.pk},
+            {'question_id': question.pk, 'answer_id': wrong.pk},
+            {'question_id': 999, 'answer_id': wrong.pk},
+        ]}, format='json')
+        self.assertEqual(QuizAttempt.objects.count(), 0)  # Еще в буфере
+
+        self.assertEqual(attempt_buffer.flush(), 2)
+        attempt = QuizAttempt.objects.get(pk=response.data['attempt_id'])
+        self.assertEqual((attempt.user, attempt.total, attempt.correct), (self.member_user, 2, 1))
+        self.assertEqual(attempt.answers.count(), 2)
+
+    @override_settings(QUIZ_ATTEMPT_BUFFER_SIZE=2)
+    def test_attempt_buffer_flushes_on_size(self):
+        """
+        Тест: Буфер записывается пачкой, когда набирается QUIZ_ATTEMPT_BUFFER_SIZE ответов.
+        """
+        category = QuestionCategory.objects.create(name="Test Category")
+        question = Question.objects.create(category=category, text="Question", difficulty="easy")
+        answer = Answer.objects.create(question=question, text="Correct", is_correct=True)
+
+        self.client.force_authenticate(user=self.member_user)
+        data = {'question_id': question.pk, 'answer_id': answer.pk}
+        self.client.post(reverse('check_answer'), data)
+        self.assertEqual(AttemptAnswer.objects.count(), 0)
+        self.client.post(reverse('check_answer'), data)
+        self.assertEqual(AttemptAnswer.objects.filter(user=self.member_user, attempt=None).count(), 2)
+
+        self.client.force_authenticate(user=self.admin_user)
+        stats = self.client.get(reverse('quiz-metrics')).data['attempt_buffer']
+        self.assertEqual(stats['queue_depth'], 0)
+        self.assertGreaterEqual(stats['flushed_answers'], 2)
+
+    def test_attempt_buffer_retries_failed_batch(self):
+        """
+        Тест: Пачка, которую не удалось записать, остается в буфере и пишется при следующей записи.
+        """
+        category = QuestionCategory.objects.create(name="Test Category")
+        question = Question.objects.create(category=category, text="Question", difficulty="easy")
+        attempt_buffer.record_answer(self.member_user.pk, question.pk, None, False)
+
+        with mock.patch.object(QuizAttempt.objects, 'bulk_create', side_effect=DatabaseError("нет связи")):
+            self.assertEqual(attempt_buffer.flush(), 0)
+        self.assertEqual(attempt_buffer.stats()['queue_depth'], 1)
+        self.assertEqual(attempt_buffer.flush(), 1)
+        self.assertEqual(AttemptAnswer.objects.filter(user=self.member_user).count(), 1)
+
+    def test_attempt_buffer_skips_deleted_users(self):
+        """
+        Тест: Строки удаленного пользователя отбрасываются, остальные строки пачки сохраняются.
+        """
+        category = QuestionCategory.objects.create(name="Test Category")
+        question = Question.objects.create(category=category, text="Question", difficulty="easy")
+        gone = create_member_user(username="gone", password="password123", email="gone@example.com")
+        rows = [
+            AttemptAnswer(user_id=user_id, question_id=question.pk, is_correct=True)
+            for user_id in (self.member_user.pk, gone.pk)
+        ]
+        attempts = [QuizAttempt(user_id=gone.pk, total=1, correct=1)]
+        gone.delete()
+
+        attempts, kept = AttemptBuffer._without_deleted(attempts, rows)
+        self.assertEqual(attempts, [])
+        self.assertEqual([row.user_id for row in kept], [self.member_user.pk])
+
+    def test_generate_quiz_excludes_seen_questions(self):
+        """
+        Тест: exclude_seen исключает вопросы, на которые пользователь уже отвечал.
+        """
+        categories = self._create_question_bank()
+        questions = list(Question.objects.filter(category=categories[0], difficulty="hard"))
+        for question in questions[:3]:
+            AttemptAnswer.objects.create(user=self.member_user, question=question, is_correct=True)
+
+        self.client.force_authenticate(user=self.member_user)
+        response = self.client.get(reverse('generate-quiz'), {
+            'count': 10, 'category': categories[0].pk, 'difficulty': 'hard', 'exclude_seen': 1,
+        })
+        ids = {question['id'] for question in response.data['questions']}
+        self.assertEqual(ids, {question.pk for question in questions[3:]})
+
+    def _bulk_payload(self, category, count):
+        return [
+            {
+                'category': category.pk, 'text': f"Bulk {i}", 'difficulty': 'medium',
+                'answers': [{'text': "Yes", 'is_correct': True}, {'text': "No", 'is_correct': False}],
+            }
+            for i in range(count)
+        ]
+
+    def test_bulk_questions_create(self):
+        """
+        Тест: Пакетное создание вопросов с ответами за фиксированное число запросов.
+        """
+        category = QuestionCategory.objects.create(name="Test Category")
+        self.client.force_authenticate(user=self.member_user)
+        url = reverse('question-bulk')
+
+        with self.assertNumQueries(7):
+            small = self.client.post(url, self._bulk_payload(category, 2), format='json')
+        with self.assertNumQueries(7):
+            response = self.client.post(url, self._bulk_payload(category, 20), format='json')
+        self.assertEqual(small.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 20)
+
+        first = response.data['results'][0]
+        question = Question.objects.get(pk=first['id'])
+        self.assertEqual(question.text, "Bulk 0")
+        self.assertEqual(list(question.answers.order_by('id').values_list('id', flat=True)), first['answers'])
+        self.assertEqual(Answer.objects.count(), 44)
+
+    def test_bulk_questions_update_and_validation(self):
+        """
+        Тест: Пакет с ошибкой не записывается; обновление заменяет набор ответов.
+        """
+        category = QuestionCategory.objects.create(name="Test Category")
+        question = Question.objects.create(category=category, text="Old", difficulty="easy")
+        keep = Answer.objects.create(question=question, text="Keep", is_correct=True)
+        drop = Answer.objects.create(question=question, text="Drop", is_correct=False)
+        other = Answer.objects.create(
+            question=Question.objects.create(category=category, text="Other", difficulty="easy"),
+            text="Other", is_correct=True,
+        )
+        self.client.force_authenticate(user=self.member_user)
+        url = reverse('question-bulk')
+
+        invalid = self._bulk_payload(category, 3)
+        invalid[1]['answers'] = [{'text': "No", 'is_correct': False}]
+        invalid[2]['category'] = 999
+        response = self.client.post(url, invalid, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('answers', response.data['errors'][1])
+
+        response = self.client.post(url, [
+            {'id': question.pk, 'category': category.pk, 'text': "New", 'difficulty': 'hard',
+             'answers': [{'id': other.pk, 'text': "Stolen", 'is_correct': True}]},
+        ], format='json')
+        self.assertEqual(response.data['errors'][0]['answers'], "Ответ не связан с вопросом")
+        self.assertEqual(Question.objects.filter(text__startswith="Bulk").count(), 0)
+
+        response = self.client.post(url, [
+            {'id': question.pk, 'category': category.pk, 'text': "New", 'difficulty': 'hard',
+             'answers': [{'id': keep.pk, 'text': "Kept", 'is_correct': True}, {'text': "Added"}]},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        question.refresh_from_db()
+        self.assertEqual((question.text, question.difficulty), ("New", "hard"))
+        self.assertEqual(list(question.answers.order_by('id').values_list('text', flat=True)), ["Kept", "Added"])
+        self.assertFalse(Answer.objects.filter(pk=drop.pk).exists())
+        self.assertEqual(response.data['results'][0]['answers'][0], keep.pk)
+
     def test_question_category_list_create(self):
         """
         Тест: Создание и получение списка категорий вопросов.
@@ -0,0 +1,106 @@
+import io
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.signals import request_started, request_finished
+from django.db import close_old_connections
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from Tests_1.utils import create_member_user
+from quiz.answer_key import answer_key
+from quiz.attempts import attempt_buffer
+from quiz.models import QuestionCategory, Question, Answer, AttemptAnswer
+
+
+@override_settings(QUIZ_ATTEMPT_FLUSH_INTERVAL=0)
+class AsyncQuizViewTests(APITestCase):
+    def setUp(self):
+        answer_key.clear()
+        attempt_buffer.clear()
+        cache.clear()
+        self.member_user = create_member_user(username="member_test", password="password123",
+                                              email="member@example.com")
+        self.category = QuestionCategory.objects.create(name="Test Category")
+        self.questions = [
+            Question.objects.create(category=self.category, text=f"Question {i}", difficulty="easy")
+            for i in range(7)
+        ]
+        self.correct = Answer.objects.create(question=self.questions[0], text="Correct", is_correct=True)
+        self.wrong = Answer.objects.create(question=self.questions[1], text="Other", is_correct=False)
+
+    def test_async_check_answer_matches_sync(self):
+        """
+        Тест: Асинхронная проверка ответа отвечает так же, как синхронная.
+        """
+        self.client.force_authenticate(user=self.member_user)
+        cases = [
+            {'question_id': self.questions[0].pk, 'answer_id': self.correct.pk},
+            {'question_id': self.questions[0].pk, 'answer_id': self.wrong.pk},
+            {'question_id': 999, 'answer_id': self.correct.pk},
+            {'question_id': 'abc'},
+        ]
+        for data in cases:
+            expected = self.client.post(reverse('check_answer'), data)
+            response = self.client.post(reverse('async-check-answer'), data)
+            self.assertEqual((response.status_code, response.json()), (expected.status_code, expected.json()))
+
+        attempt_buffer.flush()
+        self.assertEqual(AttemptAnswer.objects.filter(user=self.member_user, is_correct=True).count(), 2)
+
+    def test_async_reads_match_sync(self):
+        """
+        Тест: Асинхронные списки и детали совпадают с синхронными, включая пагинацию и 404.
+        """
+        self.client.force_authenticate(user=self.member_user)
+        pairs = [
+            ('question-list-create', 'async-question-list', (), {'page': 2}),
+            ('question-detail', 'async-question-detail', (self.questions[3].pk,), None),
+            ('category-list-create', 'async-category-list', (), None),
+            ('category-detail', 'async-category-detail', (self.category.pk,), None),
+        ]
+        for sync_name, async_name, args, params in pairs:
+            expected = self.client.get(reverse(sync_name, args=args), params).json()
+            response = self.client.get(reverse(async_name, args=args), params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            # Ссылки на страницы ведут на свой эндпоинт
+            for key in ('next', 'previous'):
+                if isinstance(expected, dict) and expected.get(key):
+                    expected[key] = expected[key].replace(reverse(sync_name), reverse(async_name))
+            self.assertEqual(response.json(), expected)
+
+        response = self.client.get(reverse('async-question-list'), {'page': 10})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(reverse('async-question-detail', args=[999]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_async_views_require_authentication(self):
+        """
+        Тест: Асинхронные представления сохраняют аутентификацию и права DRF.
+        """
+        self.assertEqual(self.client.get(reverse('async-question-list')).status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post(reverse('async-check-answer'),
+                                    {'question_id': self.questions[0].pk, 'answer_id': self.correct.pk})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.force_authenticate(user=self.member_user)
+        self.assertEqual(self.client.put(reverse('async-question-list')).status_code,
+                         status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_benchmark_command(self):
+        """
+        Тест: Команда сравнения синхронного и асинхронного путей выполняет запросы без ошибок.
+        """
+        # Как и тестовый клиент, не даем обработчику запросов закрывать соединение теста
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        self.addCleanup(request_started.connect, close_old_connections)
+        self.addCleanup(request_finished.connect, close_old_connections)
+
+        out = io.StringIO()
+        call_command('benchmark_quiz_api', username='member_test', requests=4, concurrency=2, stdout=out)
+        rows = out.getvalue().splitlines()[1:]
+        self.assertEqual(len(rows), 6)
+        self.assertTrue(all(row.split()[-1] == '0' for row in rows), out.getvalue())
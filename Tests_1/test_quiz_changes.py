@@ -0,0 +1,121 @@
+import io
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from Tests_1.utils import get_admin_user, create_member_user
+from quiz.models import QuestionCategory, Question, Answer, ChangeLogEntry
+
+
+@override_settings(QUIZ_CHANGES_SETTLE_SECONDS=0)
+class QuizChangesTests(APITestCase):
+    def setUp(self):
+        self.history = QuestionCategory.objects.create(name="История")
+        self.questions = [
+            Question.objects.create(category=self.history, text=f"Вопрос {i}", difficulty="easy")
+            for i in range(5)
+        ]
+        for question in self.questions:
+            Answer.objects.create(question=question, text="Да", is_correct=True)
+        self.client.force_authenticate(user=create_member_user(
+            username="sync_user", password="password123", email="sync@example.com"
+        ))
+
+    def _sync(self, since, limit=None):
+        params = {'since': since}
+        if limit:
+            params['limit'] = limit
+        return self.client.get(reverse('quiz-changes'), params)
+
+    def _sync_all(self, since, limit=None):
+        categories, questions, deleted = {}, {}, set()
+        while True:
+            response = self._sync(since, limit)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            categories.update((item['id'], item) for item in response.data['categories'])
+            questions.update((item['id'], item) for item in response.data['questions'])
+            deleted.update(response.data['deleted']['questions'])
+            since = response.data['token']
+            if not response.data['more']:
+                return since, categories, questions, deleted
+
+    def test_full_sync_in_pages(self):
+        """
+        Тест: Синхронизация с нуля пачками возвращает все категории и вопросы с ответами без is_correct.
+        """
+        token, categories, questions, _ = self._sync_all(0, limit=2)
+        self.assertEqual(list(categories), [self.history.pk])
+        self.assertEqual(sorted(questions), [question.pk for question in self.questions])
+        answer = questions[self.questions[0].pk]['answers'][0]
+        self.assertEqual(answer['text'], "Да")
+        self.assertNotIn('is_correct', answer)
+        self.assertEqual(self._sync(token).data['questions'], [])
+
+        self.client.force_authenticate(user=get_admin_user())
+        response = self._sync(0)
+        self.assertTrue(response.data['questions'][0]['answers'][0]['is_correct'])
+
+    def test_incremental_sync(self):
+        """
+        Тест: После токена приходят только измененные вопросы и удаленные как отметки.
+        """
+        token = self._sync_all(0)[0]
+        changed, removed = self.questions[0], self.questions[1]
+        Answer.objects.create(question=changed, text="Нет", is_correct=False)
+        removed_id = removed.pk
+        removed.delete()
+
+        token, categories, questions, deleted = self._sync_all(token)
+        self.assertEqual(list(questions), [changed.pk])
+        self.assertEqual([answer['text'] for answer in questions[changed.pk]['answers']], ["Да", "Нет"])
+        self.assertEqual(deleted, {removed_id})
+        self.assertEqual(categories, {})
+
+    def test_invalid_parameters(self):
+        """
+        Тест: Неверные since и limit дают 400.
+        """
+        for params in ({'since': 'abc'}, {'since': '0-x'}, {'since': '-1'}, {'since': 0, 'limit': 0}, {'since': 0, 'limit': 5000}):
+            response = self.client.get(reverse('quiz-changes'), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(QUIZ_CHANGES_SETTLE_SECONDS=3600)
+    def test_fresh_entries_are_repeated(self):
+        """
+        Тест: Записи моложе окна не сдвигают токен, пока пачка неполная.
+        """
+        response = self._sync(0)
+        self.assertEqual(response.data['token'], '0-0')
+        self.assertEqual(len(response.data['questions']), 5)
+        # Полная пачка из свежих записей все равно продвигает токен
+        response = self._sync(0, limit=2)
+        self.assertTrue(response.data['more'])
+        self.assertNotEqual(response.data['token'], '0-0')
+
+    def test_compaction_expires_old_tokens(self):
+        """
+        Тест: Сжатие убирает повторы и старые удаления; токен до удаленной отметки получает 410.
+        """
+        old_token = self._sync_all(0)[0]
+        for _ in range(3):
+            self.questions[0].save()
+        removed = self.questions[1]
+        removed.delete()
+        ChangeLogEntry.objects.update(created_at=ChangeLogEntry.objects.first().created_at - timedelta(days=40))
+        before = ChangeLogEntry.objects.count()
+
+        call_command('compact_change_log', retention_days=30, stdout=io.StringIO())
+        # Остается по одной записи на существующий объект: категория и 4 вопроса
+        self.assertEqual(ChangeLogEntry.objects.count(), 5)
+        self.assertLess(ChangeLogEntry.objects.count(), before)
+
+        self.assertEqual(self._sync(old_token).status_code, status.HTTP_410_GONE)
+        # Постраничная синхронизация с нуля после сжатия не упирается в 410
+        token, _, questions, deleted = self._sync_all(0, limit=2)
+        self.assertEqual(len(questions), 4)
+        self.assertEqual(deleted, set())
+        self.assertEqual(self._sync(token).status_code, status.HTTP_200_OK)
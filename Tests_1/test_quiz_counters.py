@@ -0,0 +1,130 @@
+import io
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from Tests_1.utils import create_member_user
+from quiz.models import QuestionCategory, Question, Answer
+
+
+class CategoryCounterTests(APITestCase):
+    def setUp(self):
+        # Список категорий попадает в общий кэш страниц
+        cache.clear()
+        self.category = QuestionCategory.objects.create(name="История")
+        self.other_category = QuestionCategory.objects.create(name="География")
+        self.user = create_member_user(username="counter_user", password="password123", email="counter@example.com")
+
+    def _counters(self, category):
+        category.refresh_from_db()
+        return category.question_count, category.easy_count, category.medium_count, category.hard_count
+
+    def test_counters_follow_question_changes(self):
+        """
+        Тест: Счетчики меняются при создании, смене сложности и категории и удалении вопроса.
+        """
+        question = Question.objects.create(category=self.category, text="Вопрос 1", difficulty="easy")
+        Question.objects.create(category=self.category, text="Вопрос 2", difficulty="hard")
+        self.assertEqual(self._counters(self.category), (2, 1, 0, 1))
+
+        question = Question.objects.get(pk=question.pk)
+        question.difficulty = 'medium'
+        question.save()
+        self.assertEqual(self._counters(self.category), (2, 0, 1, 1))
+
+        question.category = self.other_category
+        question.save()
+        self.assertEqual(self._counters(self.category), (1, 0, 0, 1))
+        self.assertEqual(self._counters(self.other_category), (1, 0, 1, 0))
+
+        question.delete()
+        self.assertEqual(self._counters(self.other_category), (0, 0, 0, 0))
+
+    def test_category_save_keeps_counters(self):
+        """
+        Тест: Сохранение категории, загруженной до изменения вопросов, не затирает счетчики.
+        """
+        stale = QuestionCategory.objects.get(pk=self.category.pk)
+        Question.objects.create(category=self.category, text="Вопрос", difficulty="easy")
+        stale.name = "Новая история"
+        stale.save()
+        self.assertEqual(self._counters(self.category), (1, 1, 0, 0))
+        self.assertEqual(self.category.name, "Новая история")
+
+    def test_queryset_delete_updates_counters_once_per_category(self):
+        """
+        Тест: Удаление выборкой меняет счетчики одним запросом на категорию.
+        """
+        for i in range(5):
+            question = Question.objects.create(category=self.category, text=f"Вопрос {i}", difficulty="easy")
+            Answer.objects.create(question=question, text="Да", is_correct=True)
+        Question.objects.create(category=self.other_category, text="Другой", difficulty="hard")
+
+        with CaptureQueriesContext(connection) as queries:
+            Question.objects.filter(category=self.category, text__in=["Вопрос 0", "Вопрос 1"]).delete()
+        updates = [query for query in queries if query['sql'].startswith('UPDATE "quiz_questioncategory"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(self._counters(self.category), (3, 3, 0, 0))
+        self.assertEqual(self._counters(self.other_category), (1, 0, 0, 1))
+
+    def test_bulk_endpoint_updates_counters(self):
+        """
+        Тест: Пакетная запись вопросов учитывает новые вопросы и смену категории и сложности.
+        """
+        question = Question.objects.create(category=self.category, text="Старый", difficulty="easy")
+        Answer.objects.create(question=question, text="Да", is_correct=True)
+        self.client.force_authenticate(user=self.user)
+        payload = [
+            {'id': question.pk, 'category': self.other_category.pk, 'text': "Старый", 'difficulty': 'hard'},
+            {'category': self.category.pk, 'text': "Новый", 'difficulty': 'medium',
+             'answers': [{'text': "Да", 'is_correct': True}]},
+        ]
+        response = self.client.post(reverse('question-bulk'), payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._counters(self.category), (1, 0, 1, 0))
+        self.assertEqual(self._counters(self.other_category), (1, 0, 0, 1))
+
+    def test_category_list_exposes_counters_without_counting(self):
+        """
+        Тест: Список категорий отдает счетчики без запросов к вопросам.
+        """
+        for i, difficulty in enumerate(['easy', 'easy', 'hard']):
+            Question.objects.create(category=self.category, text=f"Вопрос {i}", difficulty=difficulty)
+        self.client.force_authenticate(user=self.user)
+
+        # Версия каталога для ETag и сами категории
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('category-list-create'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        item = next(item for item in response.data if item['id'] == self.category.pk)
+        self.assertEqual(
+            (item['question_count'], item['easy_count'], item['medium_count'], item['hard_count']), (3, 2, 0, 1)
+        )
+
+        # Счетчики только для чтения
+        url = reverse('category-detail', args=[self.category.pk])
+        self.client.patch(url, {'question_count': 100}, format='json')
+        self.assertEqual(self._counters(self.category), (3, 2, 0, 1))
+
+    def test_repair_command(self):
+        """
+        Тест: Команда находит расхождения счетчиков и пересчитывает их.
+        """
+        Question.objects.create(category=self.category, text="Вопрос", difficulty="medium")
+        QuestionCategory.objects.filter(pk=self.category.pk).update(question_count=7, medium_count=0)
+
+        with self.assertRaises(CommandError):
+            call_command('repair_category_counters', check=True, stdout=io.StringIO())
+
+        out = io.StringIO()
+        call_command('repair_category_counters', stdout=out)
+        self.assertIn("Исправлено категорий: 1 из 2", out.getvalue())
+        self.assertEqual(self._counters(self.category), (1, 0, 1, 0))
+        call_command('repair_category_counters', check=True, stdout=io.StringIO())
@@ -0,0 +1,117 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from Tests_1.utils import get_admin_user, create_member_user
+from quiz.models import QuestionCategory, Question, Answer
+
+
+class CatalogETagTests(APITestCase):
+    def setUp(self):
+        # Ответ без If-None-Match не должен прийти из кэша страниц
+        cache.clear()
+        # Версии пишутся после фиксации транзакции; в тестах ее заменяет captureOnCommitCallbacks
+        with self.captureOnCommitCallbacks(execute=True):
+            self.history = QuestionCategory.objects.create(name="История")
+            self.geography = QuestionCategory.objects.create(name="География")
+            self.question = Question.objects.create(category=self.history, text="Вопрос", difficulty="easy")
+            self.answer = Answer.objects.create(question=self.question, text="Да", is_correct=True)
+        self.member_user = create_member_user(username="etag_user", password="password123",
+                                              email="etag@example.com")
+        self.client.force_authenticate(user=self.member_user)
+
+    def _get(self, name, *args, etag=None, params=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(reverse(name, args=args), params, **headers)
+
+    def _change(self, func, *args, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return func(*args, **kwargs)
+
+    def test_not_modified_without_main_query(self):
+        """
+        Тест: Совпавший If-None-Match дает 304 одним запросом версии, изменение — новый ETag.
+        """
+        first = self._get('category-list-create')
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        etag = first['ETag']
+        self.assertIn('no-cache', first['Cache-Control'])
+
+        with self.assertNumQueries(1):
+            response = self._get('category-list-create', etag=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+        # 304 не попал в кэш страниц: запрос без заголовка получает данные
+        self.assertEqual(len(self._get('category-list-create').data), 2)
+
+        self._change(Question.objects.create, category=self.geography, text="Новый", difficulty="hard")
+        response = self._get('category-list-create', etag=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_category_versions(self):
+        """
+        Тест: Версия категории меняется только при изменениях ее вопросов и ответов.
+        """
+        history_etag = self._get('category-detail', self.history.pk)['ETag']
+        geography_etag = self._get('category-detail', self.geography.pk)['ETag']
+        list_etag = self._get('question-list-create', params={'category': self.history.pk})['ETag']
+
+        self._change(Question.objects.create, category=self.geography, text="Новый", difficulty="hard")
+        self.assertEqual(self._get('category-detail', self.history.pk, etag=history_etag).status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(
+            self._get('question-list-create', etag=list_etag, params={'category': self.history.pk}).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+        geography_etag = self._get('category-detail', self.geography.pk, etag=geography_etag)['ETag']
+
+        self.answer.text = "Конечно"
+        self._change(self.answer.save)
+        history_etag = self._get('category-detail', self.history.pk, etag=history_etag)['ETag']
+
+        # Перенос вопроса меняет версии обеих категорий
+        self.question.category = self.geography
+        self._change(self.question.save)
+        for category, etag in ((self.history, history_etag), (self.geography, geography_etag)):
+            response = self._get('category-detail', category.pk, etag=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_staff_and_members_get_different_etags(self):
+        """
+        Тест: Вопросы с ответами для сотрудника и участника помечаются разными ETag.
+        """
+        member_etag = self._get('question-full-detail', self.question.pk)['ETag']
+        self.client.force_authenticate(user=get_admin_user())
+        response = self._get('question-full-detail', self.question.pk, etag=member_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['answers'][0]['is_correct'])
+
+    def test_async_views_answer_not_modified(self):
+        """
+        Тест: Асинхронные эндпоинты отдают те же версии и отвечают 304.
+        """
+        etag = self._get('async-category-detail', self.history.pk)['ETag']
+        self.assertEqual(self._get('async-category-detail', self.history.pk, etag=etag).status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(self._get('category-detail', self.history.pk)['ETag'], etag)
+
+    def test_cascade_delete_writes_versions_once(self):
+        """
+        Тест: Каскадное удаление категории меняет версии несколькими запросами, а не на каждую строку.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(20):
+                question = Question.objects.create(category=self.history, text=f"Вопрос {i}", difficulty="easy")
+                Answer.objects.create(question=question, text="Да", is_correct=True)
+        etag = self._get('category-list-create')['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            self._change(self.history.delete)
+        versions = [query for query in queries if 'quiz_catalogversion' in query['sql']]
+        self.assertLessEqual(len(versions), 3)
+        self.assertEqual(self._get('category-list-create', etag=etag).status_code, status.HTTP_200_OK)
@@ -0,0 +1,84 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from Tests_1.test_quiz_import import QUIZ_ITEMS
+from Tests_1.utils import get_admin_user, create_member_user
+from quiz.models import QuestionCategory, Question
+
+
+def bank_snapshot():
+    return sorted(
+        (question.category.name, question.text, question.difficulty,
+         tuple(question.answers.order_by('id').values_list('text', 'is_correct')))
+        for question in Question.objects.select_related('category')
+    )
+
+
+class QuizExportTests(APITestCase):
+    def setUp(self):
+        path = self._temp_path('.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(QUIZ_ITEMS, f, ensure_ascii=False)
+        call_command('load_quiz_data', file=path, stdout=io.StringIO())
+
+    def _temp_path(self, suffix):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def _round_trip(self, suffix, fmt):
+        expected = bank_snapshot()
+        path = self._temp_path(suffix)
+        call_command('export_quiz_data', output=path, format=fmt, chunk_size=2, stdout=io.StringIO())
+        Question.objects.all().delete()
+        QuestionCategory.objects.all().delete()
+
+        call_command('load_quiz_data', file=path, bulk=True, stdout=io.StringIO())
+        self.assertEqual(bank_snapshot(), expected)
+
+    def test_json_round_trip(self):
+        """
+        Тест: Выгрузка JSON загружается обратно командой load_quiz_data без потерь.
+        """
+        self._round_trip('.json', 'json')
+
+    def test_gzip_ndjson_round_trip(self):
+        """
+        Тест: Сжатая выгрузка NDJSON загружается обратно без распаковки вручную.
+        """
+        self._round_trip('.ndjson.gz', 'ndjson')
+
+    def test_export_endpoint(self):
+        """
+        Тест: Эндпоинт выгрузки отдает поток CSV и gzip и доступен только администраторам.
+        """
+        url = reverse('export-quiz')
+        self.client.force_authenticate(user=create_member_user(
+            username="member_test", password="password123", email="member@example.com"
+        ))
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=get_admin_user())
+        response = self.client.get(url, {'type': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8'))))
+        self.assertEqual(rows[0], ['category', 'question', 'difficulty', 'answer', 'is_correct'])
+        self.assertEqual(len(rows), 1 + 5)
+
+        response = self.client.get(url, {'type': 'json', 'gzip': 1})
+        self.assertIn('quiz_export.json.gz', response['Content-Disposition'])
+        items = json.loads(gzip.decompress(b''.join(response.streaming_content)))
+        self.assertEqual(len(items), len(QUIZ_ITEMS))
+
+        self.assertEqual(self.client.get(url, {'type': 'xml'}).status_code, status.HTTP_400_BAD_REQUEST)
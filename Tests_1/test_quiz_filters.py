@@ -0,0 +1,145 @@
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from Tests_1.utils import create_member_user
+from quiz.filters import QuestionFilter, AnswerFilter
+from quiz.models import QuestionCategory, Question, Answer
+from quiz.views import QuestionListCreateAPIView, AnswerListCreateAPIView
+
+
+class QuizFilterTests(APITestCase):
+    def setUp(self):
+        # Списки попадают в общий кэш страниц
+        cache.clear()
+        self.history = QuestionCategory.objects.create(name="История")
+        self.geography = QuestionCategory.objects.create(name="География")
+        self.easy = Question.objects.create(category=self.history, text="Легкий", difficulty="easy")
+        self.hard = Question.objects.create(category=self.history, text="Сложный", difficulty="hard")
+        self.other = Question.objects.create(category=self.geography, text="Другой", difficulty="easy")
+        self.correct = Answer.objects.create(question=self.easy, text="Да", is_correct=True)
+        self.wrong = Answer.objects.create(question=self.hard, text="Нет", is_correct=False)
+        Answer.objects.create(question=self.other, text="Да", is_correct=True)
+        self.client.force_authenticate(user=create_member_user(
+            username="filter_user", password="password123", email="filter@example.com"
+        ))
+
+    def _ids(self, url, params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data['results'] if isinstance(response.data, dict) else response.data
+        return [item['id'] for item in data]
+
+    def test_question_filters(self):
+        """
+        Тест: Список вопросов фильтруется по категории, сложности и наличию правильного ответа.
+        """
+        for url in (reverse('question-list-create'), reverse('async-question-list')):
+            self.assertEqual(self._ids(url, {'category': self.history.pk}), [self.easy.pk, self.hard.pk])
+            self.assertEqual(self._ids(url, {'category': self.history.pk, 'difficulty': 'easy'}), [self.easy.pk])
+            self.assertEqual(self._ids(url, {'has_correct_answer': 'false'}), [self.hard.pk])
+            self.assertEqual(
+                self._ids(url, {'difficulty': 'easy', 'has_correct_answer': 'true'}), [self.easy.pk, self.other.pk]
+            )
+            response = self.client.get(url, {'difficulty': 'unknown'})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_answer_filters(self):
+        """
+        Тест: Список ответов фильтруется по вопросу, категории и сложности вопроса и правильности.
+        """
+        url = reverse('answer-list-create')
+        self.assertEqual(self._ids(url, {'question': self.easy.pk}), [self.correct.pk])
+        self.assertEqual(self._ids(url, {'category': self.history.pk, 'is_correct': 'false'}), [self.wrong.pk])
+        self.assertEqual(self._ids(url, {'difficulty': 'hard'}), [self.wrong.pk])
+
+
+class QuizFilterPlanTests(TestCase):
+    """
+    Планы запросов отфильтрованных списков на большом наборе данных:
+    фильтры должны идти по индексам, а не читать таблицы целиком.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        categories = QuestionCategory.objects.bulk_create([QuestionCategory(name=f"Категория {i}") for i in range(50)])
+        difficulties = ['easy', 'medium', 'hard']
+        Question.objects.bulk_create([
+            Question(category=categories[i % 50], text=f"Вопрос {i}", difficulty=difficulties[i % 3])
+            for i in range(6000)
+        ], batch_size=500)
+        question_ids = list(Question.objects.values_list('id', flat=True))
+        Answer.objects.bulk_create([
+            Answer(question_id=question_id, text=f"Ответ {j}", is_correct=j == 0)
+            for question_id in question_ids for j in range(3)
+        ], batch_size=500)
+        cls._update_statistics()
+
+    @classmethod
+    def _update_statistics(cls):
+        """
+        Статистика для планировщика, как на рабочей базе. У каждой СУБД своя команда.
+        """
+        with connection.cursor() as cursor:
+            if connection.vendor in ('sqlite', 'postgresql'):
+                cursor.execute('ANALYZE')
+            elif connection.vendor == 'microsoft':
+                for model in (QuestionCategory, Question, Answer):
+                    cursor.execute(f'UPDATE STATISTICS {connection.ops.quote_name(model._meta.db_table)} WITH FULLSCAN')
+
+    def _queryset(self, view_class, filterset_class, params):
+        request = RequestFactory().get('/', params)
+        view = view_class()
+        filterset = filterset_class(request.GET, queryset=view.queryset.all(), request=request)
+        self.assertTrue(filterset.is_valid(), filterset.errors)
+        queryset = filterset.qs
+        if view_class is QuestionListCreateAPIView:
+            queryset = queryset[:5]
+        return queryset
+
+    def _showplan_xml(self, queryset):
+        """
+        Оценочный план SQL Server: QuerySet.explain() на mssql не поддерживается.
+        """
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('SET SHOWPLAN_XML ON')
+            try:
+                cursor.execute(sql, params)
+                return ''.join(row[0] for row in cursor.fetchall())
+            finally:
+                cursor.execute('SET SHOWPLAN_XML OFF')
+
+    def _assert_no_full_scan(self, queryset):
+        if connection.vendor == 'microsoft':
+            plan = self._showplan_xml(queryset)
+            self.assertIsNone(re.search(r'PhysicalOp="(Table Scan|Clustered Index Scan)"', plan), plan)
+        elif connection.features.supports_explaining_query_execution:
+            plan = queryset.explain()
+            # SQLite: «SCAN таблица», PostgreSQL: «Seq Scan on таблица»
+            self.assertIsNone(re.search(r'\bSCAN (quiz_\w+|U\d+)\b|Seq Scan on', plan), plan)
+        else:
+            self.skipTest("СУБД не умеет показывать план запроса")
+
+    def test_filters_use_indexes(self):
+        """
+        Тест: Фильтры по категории, сложности, вопросу и правильности не вызывают полного чтения таблиц.
+        """
+        cases = [
+            (QuestionListCreateAPIView, QuestionFilter, {'category': 7}),
+            (QuestionListCreateAPIView, QuestionFilter, {'category': 7, 'difficulty': 'hard'}),
+            (QuestionListCreateAPIView, QuestionFilter, {'difficulty': 'medium'}),
+            (QuestionListCreateAPIView, QuestionFilter, {'category': 7, 'has_correct_answer': 'true'}),
+            (AnswerListCreateAPIView, AnswerFilter, {'question': 42}),
+            (AnswerListCreateAPIView, AnswerFilter, {'question': 42, 'is_correct': 'true'}),
+            (AnswerListCreateAPIView, AnswerFilter, {'category': 7, 'difficulty': 'easy'}),
+        ]
+        for view_class, filterset_class, params in cases:
+            with self.subTest(params=params):
+                self._assert_no_full_scan(self._queryset(view_class, filterset_class, params))
@@ -0,0 +1,242 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+
+from quiz.importers import QuizDataError, iter_json_array
+from quiz.models import QuestionCategory, Question, Answer
+
+QUIZ_ITEMS = [
+    {
+        "category": "Млекопитающие",
+        "question": "Самое крупное млекопитающее?",
+        "answers": [
+            {"text": "Слон", "is_correct": False},
+            {"text": "Синий кит", "is_correct": True},
+        ],
+        "difficulty": "easy",
+    },
+    {
+        "category": "Птицы",
+        "question": "Какая птица не умеет летать?",
+        "answers": [
+            {"text": "Орел", "is_correct": False},
+            {"text": "Пингвин", "is_correct": True},
+        ],
+        "difficulty": "medium",
+    },
+    {
+        "category": "Млекопитающие",
+        "question": "Кто откладывает яйца?",
+        "answers": [
+            {"text": "Утконос", "is_correct": True},
+        ],
+        "difficulty": "hard",
+    },
+]
+
+
+class QuizImportTests(TestCase):
+    def _write_file(self, suffix, content):
+        """
+        Создает временный файл с данными викторины и удаляет его после теста.
+        """
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_iter_json_array_small_chunks(self):
+        """
+        Тест: Потоковый разбор массива не зависит от размера блока чтения.
+        """
+        data = json.dumps(QUIZ_ITEMS + [1234567, "строка", None], ensure_ascii=False)
+        for chunk_size in (1, 3, 7, 4096):
+            items = list(iter_json_array(io.StringIO(data), chunk_size=chunk_size))
+            self.assertEqual(items, QUIZ_ITEMS + [1234567, "строка", None])
+
+    def test_iter_json_array_split_scalars(self):
+        """
+        Тест: Числа, разрезанные границей блока, разбираются целиком.
+        """
+        data = '[1e-07, -12.5E+3, 100, true, null]'
+        for chunk_size in (1, 2, 3, 5, 4096):
+            items = list(iter_json_array(io.StringIO(data), chunk_size=chunk_size))
+            self.assertEqual(items, [1e-07, -12.5E+3, 100, True, None])
+
+    def test_iter_json_array_rejects_trailing_data(self):
+        """
+        Тест: Данные после закрывающей скобки массива — ошибка, как у json.load.
+        """
+        for chunk_size in (1, 3, 4096):
+            for data in ('[{"a": 1}] {"b": 2}', '[1]2', '[1] \n x'):
+                with self.assertRaises(QuizDataError):
+                    list(iter_json_array(io.StringIO(data), chunk_size=chunk_size))
+            self.assertEqual(list(iter_json_array(io.StringIO('[1]  \n'), chunk_size=chunk_size)), [1])
+
+    def test_bulk_load_json(self):
+        """
+        Тест: Пакетная загрузка JSON создает вопросы, ответы и не дублирует категории.
+        """
+        path = self._write_file('.json', json.dumps(QUIZ_ITEMS, ensure_ascii=False))
+        call_command('load_quiz_data', file=path, bulk=True, batch_size=2, stdout=io.StringIO())
+
+        self.assertEqual(QuestionCategory.objects.count(), 2)
+        self.assertEqual(Question.objects.count(), 3)
+        self.assertEqual(Answer.objects.count(), 5)
+        question = Question.objects.get(text="Кто откладывает яйца?")
+        self.assertEqual(question.category.name, "Млекопитающие")
+        self.assertEqual(list(question.answers.values_list('text', 'is_correct')), [("Утконос", True)])
+
+    def test_bulk_load_ndjson(self):
+        """
+        Тест: Пакетная загрузка NDJSON с определением формата по расширению.
+        """
+        content = '\n'.join(json.dumps(item, ensure_ascii=False) for item in QUIZ_ITEMS) + '\n\n'
+        path = self._write_file('.ndjson', content)
+        out = io.StringIO()
+        call_command('load_quiz_data', file=path, bulk=True, stdout=out)
+
+        self.assertEqual(Question.objects.count(), 3)
+        self.assertEqual(Answer.objects.filter(is_correct=True).count(), 3)
+        self.assertIn('вопр./с', out.getvalue())
+
+    def test_legacy_load_matches_bulk(self):
+        """
+        Тест: Обычный режим загрузки дает тот же результат, что и пакетный.
+        """
+        path = self._write_file('.json', json.dumps(QUIZ_ITEMS, ensure_ascii=False))
+        call_command('load_quiz_data', file=path, stdout=io.StringIO())
+
+        self.assertEqual(QuestionCategory.objects.count(), 2)
+        self.assertEqual(Question.objects.count(), 3)
+        self.assertEqual(Answer.objects.count(), 5)
+
+    def test_russian_difficulty_labels_normalized(self):
+        """
+        Тест: Подписи сложности из файла ("Легкий") сохраняются кодами ('easy').
+        """
+        items = [dict(item, difficulty=label) for item, label in zip(QUIZ_ITEMS, ["Легкий", "Средний", "Сложный"])]
+        path = self._write_file('.json', json.dumps(items, ensure_ascii=False))
+        call_command('load_quiz_data', file=path, bulk=True, stdout=io.StringIO())
+        self.assertEqual(sorted(Question.objects.values_list('difficulty', flat=True)), ['easy', 'hard', 'medium'])
+
+        bad = self._write_file('.json', json.dumps([dict(QUIZ_ITEMS[0], difficulty="Очень сложный")],
+                                                   ensure_ascii=False))
+        with self.assertRaises(CommandError):
+            call_command('load_quiz_data', file=bad, bulk=True, stdout=io.StringIO())
+
+    def test_bulk_load_without_returning_pks(self):
+        """
+        Тест: Пакетная загрузка работает на бэкендах без возврата ключей из bulk insert (SQL Server).
+        """
+        path = self._write_file('.json', json.dumps(QUIZ_ITEMS, ensure_ascii=False))
+        features = type(connection.features)
+        with mock.patch.object(features, 'can_return_rows_from_bulk_insert', new_callable=mock.PropertyMock,
+                               return_value=False):
+            call_command('load_quiz_data', file=path, bulk=True, stdout=io.StringIO())
+
+        for question in Question.objects.all():
+            self.assertTrue(question.answers.filter(is_correct=True).exists())
+        self.assertEqual(Answer.objects.count(), 5)
+
+
+class QuizSyncTests(TestCase):
+    def _sync(self, items, **options):
+        """
+        Записывает элементы во временный файл и запускает синхронизацию.
+        """
+        fd, path = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(items, f, ensure_ascii=False)
+        self.addCleanup(os.remove, path)
+        out = io.StringIO()
+        call_command('load_quiz_data', file=path, sync=True, batch_size=2, stdout=out, **options)
+        return out.getvalue()
+
+    def test_sync_is_idempotent(self):
+        """
+        Тест: Повторная синхронизация того же файла ничего не дублирует.
+        """
+        self._sync(QUIZ_ITEMS)
+        ids = set(Question.objects.values_list('id', flat=True))
+        out = self._sync(QUIZ_ITEMS)
+
+        self.assertEqual(set(Question.objects.values_list('id', flat=True)), ids)
+        self.assertEqual(Answer.objects.count(), 5)
+        self.assertIn('без изменений: 3', out)
+
+    def test_sync_updates_changed_and_inserts_new(self):
+        """
+        Тест: Измененный вопрос обновляется на месте, новый — добавляется.
+        """
+        self._sync(QUIZ_ITEMS)
+        question_id = Question.objects.get(text="Кто откладывает яйца?").pk
+
+        changed = json.loads(json.dumps(QUIZ_ITEMS))
+        changed[2]['answers'].append({"text": "Ехидна", "is_correct": True})
+        changed[2]['difficulty'] = 'medium'
+        changed.append({
+            "category": "Рыбы",
+            "question": "Самая быстрая рыба?",
+            "answers": [{"text": "Парусник", "is_correct": True}],
+            "difficulty": "hard",
+        })
+        self._sync(changed)
+
+        question = Question.objects.get(pk=question_id)
+        self.assertEqual(question.difficulty, 'medium')
+        self.assertEqual(set(question.answers.values_list('text', flat=True)), {"Утконос", "Ехидна"})
+        self.assertEqual(Question.objects.count(), 4)
+        mammals = QuestionCategory.objects.get(name="Млекопитающие")
+        self.assertEqual((mammals.question_count, mammals.easy_count, mammals.medium_count, mammals.hard_count),
+                         (2, 1, 1, 0))
+
+    def test_sync_keeps_unchanged_answers(self):
+        """
+        Тест: Синхронизация сохраняет id совпадающих ответов и меняет только отличающиеся.
+        """
+        self._sync(QUIZ_ITEMS)
+        answer_ids = dict(Answer.objects.values_list('text', 'id'))
+
+        changed = json.loads(json.dumps(QUIZ_ITEMS))
+        changed[0]['difficulty'] = 'hard'
+        changed[1]['answers'] = [
+            {"text": "Орел", "is_correct": True},
+            {"text": "Страус", "is_correct": False},
+        ]
+        self._sync(changed)
+
+        self.assertEqual(Question.objects.get(text="Самое крупное млекопитающее?").difficulty, 'hard')
+        answers = {text: (answer_id, is_correct)
+                   for text, answer_id, is_correct in Answer.objects.values_list('text', 'id', 'is_correct')}
+        self.assertEqual(set(answers), {"Слон", "Синий кит", "Орел", "Страус", "Утконос"})
+        for text in ("Слон", "Синий кит", "Орел", "Утконос"):
+            self.assertEqual(answers[text][0], answer_ids[text])
+        self.assertTrue(answers["Орел"][1])
+
+    def test_sync_delete_missing(self):
+        """
+        Тест: С --delete-missing удаляются только загруженные вопросы, которых нет в файле.
+        """
+        self._sync(QUIZ_ITEMS)
+        category = QuestionCategory.objects.get(name="Птицы")
+        manual = Question.objects.create(category=category, text="Создан через API", difficulty="easy")
+
+        self._sync(QUIZ_ITEMS[:1], delete_missing=True)
+
+        self.assertEqual(
+            set(Question.objects.values_list('text', flat=True)),
+            {"Самое крупное млекопитающее?", manual.text},
+        )
+        self.assertEqual(
+            dict(QuestionCategory.objects.values_list('name', 'question_count')),
+            {"Млекопитающие": 1, "Птицы": 1},
+        )
@@ -0,0 +1,135 @@
+import io
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from Tests_1.utils import create_member_user
+from quiz.answer_key import answer_key
+from quiz.attempts import attempt_buffer
+from quiz.leaderboards import CategoryLeaderboard, leaderboards
+from quiz.models import QuestionCategory, Question, Answer, CategoryScore
+
+
+@override_settings(QUIZ_ATTEMPT_FLUSH_INTERVAL=0)
+class LeaderboardTests(APITestCase):
+    def setUp(self):
+        answer_key.clear()
+        attempt_buffer.clear()
+        leaderboards.reset()
+        # Таблица лидеров попадает в общий кэш страниц
+        cache.clear()
+        self.category = QuestionCategory.objects.create(name="История")
+        self.other_category = QuestionCategory.objects.create(name="География")
+        self.questions = []
+        for i in range(3):
+            question = Question.objects.create(category=self.category, text=f"Вопрос {i}", difficulty="easy")
+            correct = Answer.objects.create(question=question, text="Да", is_correct=True)
+            wrong = Answer.objects.create(question=question, text="Нет", is_correct=False)
+            self.questions.append((question, correct, wrong))
+        self.users = [
+            create_member_user(username=f"player{i}", password="password123", email=f"player{i}@example.com")
+            for i in range(3)
+        ]
+
+    def _answer(self, user, correct_count, wrong_count=0):
+        answers = []
+        for question, correct, wrong in self.questions[:correct_count]:
+            answers.append({'question_id': question.pk, 'answer_id': correct.pk})
+        for question, correct, wrong in self.questions[:wrong_count]:
+            answers.append({'question_id': question.pk, 'answer_id': wrong.pk})
+        self.client.force_authenticate(user=user)
+        self.client.post(reverse('check_answers'), {'answers': answers}, format='json')
+
+    def test_board_ranks(self):
+        """
+        Тест: Равные результаты делят место, следующее место пропускается.
+        """
+        board = CategoryLeaderboard([(1, 5, 3), (2, 4, 1), (3, 3, 3)])
+        board.add(2, 2, 2)
+        self.assertEqual(board.top(10), [(1, 1, 5, 3), (1, 2, 6, 3), (1, 3, 3, 3)])
+        board.add(4, 1, 1)
+        self.assertEqual(board.rank(4), (4, 1, 1))
+        self.assertIsNone(board.rank(5))
+
+    def test_scores_updated_on_flush(self):
+        """
+        Тест: Запись ответов из буфера обновляет результаты и загруженную таблицу.
+        """
+        self._answer(self.users[0], 1, 1)
+        self.assertEqual(leaderboards.top(self.category.pk, 10), [])  # Таблица загружена до записи
+
+        attempt_buffer.flush()
+        score = CategoryScore.objects.get(user=self.users[0], category=self.category)
+        self.assertEqual((score.answered, score.correct), (2, 1))
+
+        self._answer(self.users[1], 3)
+        self._answer(self.users[0], 2)
+        attempt_buffer.flush()
+        self.assertEqual(leaderboards.top(self.category.pk, 10), [
+            (1, self.users[1].pk, 3, 3), (2, self.users[0].pk, 4, 2),
+        ])
+        self.assertFalse(CategoryScore.objects.filter(category=self.other_category).exists())
+
+    def test_repeated_correct_answer_counted_once(self):
+        """
+        Тест: Повторный правильный ответ на тот же вопрос не увеличивает результат.
+        """
+        for _ in range(3):
+            self._answer(self.users[0], 1)
+        attempt_buffer.flush()
+        self._answer(self.users[0], 1)
+        self._answer(self.users[0], 2)
+        attempt_buffer.flush()
+
+        score = CategoryScore.objects.get(user=self.users[0], category=self.category)
+        self.assertEqual((score.answered, score.correct), (6, 2))
+        self.assertEqual(leaderboards.rank(self.category.pk, self.users[0].pk), (1, 6, 2))
+        call_command('rebuild_leaderboards', check=True, stdout=io.StringIO())
+
+    def test_leaderboard_endpoints(self):
+        """
+        Тест: Таблица лидеров категории и место текущего пользователя.
+        """
+        self._answer(self.users[0], 1)
+        self._answer(self.users[1], 3)
+        attempt_buffer.flush()
+
+        self.client.force_authenticate(user=self.users[0])
+        response = self.client.get(reverse('category-leaderboard', args=[self.category.pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['username'] for row in response.data['results']], ['player1', 'player0'])
+        self.assertEqual(response.data['results'][0]['rank'], 1)
+
+        response = self.client.get(reverse('category-leaderboard-me', args=[self.category.pk]))
+        self.assertEqual((response.data['rank'], response.data['correct'], response.data['participants']), (2, 1, 2))
+
+        self.client.force_authenticate(user=self.users[2])
+        response = self.client.get(reverse('category-leaderboard-me', args=[self.category.pk]))
+        self.assertIsNone(response.data['rank'])
+
+        self.assertEqual(self.client.get(reverse('category-leaderboard', args=[999])).status_code,
+                         status.HTTP_404_NOT_FOUND)
+        response = self.client.get(reverse('category-leaderboard', args=[self.category.pk]), {'limit': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_command(self):
+        """
+        Тест: Команда rebuild_leaderboards сверяет и пересчитывает результаты.
+        """
+        self._answer(self.users[0], 2, 1)
+        attempt_buffer.flush()
+        call_command('rebuild_leaderboards', check=True, stdout=io.StringIO())
+
+        CategoryScore.objects.filter(user=self.users[0]).update(correct=10)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_leaderboards', check=True, stdout=io.StringIO())
+
+        call_command('rebuild_leaderboards', stdout=io.StringIO())
+        score = CategoryScore.objects.get(user=self.users[0], category=self.category)
+        self.assertEqual((score.answered, score.correct), (3, 2))
+        self.assertEqual(leaderboards.rank(self.category.pk, self.users[0].pk), (1, 3, 2))
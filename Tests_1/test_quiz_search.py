@@ -0,0 +1,97 @@
+import io
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from Tests_1.utils import create_member_user
+from quiz.models import QuestionCategory, Question, Answer
+from quiz.search import SearchIndex, question_search, stem
+
+
+@override_settings(QUIZ_SEARCH_INDEX_PATH=None)
+class QuizSearchTests(APITestCase):
+    def setUp(self):
+        """
+        Настройка тестового окружения:
+        - Сбрасываем индекс процесса, чтобы он строился по данным текущего теста.
+        - Создаем вопросы с ответами и пользователя.
+        """
+        question_search.reset()
+        self.addCleanup(question_search.reset)
+        self.member_user = create_member_user(
+            username="member_test",
+            password="password123",
+            email="member@example.com"
+        )
+        category = QuestionCategory.objects.create(name="Животные")
+        self.whale = Question.objects.create(
+            category=category, text="Какое животное является самым крупным млекопитающим?", difficulty="easy"
+        )
+        Answer.objects.create(question=self.whale, text="Синий кит", is_correct=True)
+        self.bird = Question.objects.create(
+            category=category, text="Какая птица не умеет летать?", difficulty="medium"
+        )
+        Answer.objects.create(question=self.bird, text="Пингвин", is_correct=True)
+        self.client.force_authenticate(user=self.member_user)
+
+    def _search(self, query):
+        response = self.client.get(reverse('search-questions'), {'q': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in response.data['results']]
+
+    def test_stem_merges_word_forms(self):
+        """
+        Тест: Разные формы слова сводятся к одной основе.
+        """
+        self.assertEqual(stem("млекопитающее"), stem("млекопитающим"))
+        self.assertEqual(stem("пингвины"), stem("пингвин"))
+        self.assertEqual(stem("Ёжики"), stem("ежик"))
+
+    def test_search_matches_word_forms_and_answers(self):
+        """
+        Тест: Поиск находит вопрос по другой форме слова и по тексту ответа.
+        """
+        self.assertEqual(self._search("млекопитающие"), [self.whale.pk])
+        self.assertEqual(self._search("пингвины"), [self.bird.pk])
+
+    def test_search_tolerates_typos(self):
+        """
+        Тест: Запрос с опечаткой находит вопрос через триграммы.
+        """
+        self.assertEqual(self._search("пингвиин"), [self.bird.pk])
+
+    def test_search_index_updated_by_signals(self):
+        """
+        Тест: Изменения вопросов и ответов сразу попадают в загруженный индекс.
+        """
+        self.assertEqual(self._search("страус"), [])
+        Answer.objects.create(question=self.bird, text="Страус", is_correct=True)
+        self.assertEqual(self._search("страус"), [self.bird.pk])
+
+        self.bird.delete()
+        self.assertEqual(self._search("пингвин"), [])
+
+    def test_search_requires_query(self):
+        """
+        Тест: Пустой запрос отклоняется.
+        """
+        response = self.client.get(reverse('search-questions'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_build_search_index_command(self):
+        """
+        Тест: Команда сохраняет индекс, который загружается из файла.
+        """
+        fd, path = tempfile.mkstemp(suffix='.pickle')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        call_command('build_search_index', output=path, stdout=io.StringIO())
+
+        index = SearchIndex.load(path)
+        self.assertEqual(len(index), 2)
+        self.assertEqual([doc_id for doc_id, _ in index.search("кит")], [self.whale.pk])
@@ -0,0 +1,119 @@
+import io
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from Tests_1.utils import get_admin_user, create_member_user
+from quiz.models import QuestionCategory, Question, Answer, QuestionStats
+from quiz.snapshot import quiz_snapshot
+
+
+class QuizSnapshotTests(APITestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        settings_override = override_settings(QUIZ_SNAPSHOT_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        quiz_snapshot.reset()
+
+        self.admin_user = get_admin_user()
+        self.member_user = create_member_user(username="member_test", password="password123",
+                                              email="member@example.com")
+        categories = [QuestionCategory.objects.create(name=name) for name in ("Птицы", "Рыбы")]
+        self.questions = []
+        for i in range(7):
+            question = Question.objects.create(category=categories[i % 2], text=f"Вопрос №{i} — ёж?",
+                                               difficulty=("easy", "medium", "hard")[i % 3])
+            for j in range(i % 3):
+                Answer.objects.create(question=question, text=f"Ответ {i}.{j}", is_correct=j == 0)
+            self.questions.append(question)
+        QuestionStats.objects.create(question=self.questions[1], attempts=40, correct_rate=0.5,
+                                     discrimination=0.31, suggested_difficulty='medium')
+
+    def _build(self):
+        call_command('build_quiz_snapshot', keep=2, stdout=io.StringIO())
+
+    def _get(self, name, *args, params=None, enabled=True):
+        # Общий кэш страниц вернул бы ответ предыдущего запроса к тому же URL
+        cache.clear()
+        with override_settings(QUIZ_SNAPSHOT_ENABLED=enabled):
+            response = self.client.get(reverse(name, args=args), params)
+        return response
+
+    def test_snapshot_matches_database(self):
+        """
+        Тест: Ответы из снимка совпадают с ответами из базы и не требуют запросов.
+        """
+        self._build()
+        requests = [
+            ('category-list-create', (), None),
+            ('category-detail', (self.questions[0].category_id,), None),
+            ('question-list-create', (), {'page': 2}),
+            ('question-detail', (self.questions[1].pk,), None),
+            ('question-full-list', (), {'page_size': 10}),
+            ('question-full-detail', (self.questions[2].pk,), None),
+        ]
+        for user in (self.admin_user, self.member_user):
+            self.client.force_authenticate(user=user)
+            for name, args, params in requests:
+                expected = self._get(name, *args, params=params, enabled=False)
+                with self.assertNumQueries(0):
+                    response = self._get(name, *args, params=params)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.json(), expected.json(), name)
+
+        response = self._get('question-detail', 999)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_new_build_is_swapped_in(self):
+        """
+        Тест: Новый снимок подхватывается без перезапуска, старые удаляются.
+        """
+        self.client.force_authenticate(user=self.member_user)
+        self._build()
+        # update() не вызывает сигналов — как изменение, сделанное другим процессом
+        Question.objects.filter(pk=self.questions[0].pk).update(text="Новый текст")
+        self.assertEqual(self._get('question-detail', self.questions[0].pk).data['text'], "Вопрос №0 — ёж?")
+
+        self._build()
+        self._build()
+        self.assertEqual(self._get('question-detail', self.questions[0].pk).data['text'], "Новый текст")
+        snapshots = [name for name in os.listdir(self.directory) if name.endswith('.snap')]
+        self.assertEqual(len(snapshots), 2)
+
+    def test_local_changes_bypass_snapshot(self):
+        """
+        Тест: После изменения вопросов в этом процессе чтение идет из базы до следующей сборки.
+        """
+        self.client.force_authenticate(user=self.member_user)
+        self._build()
+        question = Question.objects.create(category=self.questions[0].category, text="Свежий", difficulty="easy")
+        self.assertEqual(self._get('question-detail', question.pk).status_code, status.HTTP_200_OK)
+        self.assertEqual(self._get('question-list-create').data['count'], 8)
+
+        self._build()
+        with self.assertNumQueries(0):
+            self.assertEqual(self._get('question-list-create').data['count'], 8)
+
+    def test_filtered_list_reads_database(self):
+        """
+        Тест: Отфильтрованный список вопросов читается из базы, а не из снимка.
+        """
+        self.client.force_authenticate(user=self.member_user)
+        self._build()
+        params = {'category': self.questions[0].category_id, 'difficulty': 'easy'}
+        response = self._get('question-list-create', params=params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['id'] for item in response.data['results']],
+            [question.pk for question in self.questions
+             if question.category_id == params['category'] and question.difficulty == 'easy'],
+        )
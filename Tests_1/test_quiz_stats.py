@@ -0,0 +1,68 @@
+import io
+
+import numpy as np
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from Tests_1.utils import create_member_user
+from quiz.models import QuestionCategory, Question, QuestionStats, AttemptAnswer
+from quiz.stats import QuestionStatsEngine
+
+
+class QuestionStatsTests(APITestCase):
+    def setUp(self):
+        category = QuestionCategory.objects.create(name="Физика")
+        self.questions = [
+            Question.objects.create(category=category, text=f"Вопрос {i}", difficulty="medium") for i in range(3)
+        ]
+        self.users = [
+            create_member_user(username=f"student{i}", password="password123", email=f"student{i}@example.com")
+            for i in range(4)
+        ]
+        # Строки — пользователи, столбцы — вопросы: 1 — правильный ответ
+        self.matrix = np.array([
+            [1, 1, 1],
+            [1, 1, 0],
+            [1, 0, 0],
+            [1, 0, 0],
+        ])
+        AttemptAnswer.objects.bulk_create([
+            AttemptAnswer(user=user, question=question, is_correct=bool(self.matrix[i, j]))
+            for i, user in enumerate(self.users)
+            for j, question in enumerate(self.questions)
+        ])
+
+    def test_engine_matches_direct_computation(self):
+        """
+        Тест: Порционный расчет совпадает с прямым расчетом по всей матрице ответов.
+        """
+        stats = {item.question_id: item for item in QuestionStatsEngine(chunk_size=5, min_attempts=4).compute()}
+        user_scores = self.matrix.mean(axis=1)
+
+        easy = stats[self.questions[0].pk]
+        self.assertEqual((easy.attempts, easy.correct_rate, easy.suggested_difficulty), (4, 1.0, 'easy'))
+        self.assertIsNone(easy.discrimination)  # На вопрос ответили все — корреляция не определена
+
+        for j in (1, 2):
+            expected = np.corrcoef(self.matrix[:, j], user_scores)[0, 1]
+            self.assertAlmostEqual(stats[self.questions[j].pk].discrimination, expected, places=4)
+        self.assertEqual(stats[self.questions[1].pk].suggested_difficulty, 'medium')
+        self.assertEqual(stats[self.questions[2].pk].suggested_difficulty, 'hard')
+
+        few = QuestionStatsEngine(min_attempts=5).compute()
+        self.assertTrue(all(item.suggested_difficulty is None and item.discrimination is None for item in few))
+
+    def test_command_saves_stats_shown_on_questions(self):
+        """
+        Тест: Команда сохраняет статистику, и она видна в ответе API вопроса.
+        """
+        call_command('compute_question_stats', min_attempts=1, chunk_size=2, stdout=io.StringIO())
+        self.assertEqual(QuestionStats.objects.count(), 3)
+
+        self.client.force_authenticate(user=self.users[0])
+        response = self.client.get(reverse('question-detail', args=[self.questions[2].pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['stats']['correct_rate'], 0.25)
+        self.assertEqual(response.data['stats']['suggested_difficulty'], 'hard')
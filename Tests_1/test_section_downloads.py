@@ -0,0 +1,92 @@
+from django.core.files.base import ContentFile
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from Tests_1.utils import TempMediaMixin, create_member_user
+from sections.models import Section, Content
+
+
+class ContentDownloadTests(TempMediaMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.member_user = create_member_user(username="download_user", password="password123",
+                                              email="download@example.com")
+        section = Section.objects.create(title="Лекции", owner=self.member_user)
+        self.data = bytes(range(256)) * 1000
+        self.content = Content.objects.create(section=section, title="Лекция")
+        self.content.file.save('lecture.pdf', ContentFile(self.data))
+        self.url = reverse('content-download', args=[self.content.pk])
+        self.client.force_authenticate(user=self.member_user)
+
+    def _get(self, **headers):
+        response = self.client.get(self.url, **headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_full_and_ranged_reads(self):
+        """
+        Тест: Файл отдается целиком, по диапазону, по суффиксу; диапазон вне файла — 416.
+        """
+        response, body = self._get(HTTP_ACCEPT='application/pdf')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(body, self.data)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+        response, body = self._get(HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(body, self.data[100:200])
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.data)}')
+        self.assertEqual(response['Content-Length'], '100')
+
+        response, body = self._get(HTTP_RANGE='bytes=-10')
+        self.assertEqual(body, self.data[-10:])
+        response, body = self._get(HTTP_RANGE=f'bytes={len(self.data) - 5}-')
+        self.assertEqual(body, self.data[-5:])
+
+        response, _ = self._get(HTTP_RANGE=f'bytes={len(self.data)}-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.data)}')
+
+    def test_conditional_requests(self):
+        """
+        Тест: If-Range с устаревшим ETag дает весь файл, If-None-Match — 304.
+        """
+        etag = self._get()[0]['ETag']
+        response, body = self._get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        response, body = self._get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(body, self.data)
+        self.assertEqual(self._get(HTTP_IF_NONE_MATCH=etag)[0].status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_access_control(self):
+        """
+        Тест: Чужой файл не отдается, содержимое без файла — 404, ссылка есть в сериализаторе.
+        """
+        detail = self.client.get(reverse('content-detail', args=[self.content.pk]))
+        self.assertTrue(detail.data['download_url'].endswith(self.url))
+
+        self.client.force_authenticate(user=create_member_user(
+            username="stranger", password="password123", email="stranger@example.com"
+        ))
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_authenticate(user=self.member_user)
+        empty = Content.objects.create(section=self.content.section, title="Пусто")
+        response = self.client.get(reverse('content-download', args=[empty.pk]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(SECTIONS_ACCEL_REDIRECT_PREFIX='/protected/')
+    def test_accel_redirect(self):
+        """
+        Тест: С префиксом X-Accel-Redirect файл отдает веб-сервер, тело пустое.
+        """
+        response, body = self._get(HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(body, b'')
+        self.assertEqual(response['X-Accel-Redirect'],
+                         f'/protected/{self.content.file.storage.internal_name(self.content.file.name)}')
@@ -0,0 +1,59 @@
+import io
+import os
+import zipfile
+
+from django.core.files.base import ContentFile
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from Tests_1.utils import TempMediaMixin, create_member_user
+from sections.exporters import READ_BLOCK_SIZE
+from sections.models import Section, Content
+
+
+class SectionExportTests(TempMediaMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.member_user = create_member_user(username="export_user", password="password123",
+                                              email="export@example.com")
+        self.section = Section.objects.create(title="Лекции/2024", description="Курс", owner=self.member_user)
+        self.note = Content.objects.create(section=self.section, title="Конспект", text="Текст конспекта")
+        self.data = os.urandom(5 * READ_BLOCK_SIZE)
+        self.video = Content.objects.create(section=self.section, title="Запись")
+        self.video.file.save('lecture.bin', ContentFile(self.data))
+        self.client.force_authenticate(user=self.member_user)
+
+    def test_archive_streams_texts_and_files(self):
+        """
+        Тест: Архив раздела отдается потоком небольших блоков и содержит тексты и файлы.
+        """
+        response = self.client.get(reverse('section-export', args=[self.section.pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 5)
+        self.assertLessEqual(max(len(chunk) for chunk in chunks), 2 * READ_BLOCK_SIZE)
+
+        with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+            self.assertIsNone(archive.testzip())
+            names = archive.namelist()
+            self.assertEqual(names, [
+                'Лекции_2024/README.txt',
+                f'Лекции_2024/{self.note.pk}-Конспект.txt',
+                f'Лекции_2024/{self.video.pk}-Запись/lecture.bin',
+            ])
+            self.assertEqual(archive.read(names[1]).decode(), "Текст конспекта")
+            self.assertEqual(archive.read(names[2]), self.data)
+
+    def test_foreign_section_denied(self):
+        """
+        Тест: Чужой раздел выгрузить нельзя.
+        """
+        self.client.force_authenticate(user=create_member_user(
+            username="stranger", password="password123", email="stranger@example.com"
+        ))
+        response = self.client.get(reverse('section-export', args=[self.section.pk]))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
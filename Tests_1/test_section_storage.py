@@ -0,0 +1,81 @@
+import io
+import os
+
+from django.core.files.base import ContentFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from Tests_1.utils import TempMediaMixin, create_member_user
+from files.models import Blob
+from sections.models import Section, Content
+
+
+class DedupStorageTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.user = create_member_user(username="dedup_user", password="password123", email="dedup@example.com")
+        self.section = Section.objects.create(title="Лекции", owner=self.user)
+        self.data = b'%PDF' + bytes(range(256)) * 100
+
+    def _content(self, filename, data):
+        content = Content.objects.create(section=self.section, title=filename)
+        with self.captureOnCommitCallbacks(execute=True):
+            content.file.save(filename, ContentFile(data))
+        return content
+
+    def test_identical_uploads_share_blob(self):
+        """
+        Тест: Одинаковые файлы хранятся одним блобом с исходными именами, последняя ссылка удаляет файл.
+        """
+        first = self._content('lecture.pdf', self.data)
+        second = self._content('copy.pdf', self.data)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.profile_picture.save('avatar.pdf', ContentFile(self.data))
+
+        self.assertEqual(os.path.basename(second.file.name), 'copy.pdf')
+        self.assertEqual(first.file.path, second.file.path)
+        self.assertEqual(Blob.objects.get().refcount, 3)
+        with second.file.open('rb') as stored:
+            self.assertEqual(stored.read(), self.data)
+        path = first.file.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+            self.user.profile_picture.delete()
+        self.assertEqual(Blob.objects.get().refcount, 1)
+        self.assertTrue(os.path.exists(path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.section.delete()
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_replacing_file_releases_old_blob(self):
+        """
+        Тест: Замена файла содержимого снимает ссылку со старого блоба.
+        """
+        content = self._content('lecture.pdf', self.data)
+        old_path = content.file.path
+        with self.captureOnCommitCallbacks(execute=True):
+            content.file.save('lecture-v2.pdf', ContentFile(b'new version'))
+        self.assertEqual(Blob.objects.count(), 1)
+        self.assertFalse(os.path.exists(old_path))
+
+    def test_report_and_check(self):
+        """
+        Тест: Отчет показывает коэффициент дедупликации, --check находит, а --repair исправляет счетчики.
+        """
+        self._content('a.pdf', self.data)
+        self._content('b.pdf', self.data)
+        self._content('c.pdf', b'other')
+        out = io.StringIO()
+        call_command('dedup_report', check=True, stdout=out)
+        self.assertIn('Блобов: 2, ссылок на них: 3', out.getvalue())
+        self.assertIn('Коэффициент дедупликации: 2.00', out.getvalue())
+
+        Blob.objects.filter(size=len(self.data)).update(refcount=5)
+        with self.assertRaises(CommandError):
+            call_command('dedup_report', check=True, stdout=io.StringIO())
+        call_command('dedup_report', repair=True, stdout=io.StringIO())
+        self.assertEqual(Blob.objects.get(size=len(self.data)).refcount, 2)
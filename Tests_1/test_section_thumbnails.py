@@ -0,0 +1,121 @@
+import io
+import os
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+
+from Tests_1.utils import TempMediaMixin, create_member_user
+from config.serializers import UserSerializer
+from sections.models import Section, Content
+from sections.serializers import ContentSerializer
+from files.thumbnails import DERIVATIVE_SIZES, DerivativePipeline, derivatives_name, render_derivatives
+
+
+def jpeg_bytes(width, height):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 30, 30)).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+@override_settings(SECTIONS_IMAGE_WORKERS=0)
+class DerivativeTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.user = create_member_user(username="thumb_user", password="password123", email="thumb@example.com")
+        self.section = Section.objects.create(title="Иллюстрации", owner=self.user)
+
+    def _content(self, filename, data):
+        content = Content.objects.create(section=self.section, title=filename)
+        with self.captureOnCommitCallbacks(execute=True):
+            content.file.save(filename, ContentFile(data))
+        return content
+
+    def test_image_gets_derivatives(self):
+        """
+        Тест: После сохранения изображения строятся WebP и JPEG всех размеров с сохранением пропорций.
+        """
+        content = self._content('photo.jpg', jpeg_bytes(2000, 1000))
+        directory = os.path.join(self.media_root, derivatives_name(content.file.name))
+        for size in DERIVATIVE_SIZES:
+            for ext in ('webp', 'jpeg'):
+                with Image.open(os.path.join(directory, f'{size}.{ext}')) as image:
+                    self.assertEqual(image.size, (size, size // 2))
+
+        derivatives = ContentSerializer(content).data['derivatives']
+        self.assertEqual(set(derivatives), {str(size) for size in DERIVATIVE_SIZES})
+        self.assertEqual(derivatives['256']['webp'], reverse('content-derivative', args=[content.pk, 256, 'webp']))
+        self.assertNotIn('file', ContentSerializer(content).data)
+
+    def test_derivative_access_checked(self):
+        """
+        Тест: Миниатюры содержимого отдаются только владельцу раздела, чужим — 404.
+        """
+        content = self._content('photo.jpg', jpeg_bytes(400, 300))
+        url = reverse('content-derivative', args=[content.pk, 64, 'jpeg'])
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        with Image.open(io.BytesIO(b''.join(response.streaming_content))) as image:
+            self.assertEqual(image.size, (64, 48))
+        self.assertEqual(client.get(reverse('content-derivative', args=[content.pk, 65, 'jpeg'])).status_code, 404)
+
+        other = create_member_user(username="thumb_other", password="password123", email="other@example.com")
+        client.force_authenticate(user=other)
+        self.assertEqual(client.get(url).status_code, 404)
+
+    def test_derivatives_removed_with_blob(self):
+        """
+        Тест: Миниатюры удаляются вместе с блобом, когда исчезает последняя ссылка на него.
+        """
+        content = self._content('photo.jpg', jpeg_bytes(400, 300))
+        copy = self._content('copy.jpg', jpeg_bytes(400, 300))
+        directory = os.path.join(self.media_root, derivatives_name(content.file.name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            content.delete()
+        self.assertTrue(os.path.isdir(directory))
+        with self.captureOnCommitCallbacks(execute=True):
+            copy.delete()
+        self.assertFalse(os.path.exists(directory))
+
+    def test_profile_picture_derivatives(self):
+        """
+        Тест: Производные строятся и для фото профиля и видны в сериализаторе пользователя.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.profile_picture.save('avatar.png', ContentFile(jpeg_bytes(300, 300)))
+        derivatives = UserSerializer(self.user).data['profile_picture_derivatives']
+        self.assertEqual(set(derivatives['64']), {'webp', 'jpeg'})
+
+    def test_non_image_skipped(self):
+        """
+        Тест: Для файлов, которые не являются изображениями, производные не строятся.
+        """
+        content = self._content('notes.pdf', b'%PDF-1.4')
+        self.assertIsNone(ContentSerializer(content).data['derivatives'])
+        broken = self._content('broken.jpg', b'not an image')
+        self.assertIsNone(ContentSerializer(broken).data['derivatives'])
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, 'derivatives')))
+
+    def test_process_pool(self):
+        """
+        Тест: В режиме пула производные строятся в отдельном процессе.
+        """
+        source = os.path.join(self.media_root, 'source.jpg')
+        with open(source, 'wb') as file:
+            file.write(jpeg_bytes(500, 400))
+        target = os.path.join(self.media_root, 'derivatives', 'ab', 'target')
+        pipeline = DerivativePipeline()
+        with override_settings(SECTIONS_IMAGE_WORKERS=1):
+            future = pipeline.submit(source, target)
+            self.assertTrue(future.result(timeout=60))
+            pipeline._executor.shutdown()
+        with Image.open(os.path.join(target, '1024.webp')) as image:
+            self.assertEqual(image.size, (500, 400))
+        # Повторное построение не переписывает готовый каталог
+        self.assertTrue(render_derivatives(source, target))
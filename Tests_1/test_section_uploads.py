@@ -0,0 +1,135 @@
+import hashlib
+import io
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from Tests_1.utils import TempMediaMixin, create_member_user
+from sections.models import Section, Content, UploadSession
+
+
+class UploadSessionTests(TempMediaMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.member_user = create_member_user(username="upload_user", password="password123",
+                                              email="upload@example.com")
+        self.other_user = create_member_user(username="other_user", password="password123",
+                                             email="other@example.com")
+        section = Section.objects.create(title="Лекции", owner=self.member_user)
+        self.content = Content.objects.create(section=section, title="Лекция 1")
+        self.data = bytes(range(256)) * 40
+        self.client.force_authenticate(user=self.member_user)
+
+    def temp_settings(self):
+        return {'SECTIONS_UPLOAD_DIR': str(Path(self.temp_dir) / 'uploads')}
+
+    def _start(self, **extra):
+        payload = {'content': self.content.pk, 'filename': 'lecture.bin', 'size': len(self.data), **extra}
+        response = self.client.post(reverse('upload-session-create'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return response.data['id']
+
+    def _put(self, session_id, start, end, body=None, total=None):
+        body = self.data[start:end + 1] if body is None else body
+        total = len(self.data) if total is None else total
+        return self.client.put(
+            reverse('upload-session-detail', args=[session_id]), body, content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{total}',
+        )
+
+    def test_chunks_in_any_order_and_finalize(self):
+        """
+        Тест: Куски принимаются в любом порядке, недостающие видны в сеансе, finalize собирает файл.
+        """
+        session_id = self._start(sha256=hashlib.sha256(self.data).hexdigest())
+        response = self._put(session_id, 8000, len(self.data) - 1)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['missing'], [[0, 7999]])
+        self._put(session_id, 0, 2999)
+
+        response = self.client.get(reverse('upload-session-detail', args=[session_id]))
+        self.assertEqual(response.data['missing'], [[3000, 7999]])
+        finalize_url = reverse('upload-session-finalize', args=[session_id])
+        self.assertEqual(self.client.post(finalize_url).status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Повторная отправка перекрывающегося куска после обрыва
+        self._put(session_id, 2500, 7999)
+        response = self.client.post(finalize_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['sha256'], hashlib.sha256(self.data).hexdigest())
+
+        self.content.refresh_from_db()
+        with self.content.file.open('rb') as stored:
+            self.assertEqual(stored.read(), self.data)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertEqual(list(Path(self.temp_dir, 'uploads').iterdir()), [])
+
+    def test_invalid_chunks_rejected(self):
+        """
+        Тест: Неверный Content-Range и тело не той длины не учитываются.
+        """
+        session_id = self._start()
+        self.assertEqual(self._put(session_id, 0, 99, total=5).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._put(session_id, 0, len(self.data)).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._put(session_id, 0, 99, body=b'short').status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('upload-session-detail', args=[session_id]))
+        self.assertEqual(response.data['missing'], [[0, len(self.data) - 1]])
+
+    def test_hash_mismatch_discards_session(self):
+        """
+        Тест: Несовпавший SHA-256 при finalize дает 400 и удаляет сеанс.
+        """
+        session_id = self._start(sha256='0' * 64)
+        self._put(session_id, 0, len(self.data) - 1)
+        response = self.client.post(reverse('upload-session-finalize', args=[session_id]))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(UploadSession.objects.exists())
+        self.content.refresh_from_db()
+        self.assertFalse(self.content.file)
+
+    def test_finalizing_session_rejects_chunks_and_second_finalize(self):
+        """
+        Тест: Пока сеанс завершается, новые куски и повторный finalize получают 409.
+        """
+        session_id = self._start()
+        self._put(session_id, 0, len(self.data) - 1)
+        UploadSession.objects.filter(pk=session_id).update(finalizing_at=timezone.now())
+
+        self.assertEqual(self._put(session_id, 0, 99).status_code, status.HTTP_409_CONFLICT)
+        response = self.client.post(reverse('upload-session-finalize', args=[session_id]))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.content.refresh_from_db()
+        self.assertFalse(self.content.file)
+
+    def test_foreign_content_and_sessions(self):
+        """
+        Тест: Нельзя начать загрузку в чужой раздел и писать в чужой сеанс.
+        """
+        session_id = self._start()
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.post(reverse('upload-session-create'), {
+            'content': self.content.pk, 'filename': 'x.bin', 'size': 10,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(UploadSession.objects.filter(owner=self.other_user).exists())
+        self.assertEqual(self._put(session_id, 0, 9).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cleanup_command(self):
+        """
+        Тест: Команда удаляет брошенные сеансы и временные файлы без сеанса.
+        """
+        stale_id = self._start()
+        fresh_id = self._start()
+        UploadSession.objects.filter(pk=stale_id).update(updated_at=timezone.now() - timedelta(hours=48))
+        orphan = Path(self.temp_dir, 'uploads', 'a5a0a5a0-0000-4000-8000-000000000000.part')
+        orphan.touch()
+
+        call_command('cleanup_upload_sessions', hours=24, stdout=io.StringIO())
+        self.assertEqual([str(pk) for pk in UploadSession.objects.values_list('pk', flat=True)], [fresh_id])
+        self.assertEqual([path.stem for path in Path(self.temp_dir, 'uploads').iterdir()], [fresh_id])
@@ -4,7 +4,7 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 
 from Tests_1.utils import get_admin_user, create_member_user
-from sections.models import Section
+from sections.models import Section, Content
 
 # Получаем модель пользователя из Django
 User = get_user_model()
@@ -111,3 +111,59 @@ class SectionTests(APITestCase):
         url = reverse('section-detail', args=[self.section2.pk])
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_content_list_cursor_pagination(self):
+        """
+        Тест: Keyset-пагинация содержимого разделов включается параметром pagination=cursor.
+        """
+        created = [
+            Content.objects.create(section=self.section1, title=f"Content {i}").pk
+            for i in range(3)
+        ]
+        self.client.force_authenticate(user=self.admin_user)
+        url = reverse('content-list-create')
+
+        response = self.client.get(url, {'pagination': 'cursor', 'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        self.assertEqual([content['id'] for content in response.data['results']], created[:2])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([content['id'] for content in response.data['results']], created[2:])
+        self.assertIsNone(response.data['next'])
+
+    def test_content_list_limited_to_own_sections(self):
+        """
+        Тест: Участник видит в списке только содержимое своих разделов, суперпользователь — все.
+        """
+        own = Content.objects.create(section=self.section1, title="Own")
+        Content.objects.create(section=self.section2, title="Foreign")
+        url = reverse('content-list-create')
+
+        self.client.force_authenticate(user=self.member_user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([content['id'] for content in response.data['results']], [own.pk])
+
+        self.client.force_authenticate(user=self.admin_user)
+        self.assertEqual(self.client.get(url).data['count'], 2)
+
+    def test_content_queries_do_not_grow(self):
+        """
+        Тест: Список и деталь содержимого читаются постоянным числом запросов, чужое — 404.
+        """
+        for i in range(15):
+            Content.objects.create(section=self.section1, title=f"Content {i}")
+        foreign = Content.objects.create(section=self.section2, title="Foreign")
+        self.client.force_authenticate(user=self.member_user)
+
+        # COUNT и страница
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('content-list-create'), {'page_size': 20})
+        self.assertEqual(len(response.data['results']), 15)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('content-detail', args=[response.data['results'][0]['id']]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('content-detail', args=[foreign.pk]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -1,4 +1,9 @@
+import os
+import shutil
+import tempfile
+
 from django.contrib.auth import get_user_model
+from django.test import override_settings
 
 # Получаем модель пользователя из Django
 User = get_user_model()
@@ -88,3 +93,24 @@ def get_member_user():
         user.set_password('test1')
         user.save()
         return user
+
+
+class TempMediaMixin:
+    """
+    Подменяет MEDIA_ROOT временным каталогом self.media_root внутри self.temp_dir
+    и удаляет его после теста. Дополнительные настройки с путями внутри
+    self.temp_dir возвращает temp_settings().
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.media_root = os.path.join(self.temp_dir, 'media')
+        os.makedirs(self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, **self.temp_settings())
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def temp_settings(self):
+        return {}
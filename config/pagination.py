@@ -0,0 +1,55 @@
+from django.db.models import Model
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Keyset-пагинация по первичному ключу: без COUNT(*) и OFFSET,
+    поэтому глубокие страницы отдаются так же быстро, как первая.
+    Приложения задают только page_size (и при необходимости ordering).
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = 'id'
+
+
+class CursorPaginationOptInMixin:
+    """
+    Переключает представление на cursor_pagination_class, если клиент передал
+    ?pagination=cursor или уже идет по курсору (?cursor=...).
+    """
+    cursor_pagination_class = KeysetCursorPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if params.get('pagination') == 'cursor' or 'cursor' in params:
+                self._paginator = self.cursor_pagination_class()
+        return super().paginator
+
+
+def keyset_pages(queryset, chunk_size, field='id'):
+    """
+    Читает queryset страницами по chunk_size строк в порядке field, каждая
+    страница — отдельный запрос field > последнего значения предыдущей.
+    QuerySet.iterator() для этого не подходит: без MARS драйвер SQL Server
+    не читает результат порциями и загружает его целиком. Для values_list
+    field должен быть первой колонкой (или единственной при flat=True).
+    """
+    last = None
+    while True:
+        page = queryset.order_by(field)
+        if last is not None:
+            page = page.filter(**{f'{field}__gt': last})
+        page = list(page[:chunk_size])
+        if not page:
+            return
+        yield page
+        row = page[-1]
+        if isinstance(row, tuple):
+            last = row[0]
+        elif isinstance(row, Model):
+            last = getattr(row, field)
+        else:
+            last = row
@@ -2,19 +2,26 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
 
+from files.thumbnails import derivative_urls
+
 User = get_user_model()
 
 
 class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, style={'input_type': 'password'})
+    profile_picture_derivatives = serializers.SerializerMethodField()
 
     class Meta:
         model = User
-        fields = ('id', 'username', 'email', 'phone_number', 'birth_date', 'profile_picture', 'password')
+        fields = ('id', 'username', 'email', 'phone_number', 'birth_date', 'profile_picture',
+                  'profile_picture_derivatives', 'password')
         extra_kwargs = {
             'password': {'write_only': True, 'required': True, 'style': {'input_type': 'password'}}
         }
 
+    def get_profile_picture_derivatives(self, obj):
+        return derivative_urls(obj.profile_picture, self.context.get('request'))
+
     def create(self, validated_data):
 
         validated_data['password'] = make_password(validated_data['password'])
@@ -23,6 +23,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'files',
     'users',
     'rest_framework',
     'django_filters',
@@ -106,6 +107,15 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 # Медиа файлы
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Частичные загрузки файлов содержимого по кускам (вне MEDIA_ROOT, чтобы не раздавались)
+SECTIONS_UPLOAD_DIR = os.getenv("SECTIONS_UPLOAD_DIR", str(BASE_DIR / 'upload_sessions'))
+SECTIONS_UPLOAD_MAX_SIZE = int(os.getenv("SECTIONS_UPLOAD_MAX_SIZE", str(4 * 1024 ** 3)))
+SECTIONS_UPLOAD_CHUNK_MAX_SIZE = int(os.getenv("SECTIONS_UPLOAD_CHUNK_MAX_SIZE", str(64 * 1024 ** 2)))
+SECTIONS_UPLOAD_SESSION_TTL_HOURS = int(os.getenv("SECTIONS_UPLOAD_SESSION_TTL_HOURS", "24"))
+# Префикс internal-location nginx для выдачи файлов содержимого (X-Accel-Redirect); пусто — отдает Django
+SECTIONS_ACCEL_REDIRECT_PREFIX = os.getenv("SECTIONS_ACCEL_REDIRECT_PREFIX", "")
+# Процессы, строящие миниатюры изображений; 0 — строить сразу в процессе запроса
+SECTIONS_IMAGE_WORKERS = int(os.getenv("SECTIONS_IMAGE_WORKERS", "2"))
 
 # Автоинкрементные поля
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -185,6 +195,32 @@ CACHE_MIDDLEWARE_ALIAS = "default"
 CACHE_MIDDLEWARE_SECONDS = 600
 CACHE_MIDDLEWARE_KEY_PREFIX = ""
 
+# Настройки викторины
+# Размер процессного кэша ключа ответов (число вопросов) и прогрев при первом обращении
+QUIZ_ANSWER_KEY_CACHE_SIZE = int(os.getenv("QUIZ_ANSWER_KEY_CACHE_SIZE", "100000"))
+QUIZ_ANSWER_KEY_WARM = os.getenv("QUIZ_ANSWER_KEY_WARM", "False").lower() == "true"
+# Как часто (в секундах) сверять кэш ключа ответов с версией каталога, чтобы увидеть
+# изменения из других процессов
+QUIZ_ANSWER_KEY_REVALIDATE_SECONDS = float(os.getenv("QUIZ_ANSWER_KEY_REVALIDATE_SECONDS", "5"))
+# Как часто (в секундах) перестраивать индекс id вопросов для случайных тестов
+QUIZ_SAMPLER_REFRESH_SECONDS = int(os.getenv("QUIZ_SAMPLER_REFRESH_SECONDS", "300"))
+# Буфер отложенной записи попыток: размер пачки и интервал сброса в секундах (0 — без фонового потока)
+QUIZ_ATTEMPT_BUFFER_SIZE = int(os.getenv("QUIZ_ATTEMPT_BUFFER_SIZE", "500"))
+QUIZ_ATTEMPT_FLUSH_INTERVAL = float(os.getenv("QUIZ_ATTEMPT_FLUSH_INTERVAL", "5"))
+# Как часто (в секундах) перечитывать таблицу лидеров категории из базы
+QUIZ_LEADERBOARD_REFRESH_SECONDS = int(os.getenv("QUIZ_LEADERBOARD_REFRESH_SECONDS", "60"))
+# Минимум ответов на вопрос для дискриминативности и предлагаемой сложности
+QUIZ_STATS_MIN_ATTEMPTS = int(os.getenv("QUIZ_STATS_MIN_ATTEMPTS", "30"))
+# Снимок банка вопросов для чтения без базы (собирается командой build_quiz_snapshot)
+QUIZ_SNAPSHOT_ENABLED = os.getenv("QUIZ_SNAPSHOT_ENABLED", "False").lower() == "true"
+QUIZ_SNAPSHOT_DIR = os.getenv("QUIZ_SNAPSHOT_DIR", str(BASE_DIR / 'snapshots'))
+# Файл поискового индекса, который собирает команда build_search_index
+QUIZ_SEARCH_INDEX_PATH = os.getenv("QUIZ_SEARCH_INDEX_PATH", str(BASE_DIR / 'search_index.pickle'))
+# Журнал изменений для синхронизации клиентов: записи моложе окна отдаются повторно,
+# удаления старше срока хранения убирает команда compact_change_log
+QUIZ_CHANGES_SETTLE_SECONDS = int(os.getenv("QUIZ_CHANGES_SETTLE_SECONDS", "60"))
+QUIZ_CHANGES_RETENTION_DAYS = int(os.getenv("QUIZ_CHANGES_RETENTION_DAYS", "30"))
+
 # Создаем папку для логов, если она не существует
 if not (BASE_DIR / 'logs').exists():
     (BASE_DIR / 'logs').mkdir(parents=True)
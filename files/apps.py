@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class FilesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'files'
+
+    def ready(self):
+        # Подключаем обработчики сигналов к полям DedupFileField/DedupImageField всех моделей
+        from .signals import connect_dedup_fields
+        connect_dedup_fields()
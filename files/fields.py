@@ -0,0 +1,51 @@
+from django.db import models
+from django.db.models.fields.files import FieldFile, ImageFieldFile
+
+from .storage import dedup_storage
+
+
+class DedupFieldFileMixin:
+    """
+    delete() только очищает поле: ссылку на блоб снимают обработчики сохранения
+    и удаления модели (files.signals), иначе она снималась бы дважды.
+    """
+
+    def delete(self, save=True):
+        if not self:
+            return
+        if hasattr(self, '_file'):
+            self.close()
+            del self.file
+        self.name = None
+        setattr(self.instance, self.field.attname, self.name)
+        self._committed = False
+        if save:
+            self.instance.save()
+
+    delete.alters_data = True
+
+
+class DedupFieldFile(DedupFieldFileMixin, FieldFile):
+    pass
+
+
+class DedupImageFieldFile(DedupFieldFileMixin, ImageFieldFile):
+    pass
+
+
+class DedupFileField(models.FileField):
+    attr_class = DedupFieldFile
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('storage', dedup_storage)
+        kwargs.setdefault('max_length', 255)
+        super().__init__(*args, **kwargs)
+
+
+class DedupImageField(models.ImageField):
+    attr_class = DedupImageFieldFile
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('storage', dedup_storage)
+        kwargs.setdefault('max_length', 255)
+        super().__init__(*args, **kwargs)
@@ -0,0 +1,85 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from config.pagination import keyset_pages
+from files.models import Blob
+from files.signals import dedup_file_fields
+from files.storage import dedup_storage, name_sha256
+
+# Сколько расхождений выводить
+MAX_REPORTED = 20
+
+
+def format_size(size):
+    return f"{size / 1024 ** 2:.1f} МБ"
+
+
+class Command(BaseCommand):
+    help = 'Shows deduplication ratio and reclaimed space of the content-addressed file storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Сверить счетчики ссылок блобов с полями моделей')
+        parser.add_argument('--repair', action='store_true',
+                            help='Исправить расхождения счетчиков (подразумевает --check)')
+
+    def handle(self, *args, **options):
+        totals = Blob.objects.aggregate(
+            blobs=Count('sha256'),
+            references=Sum('refcount'),
+            stored=Sum('size'),
+            logical=Sum(F('size') * F('refcount')),
+        )
+        blobs = totals['blobs']
+        references = totals['references'] or 0
+        stored = totals['stored'] or 0
+        logical = totals['logical'] or 0
+        ratio = logical / stored if stored else 1.0
+        self.stdout.write(f"Блобов: {blobs}, ссылок на них: {references}")
+        self.stdout.write(f"Без дедупликации: {format_size(logical)}, на диске: {format_size(stored)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Коэффициент дедупликации: {ratio:.2f}, сэкономлено: {format_size(logical - stored)}"
+        ))
+
+        if options['check'] or options['repair']:
+            self._check(options['repair'])
+
+    def _check(self, repair):
+        expected = Counter()
+        for model, field_name in dedup_file_fields():
+            names = model._default_manager.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            for page in keyset_pages(names.values_list('pk', field_name), 2000, field='pk'):
+                for _, name in page:
+                    sha256 = name_sha256(name)
+                    if sha256:
+                        expected[sha256] += 1
+
+        with transaction.atomic():
+            stored = dict(Blob.objects.select_for_update().values_list('sha256', 'refcount'))
+            mismatches = sorted(
+                sha256 for sha256 in set(stored) | set(expected)
+                if stored.get(sha256, 0) != expected.get(sha256, 0)
+            )
+            for sha256 in mismatches[:MAX_REPORTED]:
+                self.stdout.write(f"{sha256}: счетчик {stored.get(sha256)}, ссылок в полях {expected.get(sha256, 0)}")
+            if not repair:
+                if mismatches:
+                    raise CommandError(f"Расхождений: {len(mismatches)}")
+                self.stdout.write(self.style.SUCCESS("Счетчики ссылок совпадают с полями моделей"))
+                return
+
+            # Блобы без записи (файл есть, строки нет) не восстанавливаются: размер берется из таблицы
+            fixable = [sha256 for sha256 in mismatches if sha256 in stored]
+            Blob.objects.bulk_update(
+                [Blob(sha256=sha256, refcount=expected.get(sha256, 0)) for sha256 in fixable],
+                ['refcount'], batch_size=500,
+            )
+            unreferenced = [sha256 for sha256 in fixable if not expected.get(sha256)]
+            for sha256 in unreferenced:
+                dedup_storage().collect(sha256)
+        self.stdout.write(self.style.SUCCESS(
+            f"Исправлено счетчиков: {len(fixable)}; блобов без ссылок: {len(unreferenced)}"
+        ))
@@ -0,0 +1,34 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Таблица files_blob уже создана в sections (0005, переименована в 0006):
+    здесь модель только добавляется в состояние.
+    """
+
+    initial = True
+
+    dependencies = [
+        ('sections', '0006_move_blob_to_files'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='Blob',
+                    fields=[
+                        ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                        ('size', models.BigIntegerField()),
+                        ('refcount', models.IntegerField(default=0)),
+                        ('created_at', models.DateTimeField(auto_now_add=True)),
+                    ],
+                    options={
+                        'verbose_name': 'Блоб',
+                        'verbose_name_plural': 'Блобы',
+                    },
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import models
+
+
+class Blob(models.Model):
+    """
+    Файл хранилища DedupStorage: одно содержимое на диске и число ссылок на него из полей моделей.
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    size = models.BigIntegerField()
+    refcount = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.sha256
+
+    class Meta:
+        verbose_name = "Блоб"
+        verbose_name_plural = "Блобы"
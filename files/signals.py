@@ -0,0 +1,58 @@
+from functools import partial
+
+from django.apps import apps
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from .fields import DedupFileField, DedupImageField
+from .thumbnails import derivative_pipeline
+
+
+def dedup_file_fields():
+    """
+    Поля с хранилищем DedupStorage во всех моделях: (модель, имя поля).
+    """
+    return [
+        (model, field.name)
+        for model in apps.get_models()
+        for field in model._meta.concrete_fields
+        if isinstance(field, (DedupFileField, DedupImageField))
+    ]
+
+
+def remember_file(sender, instance, field_name, update_fields=None, **kwargs):
+    instance._replaced_files = getattr(instance, '_replaced_files', {})
+    if instance.pk is None or (update_fields is not None and field_name not in update_fields):
+        instance._replaced_files[field_name] = None
+        return
+    instance._replaced_files[field_name] = sender._default_manager.filter(pk=instance.pk).values_list(
+        field_name, flat=True
+    ).first()
+
+
+def file_saved(sender, instance, field_name, created=False, **kwargs):
+    old_name = instance._replaced_files.pop(field_name, None)
+    field = getattr(instance, field_name)
+    if old_name == field.name:
+        return
+    if old_name:
+        field.storage.delete(old_name)
+    if field.name:
+        # Новый файл: миниатюры строятся в пуле процессов после фиксации транзакции
+        derivative_pipeline.schedule(field)
+
+
+def release_file(sender, instance, field_name, **kwargs):
+    field = getattr(instance, field_name)
+    if field.name:
+        field.storage.delete(field.name)
+
+
+def connect_dedup_fields():
+    """
+    Ссылка на блоб снимается при замене файла и при удалении строки.
+    """
+    for model, name in dedup_file_fields():
+        uid = f'dedup-{model._meta.label_lower}-{name}'
+        pre_save.connect(partial(remember_file, field_name=name), sender=model, weak=False, dispatch_uid=uid)
+        post_save.connect(partial(file_saved, field_name=name), sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(partial(release_file, field_name=name), sender=model, weak=False, dispatch_uid=uid)
@@ -0,0 +1,175 @@
+import hashlib
+import os
+import pathlib
+import re
+import tempfile
+from functools import partial
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.core.files.utils import validate_file_name
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+BLOB_DIR = 'blobs'
+SHA256_LENGTH = 64
+# Имя файла в поле: <upload_to>/<sha256>/<исходное имя>
+NAME_RE = re.compile(r'^(?:.*/)?([0-9a-f]{64})/[^/]+$')
+HASH_BLOCK_SIZE = 64 * 1024
+
+
+class DedupStorage(FileSystemStorage):
+    """
+    Хранилище с адресацией по содержимому: одинаковые файлы лежат на диске
+    одним блобом blobs/<ab>/<sha256>, а поля моделей хранят имя
+    <upload_to>/<sha256>/<исходное имя>. Ссылки на блоб считает Blob.refcount:
+    save увеличивает счетчик, delete уменьшает и после фиксации транзакции
+    удаляет файл последней ссылки. Файлы, сохраненные до перехода
+    (имена без хэша), читаются и удаляются как обычно.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        name = str(name).replace('\\', '/')
+        dir_name, file_name = os.path.split(name)
+        if '..' in pathlib.PurePath(dir_name).parts:
+            raise SuspiciousFileOperation(f"Detected path traversal attempt in '{dir_name}'")
+        validate_file_name(file_name)
+        # Имя уникально по хэшу: подбирать свободное не нужно, только уложиться в max_length
+        file_root, file_ext = os.path.splitext(file_name)
+        truncation = len(name) + SHA256_LENGTH + 1 - max_length if max_length else 0
+        if truncation > 0:
+            file_root = file_root[:-truncation]
+            if not file_root:
+                raise SuspiciousFileOperation(f'Имя файла "{name}" не помещается в поле длиной {max_length}')
+        return os.path.join(dir_name, file_root + file_ext)
+
+    def _save(self, name, content):
+        from .models import Blob
+
+        sha256, size, temp_path = self._stage(content)
+        blob_path = super().path(blob_name(sha256))
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        with transaction.atomic():
+            if not Blob.objects.filter(sha256=sha256).update(refcount=F('refcount') + 1):
+                try:
+                    with transaction.atomic():
+                        Blob.objects.create(sha256=sha256, size=size, refcount=1)
+                except IntegrityError:
+                    # Тот же файл одновременно загрузил другой процесс
+                    Blob.objects.filter(sha256=sha256).update(refcount=F('refcount') + 1)
+        if os.path.exists(blob_path):
+            os.unlink(temp_path)
+        else:
+            file_move_safe(temp_path, blob_path, allow_overwrite=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(blob_path, self.file_permissions_mode)
+        dir_name, file_name = os.path.split(name)
+        return '/'.join(part for part in (dir_name, sha256, file_name) if part)
+
+    def _stage(self, content):
+        """
+        Считает SHA-256 содержимого и кладет его во временный файл рядом с блобами,
+        чтобы перенос на место был переименованием. Возвращает (sha256, size, путь).
+        """
+        digest = hashlib.sha256()
+        temp_dir = super().path(os.path.join(BLOB_DIR, 'tmp'))
+        os.makedirs(temp_dir, exist_ok=True)
+        if hasattr(content, 'temporary_file_path'):
+            # Файл уже на диске (загрузка по кускам, большие multipart-файлы): переносим,
+            # а читаем только для хэша, если вызывающий не посчитал его сам
+            source = content.temporary_file_path()
+            sha256 = getattr(content, 'sha256', None)
+            if sha256 is None:
+                with open(source, 'rb') as file:
+                    for block in iter(partial(file.read, HASH_BLOCK_SIZE), b''):
+                        digest.update(block)
+                sha256 = digest.hexdigest()
+            fd, temp_path = tempfile.mkstemp(dir=temp_dir)
+            os.close(fd)
+            file_move_safe(source, temp_path, allow_overwrite=True)
+            return sha256, os.path.getsize(temp_path), temp_path
+
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir)
+        with os.fdopen(fd, 'wb') as file:
+            for chunk in content.chunks():
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                digest.update(chunk)
+                file.write(chunk)
+                size += len(chunk)
+        return digest.hexdigest(), size, temp_path
+
+    def delete(self, name):
+        from . import thumbnails
+        from .models import Blob
+
+        sha256 = name_sha256(name)
+        if sha256 is None:
+            super().delete(name)
+            transaction.on_commit(partial(thumbnails.delete_derivatives, thumbnails.source_key(name)))
+            return
+        with transaction.atomic():
+            blob = Blob.objects.select_for_update().filter(sha256=sha256).first()
+            if blob is None:
+                return
+            if blob.refcount > 1:
+                Blob.objects.filter(sha256=sha256).update(refcount=F('refcount') - 1)
+                return
+            self.collect(sha256)
+
+    def collect(self, sha256):
+        """
+        Удаляет блоб без ссылок: строку сразу, файл — после фиксации транзакции,
+        чтобы при откате ссылка не осталась без файла.
+        """
+        from .models import Blob
+
+        Blob.objects.filter(sha256=sha256).delete()
+        transaction.on_commit(partial(self._delete_blob, sha256))
+
+    def _delete_blob(self, sha256):
+        from . import thumbnails
+        from .models import Blob
+
+        # Пока транзакция фиксировалась, тот же файл могли загрузить заново
+        if not Blob.objects.filter(sha256=sha256).exists():
+            super().delete(blob_name(sha256))
+            # Миниатюры блоба больше никому не нужны
+            thumbnails.delete_derivatives(sha256)
+
+    def path(self, name):
+        sha256 = name_sha256(name)
+        return super().path(blob_name(sha256) if sha256 else name)
+
+    def url(self, name):
+        sha256 = name_sha256(name)
+        return super().url(blob_name(sha256) if sha256 else name)
+
+    def internal_name(self, name):
+        """
+        Путь файла внутри MEDIA_ROOT — для выдачи веб-сервером (X-Accel-Redirect).
+        """
+        sha256 = name_sha256(name)
+        return blob_name(sha256) if sha256 else name
+
+
+def name_sha256(name):
+    match = NAME_RE.match(name or '')
+    return match.group(1) if match else None
+
+
+def blob_name(sha256):
+    return f'{BLOB_DIR}/{sha256[:2]}/{sha256}'
+
+
+_dedup_storage = DedupStorage()
+
+
+def dedup_storage():
+    """
+    Хранилище для FileField(storage=dedup_storage): вызываемое, чтобы миграции
+    не фиксировали настройки хранилища.
+    """
+    return _dedup_storage
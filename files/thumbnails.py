@@ -0,0 +1,186 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .storage import name_sha256
+
+logger = logging.getLogger(__name__)
+
+# Стороны квадратов, в которые вписываются производные изображения
+DERIVATIVE_SIZES = (64, 256, 1024)
+DERIVATIVE_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.tiff')
+DERIVATIVES_DIR = 'derivatives'
+QUALITY = 82
+
+
+def render_derivatives(source_path, target_dir):
+    """
+    Строит производные изображения файла в target_dir: <размер>.webp и <размер>.jpeg.
+    Выполняется в процессе пула и не обращается к Django. JPEG декодируется
+    в режиме draft сразу с уменьшением в 2-8 раз под самый большой размер,
+    остальные размеры строятся из предыдущего. Каталог появляется целиком
+    (переименованием), поэтому читатель не увидит его заполненным наполовину.
+    Возвращает False, если файл не изображение.
+    """
+    if os.path.isdir(target_dir):
+        return True
+    try:
+        with Image.open(source_path) as image:
+            largest = max(DERIVATIVE_SIZES)
+            image.draft('RGB', (largest, largest))
+            image = ImageOps.exif_transpose(image)
+            image = image.convert('RGB')
+    except (UnidentifiedImageError, OSError) as error:
+        logger.warning("Не удалось прочитать изображение %s: %s", source_path, error)
+        return False
+
+    parent = os.path.dirname(target_dir)
+    os.makedirs(parent, exist_ok=True)
+    temp_dir = tempfile.mkdtemp(dir=parent, prefix='.tmp-')
+    try:
+        for size in sorted(DERIVATIVE_SIZES, reverse=True):
+            image.thumbnail((size, size), Image.LANCZOS, reducing_gap=3.0)
+            for ext, image_format in DERIVATIVE_FORMATS.items():
+                image.save(os.path.join(temp_dir, f'{size}.{ext}'), image_format, quality=QUALITY)
+        os.rename(temp_dir, target_dir)
+    except OSError:
+        # Каталог уже создал другой процесс
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        if not os.path.isdir(target_dir):
+            raise
+    return True
+
+
+def is_image(name):
+    return bool(name) and os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+
+
+def source_key(name):
+    """
+    Ключ кэша производных: SHA-256 содержимого из имени DedupStorage. Для файлов,
+    сохраненных до него, — хэш имени (такие имена уникальны, а файлы не меняются).
+    """
+    return name_sha256(name) or hashlib.sha256(name.encode()).hexdigest()
+
+
+def derivatives_name(name):
+    return key_derivatives_name(source_key(name))
+
+
+def key_derivatives_name(key):
+    return f'{DERIVATIVES_DIR}/{key[:2]}/{key}'
+
+
+def delete_derivatives(key):
+    """
+    Удаляет производные исходного файла по ключу source_key, если они есть.
+    """
+    shutil.rmtree(default_storage.path(key_derivatives_name(key)), ignore_errors=True)
+
+
+class DerivativePipeline:
+    """
+    Пул процессов, строящий производные изображения вне обработки запроса.
+    Задание ставится после фиксации транзакции, сохранившей файл. При
+    SECTIONS_IMAGE_WORKERS=0 производные строятся сразу в текущем процессе.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def schedule(self, field_file):
+        if not is_image(field_file.name):
+            return
+        source_path = field_file.path
+        target_dir = default_storage.path(derivatives_name(field_file.name))
+        transaction.on_commit(lambda: self.submit(source_path, target_dir))
+
+    def submit(self, source_path, target_dir):
+        """
+        Ставит построение в пул; возвращает Future или None, если построено сразу.
+        """
+        if not settings.SECTIONS_IMAGE_WORKERS:
+            render_derivatives(source_path, target_dir)
+            return None
+        try:
+            future = self._get_executor().submit(render_derivatives, source_path, target_dir)
+        except BrokenProcessPool:
+            # Процесс пула упал: следующее задание пойдет в новый пул
+            with self._lock:
+                self._executor = None
+            future = self._get_executor().submit(render_derivatives, source_path, target_dir)
+        future.add_done_callback(self._log_failure)
+        return future
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn, а не fork: дочерние процессы не наследуют потоки и соединения сервера
+                self._executor = ProcessPoolExecutor(
+                    max_workers=settings.SECTIONS_IMAGE_WORKERS, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    @staticmethod
+    def _log_failure(future):
+        error = future.exception()
+        if error is not None:
+            logger.error("Ошибка построения производных изображения: %s", error)
+
+    def ready(self, field_file):
+        """
+        Готовы ли производные файла (каталог появляется целиком).
+        """
+        if not field_file or not is_image(field_file.name):
+            return False
+        # Производные лежат обычными файлами в MEDIA_ROOT, а не блобами DedupStorage
+        return os.path.isdir(default_storage.path(derivatives_name(field_file.name)))
+
+
+derivative_pipeline = DerivativePipeline()
+
+
+def derivative_file_name(field_file, size, ext):
+    """
+    Имя производной в default_storage; None, если такого размера или формата нет
+    или копии еще не построены.
+    """
+    if size not in DERIVATIVE_SIZES or ext not in DERIVATIVE_FORMATS or not derivative_pipeline.ready(field_file):
+        return None
+    return f'{derivatives_name(field_file.name)}/{size}.{ext}'
+
+
+def derivative_urls(field_file, request=None, url=None):
+    """
+    Абсолютные ссылки на производные для сериализаторов: {размер: {формат: url}},
+    None, пока их нет. url(размер, формат) строит ссылку на представление,
+    проверяющее права; без него ссылки ведут прямо в MEDIA_URL.
+    """
+    if not derivative_pipeline.ready(field_file):
+        return None
+    if url is None:
+        directory = derivatives_name(field_file.name)
+
+        def url(size, ext):
+            return default_storage.url(f'{directory}/{size}.{ext}')
+
+    return {
+        str(size): {
+            ext: request.build_absolute_uri(url(size, ext)) if request else url(size, ext)
+            for ext in DERIVATIVE_FORMATS
+        }
+        for size in DERIVATIVE_SIZES
+    }
@@ -1,6 +1,8 @@
 from django.contrib import admin
-from .models import QuestionCategory, Question, Answer
+from .models import QuestionCategory, Question, Answer, QuizAttempt, CategoryScore
 
 admin.site.register(QuestionCategory)
 admin.site.register(Question)
 admin.site.register(Answer)
+admin.site.register(QuizAttempt)
+admin.site.register(CategoryScore)
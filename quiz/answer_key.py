@@ -0,0 +1,253 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from config.pagination import keyset_pages
+
+from .models import Question, Answer
+from .signals import questions_changed
+from .versions import catalog_versions
+
+# Ограничение SQL Server — не больше 2100 параметров в запросе
+LOAD_CHUNK_SIZE = 1000
+LOAD_FIELDS = ('id', 'text', 'category_id', 'answers__id', 'answers__is_correct')
+
+
+class AnswerKeyEntry(NamedTuple):
+    text: str
+    category_id: int
+    answers: dict  # id ответа -> is_correct
+
+
+class AnswerKeyIndex:
+    """
+    Процессный кэш ключа ответов: id вопроса -> текст, категория и правильность
+    каждого ответа. Проверка ответа по кэшу не обращается к базе. Размер
+    ограничен max_size, лишние записи вытесняются по LRU. Записи своего процесса
+    сбрасываются сигналами моделей; изменения из других процессов замечаются
+    по версии каталога (CatalogVersion), которую кэш перечитывает не чаще раза
+    в revalidate_seconds, — при смене версии кэш очищается целиком.
+    """
+
+    def __init__(self, max_size=None, warm_on_first_use=None, revalidate_seconds=None):
+        self._max_size = max_size
+        self._revalidate_seconds = revalidate_seconds
+        self._version = None
+        self._checked_at = None
+        self._warm_on_first_use = warm_on_first_use
+        self._entries = OrderedDict()
+        self._answer_owner = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._warmed = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_size(self):
+        if self._max_size is not None:
+            return self._max_size
+        return getattr(settings, 'QUIZ_ANSWER_KEY_CACHE_SIZE', 100000)
+
+    @property
+    def revalidate_seconds(self):
+        if self._revalidate_seconds is not None:
+            return self._revalidate_seconds
+        return getattr(settings, 'QUIZ_ANSWER_KEY_REVALIDATE_SECONDS', 5)
+
+    def get(self, question_id):
+        """
+        Возвращает AnswerKeyEntry или None, если вопроса нет.
+        """
+        return self.get_many([question_id]).get(question_id)
+
+    def get_many(self, question_ids):
+        """
+        Возвращает {id вопроса: AnswerKeyEntry} для найденных вопросов.
+        Все промахи дочитываются одним запросом.
+        """
+        if self._revalidation_due():
+            self._apply_version(catalog_versions.get())
+        self._warm_if_needed()
+        found, missing, generation = self._lookup(question_ids)
+        if missing:
+            loaded = self._load(missing)
+            found.update(loaded)
+            self._store(loaded, generation)
+        return found
+
+    async def aget(self, question_id):
+        """
+        Асинхронный get: попадание в кэш обходится без потоков, промах дочитывается
+        асинхронным ORM. Предварительный прогрев (QUIZ_ANSWER_KEY_WARM) здесь не запускается.
+        """
+        if self._revalidation_due():
+            self._apply_version(await catalog_versions.aget())
+        found, missing, generation = self._lookup([question_id])
+        if missing:
+            loaded = self._entries_from_rows([
+                row async for row in Question.objects.filter(id=question_id).values_list(*LOAD_FIELDS)
+            ])
+            found.update(loaded)
+            self._store(loaded, generation)
+        return found.get(question_id)
+
+    def warm(self):
+        """
+        Загружает ключи ответов для первых max_size вопросов.
+        """
+        with self._lock:
+            generation = self._generation
+        remaining = self.max_size
+        question_ids = Question.objects.values_list('id', flat=True)
+        for page in keyset_pages(question_ids, LOAD_CHUNK_SIZE):
+            if remaining <= 0:
+                break
+            page = page[:remaining]
+            self._store(self._load(page), generation)
+            remaining -= len(page)
+        self._warmed = True
+
+    def invalidate(self, question_ids):
+        with self._lock:
+            self._generation += 1
+            for question_id in question_ids:
+                self._drop(question_id)
+
+    def invalidate_answer(self, answer_id):
+        """
+        Сбрасывает вопрос, которому ответ принадлежал по данным кэша:
+        нужно, если ответ перенесли к другому вопросу.
+        """
+        with self._lock:
+            self._generation += 1
+            question_id = self._answer_owner.get(answer_id)
+            if question_id is not None:
+                self._drop(question_id)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._answer_owner.clear()
+            self._warmed = False
+            self._version = self._checked_at = None
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+    def _revalidation_due(self):
+        checked_at = self._checked_at
+        return checked_at is None or time.monotonic() - checked_at >= self.revalidate_seconds
+
+    def _apply_version(self, version):
+        """
+        Запоминает прочитанную версию каталога; если она сменилась, каталог меняли
+        (возможно, в другом процессе) и все записи кэша считаются устаревшими.
+        """
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if version == self._version:
+                return
+            if self._version is not None:
+                self._generation += 1
+                self._entries.clear()
+                self._answer_owner.clear()
+            self._version = version
+
+    def _warm_if_needed(self):
+        warm = self._warm_on_first_use
+        if warm is None:
+            warm = getattr(settings, 'QUIZ_ANSWER_KEY_WARM', False)
+        if warm and not self._warmed:
+            self._warmed = True
+            self.warm()
+
+    def _lookup(self, question_ids):
+        found = {}
+        missing = []
+        with self._lock:
+            for question_id in set(question_ids):
+                entry = self._entries.get(question_id)
+                if entry is None:
+                    missing.append(question_id)
+                else:
+                    self._entries.move_to_end(question_id)
+                    found[question_id] = entry
+            self.hits += len(found)
+            self.misses += len(missing)
+            return found, missing, self._generation
+
+    def _load(self, question_ids):
+        entries = {}
+        for i in range(0, len(question_ids), LOAD_CHUNK_SIZE):
+            rows = Question.objects.filter(id__in=question_ids[i:i + LOAD_CHUNK_SIZE]).values_list(*LOAD_FIELDS)
+            entries.update(self._entries_from_rows(rows))
+        return entries
+
+    @staticmethod
+    def _entries_from_rows(rows):
+        entries = {}
+        for question_id, text, category_id, answer_id, is_correct in rows:
+            entry = entries.get(question_id)
+            if entry is None:
+                entry = entries[question_id] = AnswerKeyEntry(text, category_id, {})
+            if answer_id is not None:
+                entry.answers[answer_id] = is_correct
+        return entries
+
+    def _store(self, entries, generation):
+        with self._lock:
+            # Пока шла загрузка, что-то сбросили — данные могли устареть
+            if generation != self._generation:
+                return
+            for question_id, entry in entries.items():
+                self._drop(question_id)
+                self._entries[question_id] = entry
+                for answer_id in entry.answers:
+                    self._answer_owner[answer_id] = question_id
+            while len(self._entries) > self.max_size:
+                question_id, entry = self._entries.popitem(last=False)
+                self._forget_answers(question_id, entry)
+                self.evictions += 1
+
+    def _drop(self, question_id):
+        entry = self._entries.pop(question_id, None)
+        self._forget_answers(question_id, entry)
+
+    def _forget_answers(self, question_id, entry):
+        if entry is None:
+            return
+        for answer_id in entry.answers:
+            if self._answer_owner.get(answer_id) == question_id:
+                del self._answer_owner[answer_id]
+
+
+answer_key = AnswerKeyIndex()
+
+
+@receiver(questions_changed)
+def invalidate_answer_key(sender, question_ids, **kwargs):
+    answer_key.invalidate(question_ids)
+
+
+@receiver(post_save, sender=Answer)
+@receiver(post_delete, sender=Answer)
+def invalidate_answer_owner(sender, instance, **kwargs):
+    answer_key.invalidate_answer(instance.pk)
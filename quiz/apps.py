@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class QuizConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'quiz'
+
+    def ready(self):
+        # Подключаем обработчики сигналов
+        from . import (  # noqa: F401
+            signals, counters, versions, answer_key, search, leaderboards, snapshot, changes, sampling,
+        )
@@ -0,0 +1,144 @@
+import inspect
+
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import checking
+from .attempts import attempt_buffer
+from .filters import QuestionFilter
+from .models import QuestionCategory, Question
+from .paginators import AsyncQuizResultsSetPagination
+from .serializers import QuestionCategorySerializer, QuestionSerializer
+from .versions import catalog_etag, catalog_versions, etag_matches, set_etag
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView с асинхронными обработчиками для работы под ASGI без передачи
+    всего запроса в поток. Аутентификация, права и троттлинг DRF (initial)
+    синхронные и могут обращаться к базе — они выполняются одним переходом
+    в поток; сам обработчик и запросы ORM в нем — асинхронные.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncCheckAnswerView(AsyncAPIView):
+    async def post(self, request):
+        data = request.data if isinstance(request.data, dict) else {}
+        question, is_correct, error = await checking.acheck_answer(data.get('question_id'), data.get('answer_id'))
+        if error == checking.ERROR_QUESTION_NOT_FOUND:
+            return Response({"error": error}, status=status.HTTP_404_NOT_FOUND)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        await attempt_buffer.arecord_answer(
+            request.user.pk, int(data['question_id']), int(data['answer_id']), is_correct
+        )
+        return Response({
+            "question_text": question.text,
+            "is_correct": is_correct
+        }, status=status.HTTP_200_OK)
+
+
+class AsyncCatalogETagMixin:
+    """
+    ETag и 304 по версии каталога, как CatalogETagMixin у синхронных представлений.
+    """
+
+    async def aget_catalog_version(self):
+        return await catalog_versions.aget()
+
+    async def get(self, request, *args, **kwargs):
+        etag = catalog_etag(await self.aget_catalog_version(), request.accepted_renderer.format)
+        if etag_matches(request, etag):
+            return set_etag(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+        response = await super().get(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            set_etag(response, etag)
+        return response
+
+
+class AsyncListAPIView(AsyncAPIView):
+    queryset = None
+    serializer_class = None
+    pagination_class = None
+    # Фильтры должны проверять параметры без обращения к базе: filter_queryset здесь синхронный
+    filterset_class = None
+
+    async def get(self, request):
+        context = {'request': request, 'view': self}
+        queryset = self.queryset.all()
+        if self.filterset_class is not None:
+            queryset = DjangoFilterBackend().filter_queryset(request, queryset, self)
+        if self.pagination_class is None:
+            items = [item async for item in queryset]
+            return Response(self.serializer_class(items, many=True, context=context).data)
+        paginator = self.pagination_class()
+        page = await paginator.apaginate_queryset(queryset, request, view=self)
+        return paginator.get_paginated_response(self.serializer_class(page, many=True, context=context).data)
+
+
+class AsyncRetrieveAPIView(AsyncAPIView):
+    queryset = None
+    serializer_class = None
+
+    async def get(self, request, pk):
+        try:
+            item = await self.queryset.aget(pk=pk)
+        except self.queryset.model.DoesNotExist:
+            raise Http404(f"No {self.queryset.model._meta.object_name} matches the given query.")
+        return Response(self.serializer_class(item, context={'request': request, 'view': self}).data)
+
+
+class AsyncQuestionCategoryListAPIView(AsyncCatalogETagMixin, AsyncListAPIView):
+    queryset = QuestionCategory.objects.order_by('id')
+    serializer_class = QuestionCategorySerializer
+
+
+class AsyncQuestionCategoryRetrieveAPIView(AsyncCatalogETagMixin, AsyncRetrieveAPIView):
+    queryset = QuestionCategory.objects.all()
+    serializer_class = QuestionCategorySerializer
+
+    async def aget_catalog_version(self):
+        return await catalog_versions.aget(int(self.kwargs['pk']))
+
+
+class AsyncQuestionListAPIView(AsyncCatalogETagMixin, AsyncListAPIView):
+    queryset = Question.objects.select_related('stats').order_by('id')
+    serializer_class = QuestionSerializer
+    pagination_class = AsyncQuizResultsSetPagination
+    filterset_class = QuestionFilter
+
+    async def aget_catalog_version(self):
+        category = self.request.query_params.get('category', '')
+        return await catalog_versions.aget(int(category) if category.isdigit() else None)
+
+
+class AsyncQuestionRetrieveAPIView(AsyncCatalogETagMixin, AsyncRetrieveAPIView):
+    queryset = Question.objects.select_related('stats')
+    serializer_class = QuestionSerializer
@@ -0,0 +1,251 @@
+import atexit
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, close_old_connections, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Question, Answer, QuizAttempt, AttemptAnswer
+
+logger = logging.getLogger(__name__)
+
+# Отправляется после записи пачки в базу: answers — список записанных AttemptAnswer
+attempts_flushed = Signal()
+
+
+class AttemptBuffer:
+    """
+    Буфер отложенной записи попыток (write-behind). Проверка ответа только
+    добавляет строки в память; в базу они уходят пачкой через bulk_create,
+    когда накопится QUIZ_ATTEMPT_BUFFER_SIZE ответов, раз в
+    QUIZ_ATTEMPT_FLUSH_INTERVAL секунд (фоновым потоком) и при остановке процесса.
+    Если интервал равен 0, фоновый поток не запускается и буфер сбрасывается
+    по размеру в потоке запроса.
+    """
+
+    def __init__(self):
+        self._attempts = []
+        self._answers = []
+        # Пачка, которую не удалось записать с первого раза
+        self._retry_attempts = []
+        self._retry_answers = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._worker = None
+        self.flushes = 0
+        self.flushed_attempts = 0
+        self.flushed_answers = 0
+        self.dropped_answers = 0
+        self.last_flush_seconds = None
+        self.max_flush_seconds = 0.0
+        self._total_flush_seconds = 0.0
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'QUIZ_ATTEMPT_BUFFER_SIZE', 500)
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'QUIZ_ATTEMPT_FLUSH_INTERVAL', 5.0)
+
+    def record_answer(self, user_id, question_id, answer_id, is_correct):
+        """
+        Записывает одиночную проверку ответа (без попытки).
+        """
+        self._add(None, [self._answer(user_id, question_id, answer_id, is_correct)])
+
+    async def arecord_answer(self, user_id, question_id, answer_id, is_correct):
+        """
+        То же для асинхронных представлений: в поток уходит только запись в базу, если она нужна сразу.
+        """
+        if self._enqueue(None, [self._answer(user_id, question_id, answer_id, is_correct)]):
+            await sync_to_async(self.flush)()
+
+    def record_attempt(self, user_id, checked):
+        """
+        Записывает проверку целого теста. checked — список
+        (question_id, answer_id, is_correct). Возвращает id попытки.
+        """
+        now = timezone.now()
+        attempt = QuizAttempt(
+            user_id=user_id,
+            total=len(checked),
+            correct=sum(1 for _, _, is_correct in checked if is_correct),
+            created_at=now,
+        )
+        self._add(attempt, [
+            AttemptAnswer(
+                attempt_id=attempt.pk, user_id=user_id, question_id=question_id,
+                answer_id=answer_id, is_correct=is_correct, answered_at=now,
+            )
+            for question_id, answer_id, is_correct in checked
+        ])
+        return attempt.pk
+
+    def flush(self):
+        """
+        Записывает накопленное одной транзакцией. Возвращает число записанных ответов.
+        Пачка, которую не удалось записать, возвращается в буфер и пишется еще раз
+        со следующей; после второй неудачи она отбрасывается.
+        """
+        with self._flush_lock:
+            with self._lock:
+                retry_attempts, self._retry_attempts = self._retry_attempts, []
+                retry_answers, self._retry_answers = self._retry_answers, []
+                attempts, self._attempts = self._attempts, []
+                answers, self._answers = self._answers, []
+            if not (attempts or answers or retry_attempts or retry_answers):
+                return 0
+
+            started = time.monotonic()
+            try:
+                written = self._write(retry_attempts + attempts, retry_answers + answers)
+            except Exception:
+                logger.exception("Не удалось записать %s ответов пользователей", len(retry_answers) + len(answers))
+                self.dropped_answers += len(retry_answers)
+                self._requeue(attempts, answers)
+                return 0
+            elapsed = time.monotonic() - started
+            self.dropped_answers += len(retry_answers) + len(answers) - len(written)
+            attempts = retry_attempts + attempts
+            answers = written
+
+            self.flushes += 1
+            self.flushed_attempts += len(attempts)
+            self.flushed_answers += len(answers)
+            self.last_flush_seconds = elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+            self._total_flush_seconds += elapsed
+        # Ошибка получателя (таблиц лидеров и т.п.) не должна терять уже записанные ответы
+        for receiver, result in attempts_flushed.send_robust(sender=self.__class__, answers=answers):
+            if isinstance(result, Exception):
+                logger.error("Ошибка обработчика записи ответов %r", receiver, exc_info=result)
+        return len(answers)
+
+    def _requeue(self, attempts, answers):
+        """
+        Оставляет неудачную пачку на повтор. Повторная очередь ограничена двумя
+        размерами буфера, чтобы при недоступной базе память не росла без предела.
+        """
+        if len(answers) > 2 * self.max_size:
+            self.dropped_answers += len(answers)
+            return
+        with self._lock:
+            self._retry_attempts = attempts
+            self._retry_answers = answers
+
+    def clear(self):
+        """
+        Отбрасывает накопленное без записи (для тестов).
+        """
+        with self._lock:
+            self._attempts = []
+            self._answers = []
+            self._retry_attempts = []
+            self._retry_answers = []
+
+    def stats(self):
+        with self._lock:
+            queue_depth = len(self._answers) + len(self._retry_answers)
+        return {
+            'queue_depth': queue_depth,
+            'max_size': self.max_size,
+            'flush_interval': self.flush_interval,
+            'flushes': self.flushes,
+            'flushed_attempts': self.flushed_attempts,
+            'flushed_answers': self.flushed_answers,
+            'dropped_answers': self.dropped_answers,
+            'last_flush_ms': round(self.last_flush_seconds * 1000, 2) if self.last_flush_seconds is not None else None,
+            'avg_flush_ms': round(self._total_flush_seconds / self.flushes * 1000, 2) if self.flushes else None,
+            'max_flush_ms': round(self.max_flush_seconds * 1000, 2),
+        }
+
+    @staticmethod
+    def _answer(user_id, question_id, answer_id, is_correct):
+        return AttemptAnswer(user_id=user_id, question_id=question_id, answer_id=answer_id, is_correct=is_correct)
+
+    def _add(self, attempt, answers):
+        if self._enqueue(attempt, answers):
+            self.flush()
+
+    def _enqueue(self, attempt, answers):
+        """
+        Добавляет строки в буфер. Возвращает True, если буфер полон, а фонового
+        потока нет и записать его должен вызывающий.
+        """
+        with self._lock:
+            if attempt is not None:
+                self._attempts.append(attempt)
+            self._answers.extend(answers)
+            full = len(self._answers) >= self.max_size
+        if self._ensure_worker():
+            if full:
+                self._wake.set()
+            return False
+        return full
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return True
+        if not self.flush_interval:
+            return False
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name='quiz-attempt-flusher', daemon=True)
+                self._worker.start()
+        return True
+
+    def _run(self):
+        while True:
+            self._wake.wait(timeout=self.flush_interval or None)
+            self._wake.clear()
+            self.flush()
+            close_old_connections()
+
+    def _write(self, attempts, answers):
+        try:
+            with transaction.atomic():
+                QuizAttempt.objects.bulk_create(attempts)
+                AttemptAnswer.objects.bulk_create(answers)
+        except IntegrityError:
+            # Пользователя, вопрос или ответ успели удалить, пока строки ждали
+            # в буфере: выбрасываем только такие строки и пишем остальное
+            attempts, answers = self._without_deleted(attempts, answers)
+            with transaction.atomic():
+                QuizAttempt.objects.bulk_create(attempts)
+                AttemptAnswer.objects.bulk_create(answers)
+        return answers
+
+    @staticmethod
+    def _without_deleted(attempts, answers):
+        user_ids = _existing_ids(get_user_model(), {a.user_id for a in attempts} | {a.user_id for a in answers})
+        question_ids = _existing_ids(Question, {a.question_id for a in answers})
+        answer_ids = _existing_ids(Answer, {a.answer_id for a in answers if a.answer_id})
+        attempts = [attempt for attempt in attempts if attempt.user_id in user_ids]
+        kept = []
+        for answer in answers:
+            if answer.user_id not in user_ids or answer.question_id not in question_ids:
+                continue
+            if answer.answer_id not in answer_ids:
+                answer.answer_id = None
+            kept.append(answer)
+        return attempts, kept
+
+
+def _existing_ids(model, ids):
+    ids = list(ids)
+    existing = set()
+    # Ограничение SQL Server — не больше 2100 параметров в запросе
+    for i in range(0, len(ids), 1000):
+        existing.update(model.objects.filter(id__in=ids[i:i + 1000]).values_list('id', flat=True))
+    return existing
+
+
+attempt_buffer = AttemptBuffer()
+atexit.register(attempt_buffer.flush)
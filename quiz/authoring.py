@@ -0,0 +1,123 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .bulk import bulk_create_with_pks
+from .counters import adjust_category_counters
+from .models import QuestionCategory, Question, Answer
+from .signals import notify_questions_changed
+
+# Больше вопросов за один запрос не принимаем: id пакета укладываются в один IN
+MAX_BULK_QUESTIONS = 500
+# Ограничение SQL Server — не больше 2100 параметров в запросе
+LOAD_CHUNK_SIZE = 1000
+
+
+class BulkQuestionWriter:
+    """
+    Пакетная запись вопросов с ответами из проверенных BulkQuestionSerializer
+    элементов. validate() проверяет пакет по базе фиксированным числом запросов,
+    save() пишет все одной транзакцией через bulk_create/bulk_update.
+    """
+
+    def __init__(self, items):
+        self.items = items
+        self.errors = [{} for _ in items]
+        self._existing_questions = {}  # id вопроса -> (id категории, сложность) до записи
+        self._existing_answers = {}  # id вопроса -> {id ответа: is_correct}
+
+    def validate(self):
+        """
+        Возвращает True, если ошибок нет; иначе ошибки по элементам — в self.errors.
+        """
+        category_ids = {item['category'] for item in self.items}
+        categories = set(QuestionCategory.objects.filter(id__in=category_ids).values_list('id', flat=True))
+
+        update_ids = [item['id'] for item in self.items if 'id' in item]
+        rows = Question.objects.filter(id__in=update_ids).values_list('id', 'category_id', 'difficulty')
+        self._existing_questions = {
+            question_id: (category_id, difficulty) for question_id, category_id, difficulty in rows
+        }
+        rows = Answer.objects.filter(question_id__in=update_ids).values_list('question_id', 'id', 'is_correct')
+        for question_id, answer_id, is_correct in rows:
+            self._existing_answers.setdefault(question_id, {})[answer_id] = is_correct
+
+        seen = set()
+        for item, errors in zip(self.items, self.errors):
+            if item['category'] not in categories:
+                errors['category'] = "Категория не найдена"
+            question_id = item.get('id')
+            if question_id is None:
+                continue
+            if question_id in seen:
+                errors['id'] = "Вопрос указан в пакете дважды"
+            seen.add(question_id)
+            if question_id not in self._existing_questions:
+                errors['id'] = "Вопрос не найден"
+                continue
+
+            existing = self._existing_answers.get(question_id, {})
+            if 'answers' in item:
+                if any(answer['id'] not in existing for answer in item['answers'] if 'id' in answer):
+                    errors['answers'] = "Ответ не связан с вопросом"
+            elif not any(existing.values()):
+                errors['answers'] = "Нужен хотя бы один правильный ответ"
+        return not any(self.errors)
+
+    def save(self):
+        """
+        Записывает пакет и возвращает [{id, answers}] в порядке элементов.
+        """
+        created = [index for index, item in enumerate(self.items) if 'id' not in item]
+        updated = [index for index, item in enumerate(self.items) if 'id' in item]
+        question_ids = [item.get('id') for item in self.items]
+        item_answers = [None] * len(self.items)
+
+        # bulk_update не заполняет auto_now — время изменения ставим сами
+        now = timezone.now()
+        with transaction.atomic():
+            new_questions = [self._question(self.items[index]) for index in created]
+            bulk_create_with_pks(Question, new_questions, match_fields=('text',))
+            for index, question in zip(created, new_questions):
+                question_ids[index] = question.pk
+            Question.objects.bulk_update(
+                [self._question(self.items[index], question_ids[index], now) for index in updated],
+                ['category', 'text', 'difficulty', 'updated_at'],
+            )
+            counter_rows = [(item['category'], item['difficulty'], 1) for item in self.items]
+            counter_rows.extend((*self._existing_questions[item['id']], -1) for item in self.items if 'id' in item)
+            adjust_category_counters(counter_rows)
+
+            new_answers, changed_answers, deleted_answers = [], [], []
+            for index, (question_id, item) in enumerate(zip(question_ids, self.items)):
+                existing = self._existing_answers.get(question_id, {})
+                if 'answers' not in item:
+                    item_answers[index] = [Answer(id=answer_id) for answer_id in sorted(existing)]
+                    continue
+                answers = [
+                    Answer(id=data.get('id'), question_id=question_id, text=data['text'],
+                           is_correct=data['is_correct'], updated_at=now)
+                    for data in item['answers']
+                ]
+                for answer in answers:
+                    (changed_answers if answer.id else new_answers).append(answer)
+                kept = {answer.id for answer in answers}
+                deleted_answers.extend(answer_id for answer_id in existing if answer_id not in kept)
+                item_answers[index] = answers
+
+            for i in range(0, len(deleted_answers), LOAD_CHUNK_SIZE):
+                Answer.objects.filter(id__in=deleted_answers[i:i + LOAD_CHUNK_SIZE]).delete()
+            Answer.objects.bulk_update(changed_answers, ['text', 'is_correct', 'updated_at'])
+            bulk_create_with_pks(Answer, new_answers, match_fields=('question_id', 'text'))
+
+        # Категории, из которых вопросы могли уйти, в question_ids уже не найти
+        moved_from = {self._existing_questions[item['id']][0] for item in self.items if 'id' in item}
+        notify_questions_changed(question_ids, category_ids=moved_from)
+        return [
+            {'id': question_id, 'answers': [answer.pk for answer in answers]}
+            for question_id, answers in zip(question_ids, item_answers)
+        ]
+
+    @staticmethod
+    def _question(item, question_id=None, updated_at=None):
+        return Question(id=question_id, category_id=item['category'], text=item['text'],
+                        difficulty=item['difficulty'], updated_at=updated_at)
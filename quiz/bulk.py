@@ -0,0 +1,47 @@
+from django.db import connections, router
+from django.db.models import Max
+
+
+def bulk_create_with_pks(model, objs, batch_size=None, match_fields=()):
+    """
+    Массовая вставка объектов с гарантированно заполненными первичными ключами.
+
+    SQL Server не возвращает ключи из bulk insert, поэтому для него ключи
+    дочитываются отдельным запросом: берутся строки с pk больше максимального
+    до вставки. Вызывать нужно внутри transaction.atomic(). Поля из
+    match_fields сверяются с объектами, чтобы не привязать чужие строки,
+    если в таблицу параллельно писал кто-то еще.
+    """
+    if not objs:
+        return objs
+
+    using = router.db_for_write(model)
+    manager = model._default_manager.db_manager(using)
+
+    if connections[using].features.can_return_rows_from_bulk_insert:
+        return manager.bulk_create(objs, batch_size=batch_size)
+
+    last_pk = manager.aggregate(last_pk=Max('pk'))['last_pk'] or 0
+    manager.bulk_create(objs, batch_size=batch_size)
+
+    rows = list(
+        manager.filter(pk__gt=last_pk)
+        .order_by('pk')
+        .values_list('pk', *match_fields)[:len(objs)]
+    )
+    if len(rows) != len(objs):
+        raise RuntimeError(
+            f"Не удалось сопоставить ключи после массовой вставки {model.__name__}: "
+            f"ожидалось {len(objs)}, получено {len(rows)}"
+        )
+
+    for obj, row in zip(objs, rows):
+        if tuple(getattr(obj, field) for field in match_fields) != tuple(row[1:]):
+            raise RuntimeError(
+                f"Параллельная запись в {model.__name__} во время массовой вставки"
+            )
+        obj.pk = row[0]
+        obj._state.adding = False
+        obj._state.db = using
+
+    return objs
@@ -0,0 +1,143 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef, Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import QuestionCategory, Question, Answer, ChangeLogEntry, ChangeLogCompaction
+from .signals import questions_changed
+
+DEFAULT_BATCH_SIZE = 500
+# Ограничение SQL Server — не больше 2100 параметров в запросе
+MAX_BATCH_SIZE = 1000
+WRITE_BATCH_SIZE = 500
+
+
+class ChangesUnavailable(Exception):
+    """
+    Токен выдан до сжатия журнала, убравшего часть удалений: нужна полная синхронизация.
+    """
+
+
+def log_changes(kind, object_ids):
+    ChangeLogEntry.objects.bulk_create(
+        [ChangeLogEntry(kind=kind, object_id=object_id) for object_id in object_ids], batch_size=WRITE_BATCH_SIZE
+    )
+
+
+def parse_token(value):
+    """
+    Токен синхронизации «поколение-запись»: id последнего сжатия журнала и id записи,
+    до которой клиент получил изменения. «0» — синхронизация с нуля. Неверный токен — ValueError.
+    """
+    if value in (None, '', '0'):
+        return 0, 0
+    generation, _, since = value.partition('-')
+    generation, since = int(generation), int(since)
+    if generation < 0 or since < 0:
+        raise ValueError(value)
+    return generation, since
+
+
+def changes_since(token, limit=DEFAULT_BATCH_SIZE, staff=False):
+    """
+    Изменения банка вопросов после токена — не больше limit записей журнала.
+    Повторы объекта в пачке схлопываются; существующие объекты отдаются в текущем
+    состоянии (вопрос — вместе со всеми ответами), отсутствующие — как удаленные.
+    is_correct ответов видят только сотрудники.
+    """
+    generation, since = parse_token(token)
+    # Поколение читаем до записей: сжатие, закончившееся позже, проверит следующий запрос
+    current = ChangeLogCompaction.objects.aggregate(value=Max('id'))['value'] or 0
+    if since and ChangeLogCompaction.objects.filter(id__gt=generation, tombstones_before__gt=since).exists():
+        raise ChangesUnavailable(token)
+
+    entries = list(
+        ChangeLogEntry.objects.filter(id__gt=since).order_by('id')
+        .values_list('id', 'kind', 'object_id', 'created_at')[:limit + 1]
+    )
+    more = len(entries) > limit
+    entries = entries[:limit]
+    category_ids = {object_id for _, kind, object_id, _ in entries if kind == 'category'}
+    question_ids = {object_id for _, kind, object_id, _ in entries if kind == 'question'}
+
+    categories = list(
+        QuestionCategory.objects.filter(id__in=category_ids).order_by('id').values('id', 'name', 'updated_at')
+    )
+    questions = list(
+        Question.objects.filter(id__in=question_ids).order_by('id')
+        .values('id', 'category', 'text', 'difficulty', 'updated_at')
+    )
+    answers = {}
+    answer_fields = ('id', 'question_id', 'text', 'is_correct', 'updated_at') if staff else \
+        ('id', 'question_id', 'text', 'updated_at')
+    rows = Answer.objects.filter(question_id__in=[question['id'] for question in questions]).order_by(
+        'question_id', 'id'
+    ).values(*answer_fields)
+    for answer in rows:
+        answers.setdefault(answer.pop('question_id'), []).append(answer)
+    for question in questions:
+        question['answers'] = answers.get(question['id'], [])
+
+    return {
+        'token': f'{current}-{_next_token(since, entries, more)}',
+        'more': more,
+        'categories': categories,
+        'questions': questions,
+        'deleted': {
+            'categories': sorted(category_ids - {category['id'] for category in categories}),
+            'questions': sorted(question_ids - {question['id'] for question in questions}),
+        },
+    }
+
+
+def _next_token(since, entries, more):
+    """
+    Токен следующего запроса. id записей выдаются при вставке, а видны после фиксации,
+    поэтому транзакция, начатая раньше, может добавить запись с меньшим id позже.
+    Записи моложе QUIZ_CHANGES_SETTLE_SECONDS отдаются повторно, пока не устареют.
+    """
+    if not entries:
+        return since
+    fresh_after = timezone.now() - timedelta(seconds=settings.QUIZ_CHANGES_SETTLE_SECONDS)
+    for entry_id, _, _, created_at in entries:
+        if created_at >= fresh_after:
+            if entry_id - 1 > since or not more:
+                return max(entry_id - 1, since)
+            # Вся полная пачка свежая: без продвижения клиент получал бы ее бесконечно
+            break
+    return entries[-1][0]
+
+
+def compact_change_log(retention_days):
+    """
+    Сжимает журнал: убирает записи, за которыми есть более поздние о том же объекте,
+    и записи об удаленных объектах старше retention_days. Возвращает ChangeLogCompaction.
+    """
+    with transaction.atomic():
+        superseded = ChangeLogEntry.objects.filter(Exists(
+            ChangeLogEntry.objects.filter(kind=OuterRef('kind'), object_id=OuterRef('object_id'), id__gt=OuterRef('id'))
+        ))
+        removed = superseded.delete()[0]
+
+        tombstones = ChangeLogEntry.objects.filter(created_at__lt=timezone.now() - timedelta(days=retention_days)).filter(
+            Q(kind='category') & ~Exists(QuestionCategory.objects.filter(pk=OuterRef('object_id')))
+            | Q(kind='question') & ~Exists(Question.objects.filter(pk=OuterRef('object_id')))
+        )
+        horizon = tombstones.aggregate(value=Max('id'))['value'] or 0
+        removed += tombstones.delete()[0]
+        return ChangeLogCompaction.objects.create(removed=removed, tombstones_before=horizon)
+
+
+@receiver(questions_changed)
+def log_questions_changed(sender, question_ids, **kwargs):
+    log_changes('question', question_ids)
+
+
+@receiver(post_save, sender=QuestionCategory)
+@receiver(post_delete, sender=QuestionCategory)
+def log_category_changed(sender, instance, **kwargs):
+    log_changes('category', [instance.pk])
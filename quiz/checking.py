@@ -0,0 +1,82 @@
+from .answer_key import answer_key
+
+# Больше пар за один запрос на проверку не принимаем
+MAX_BATCH_SIZE = 500
+
+ERROR_INVALID = "Неверные данные"
+ERROR_QUESTION_NOT_FOUND = "Вопрос не найден"
+ERROR_ANSWER_MISMATCH = "Ответ не связан с вопросом"
+
+
+def _to_id(value):
+    if isinstance(value, bool):
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def check_answer(question_id, answer_id):
+    """
+    Проверяет один ответ по кэшу ключа ответов.
+    Возвращает (вопрос, is_correct, ошибка); при попадании в кэш база не используется.
+    """
+    question_id, answer_id = _to_id(question_id), _to_id(answer_id)
+    if not (question_id and answer_id):
+        return None, None, ERROR_INVALID
+    return _check_entry(answer_key.get(question_id), answer_id)
+
+
+async def acheck_answer(question_id, answer_id):
+    """
+    Асинхронный вариант check_answer для асинхронных представлений.
+    """
+    question_id, answer_id = _to_id(question_id), _to_id(answer_id)
+    if not (question_id and answer_id):
+        return None, None, ERROR_INVALID
+    return _check_entry(await answer_key.aget(question_id), answer_id)
+
+
+def _check_entry(entry, answer_id):
+    if entry is None:
+        return None, None, ERROR_QUESTION_NOT_FOUND
+    is_correct = entry.answers.get(answer_id)
+    if is_correct is None:
+        return entry, None, ERROR_ANSWER_MISMATCH
+    return entry, is_correct, None
+
+
+def check_answer_batch(items):
+    """
+    Проверяет список пар {question_id, answer_id} по кэшу ключа ответов.
+    Вопросы, которых нет в кэше, дочитываются одним запросом.
+    Возвращает результаты в порядке входных пар.
+    """
+    pairs = []
+    for item in items:
+        if not isinstance(item, dict):
+            pairs.append((None, None))
+            continue
+        pairs.append((_to_id(item.get('question_id')), _to_id(item.get('answer_id'))))
+
+    entries = answer_key.get_many([q for q, a in pairs if q and a])
+
+    results = []
+    for item, (question_id, answer_id) in zip(items, pairs):
+        result = {
+            'question_id': item.get('question_id') if isinstance(item, dict) else None,
+            'answer_id': item.get('answer_id') if isinstance(item, dict) else None,
+        }
+        entry = entries.get(question_id)
+        if not (question_id and answer_id):
+            result['error'] = ERROR_INVALID
+        elif entry is None:
+            result['error'] = ERROR_QUESTION_NOT_FOUND
+        elif answer_id not in entry.answers:
+            result['error'] = ERROR_ANSWER_MISMATCH
+        else:
+            result['is_correct'] = entry.answers[answer_id]
+        results.append(result)
+    return results
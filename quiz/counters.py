@@ -0,0 +1,91 @@
+from django.db.models import Count, F, QuerySet
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import QuestionCategory, Question
+
+# Счетчик для каждой сложности; вопросы с другой сложностью учитываются только в question_count
+DIFFICULTY_COUNTERS = {
+    'easy': 'easy_count',
+    'medium': 'medium_count',
+    'hard': 'hard_count',
+}
+
+
+def counter_deltas(rows):
+    """
+    Сводит строки (id категории, сложность, приращение) в {id категории: {поле: приращение}}.
+    """
+    deltas = {}
+    for category_id, difficulty, amount in rows:
+        delta = deltas.setdefault(category_id, dict.fromkeys(QuestionCategory.COUNTER_FIELDS, 0))
+        delta['question_count'] += amount
+        field = DIFFICULTY_COUNTERS.get(difficulty)
+        if field:
+            delta[field] += amount
+    return deltas
+
+
+def adjust_category_counters(rows):
+    """
+    Прибавляет к счетчикам категорий изменения по строкам (id категории, сложность, приращение).
+    На категорию — один UPDATE с F(), поэтому одновременные изменения из разных
+    процессов не теряются; категории обновляются по возрастанию id, чтобы
+    параллельные транзакции брали блокировки в одном порядке.
+    """
+    for category_id, delta in sorted(counter_deltas(rows).items()):
+        changes = {field: F(field) + amount for field, amount in delta.items() if amount}
+        if changes:
+            QuestionCategory.objects.filter(pk=category_id).update(**changes)
+
+
+def compute_category_counters():
+    """
+    Полный пересчет по таблице вопросов: {id категории: {поле: значение}} для всех категорий.
+    """
+    counters = {
+        category_id: dict.fromkeys(QuestionCategory.COUNTER_FIELDS, 0)
+        for category_id in QuestionCategory.objects.values_list('id', flat=True)
+    }
+    rows = Question.objects.values('category_id', 'difficulty').annotate(total=Count('id')).values_list(
+        'category_id', 'difficulty', 'total'
+    ).order_by()
+    for category_id, delta in counter_deltas(rows).items():
+        if category_id in counters:
+            counters[category_id] = delta
+    return counters
+
+
+@receiver(pre_save, sender=Question)
+def remember_counter_key(sender, instance, **kwargs):
+    key = getattr(instance, '_loaded_counter_key', None)
+    if key is None and instance.pk is not None:
+        # Вопрос с заданным id, но не загруженный из базы: старые значения берем запросом
+        key = Question.objects.filter(pk=instance.pk).values_list('category_id', 'difficulty').first()
+    instance._saved_counter_key = key
+
+
+@receiver(post_save, sender=Question)
+def update_counters_on_save(sender, instance, created, **kwargs):
+    before = None if created else getattr(instance, '_saved_counter_key', None)
+    after = (instance.category_id, instance.difficulty)
+    if before != after:
+        rows = [(*after, 1)]
+        if before is not None:
+            rows.append((*before, -1))
+        adjust_category_counters(rows)
+    instance._loaded_counter_key = after
+
+
+@receiver(post_delete, sender=Question)
+def update_counters_on_delete(sender, instance, origin=None, **kwargs):
+    key = getattr(instance, '_loaded_counter_key', None) or (instance.category_id, instance.difficulty)
+    if isinstance(origin, QuestionCategory) or (isinstance(origin, QuerySet) and origin.model is QuestionCategory):
+        # Вопрос удаляется каскадно вместе со своей категорией — менять нечего
+        return
+    deleted_keys = getattr(origin, '_deleted_counter_keys', None)
+    if deleted_keys is not None:
+        # Удаление выборкой: счетчики поменяет QuestionQuerySet.delete() после удаления всех вопросов
+        deleted_keys.append(key)
+    else:
+        adjust_category_counters([(*key, -1)])
@@ -0,0 +1,118 @@
+import csv
+import json
+import zlib
+
+from config.pagination import keyset_pages
+
+from .models import Question, Answer
+
+EXPORT_FORMATS = ('json', 'ndjson', 'csv')
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+CSV_HEADER = ['category', 'question', 'difficulty', 'answer', 'is_correct']
+# Сколько вопросов читать за один запрос
+EXPORT_CHUNK_SIZE = 2000
+# Размер блока, которым ответ отдается клиенту
+WRITE_BUFFER_SIZE = 64 * 1024
+
+
+def iter_export_items(chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Отдает вопросы по одному в формате файла load_quiz_data.
+    Вопросы читаются страницами по id, ответы страницы — одним запросом по
+    диапазону id вопросов, поэтому в памяти держится не больше chunk_size вопросов.
+    """
+    questions = Question.objects.values_list('id', 'category__name', 'text', 'difficulty')
+    for page in keyset_pages(questions, chunk_size):
+        answers = {}
+        rows = Answer.objects.filter(question_id__gte=page[0][0], question_id__lte=page[-1][0]).order_by(
+            'question_id', 'id'
+        ).values_list('question_id', 'text', 'is_correct')
+        for question_id, text, is_correct in rows:
+            answers.setdefault(question_id, []).append({"text": text, "is_correct": is_correct})
+
+        for question_id, category, text, difficulty in page:
+            yield {
+                "category": category,
+                "question": text,
+                "answers": answers.get(question_id, []),
+                "difficulty": difficulty,
+            }
+
+
+def render_json(items):
+    yield '['
+    separator = '\n  '
+    for item in items:
+        yield separator + json.dumps(item, ensure_ascii=False)
+        separator = ',\n  '
+    yield '\n]\n'
+
+
+def render_ndjson(items):
+    for item in items:
+        yield json.dumps(item, ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    """
+    Файлоподобный объект для csv.writer: возвращает строку вместо записи.
+    """
+
+    def write(self, value):
+        return value
+
+
+def render_csv(items):
+    """
+    По строке на ответ; вопрос без ответов — одна строка с пустым ответом.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_HEADER)
+    for item in items:
+        for answer in item['answers'] or [{"text": '', "is_correct": ''}]:
+            yield writer.writerow([
+                item['category'], item['question'], item['difficulty'], answer['text'], answer['is_correct'],
+            ])
+
+
+RENDERERS = {
+    'json': render_json,
+    'ndjson': render_ndjson,
+    'csv': render_csv,
+}
+
+
+def encode_stream(chunks, compress=False, buffer_size=WRITE_BUFFER_SIZE):
+    """
+    Собирает строки в блоки по buffer_size байт в UTF-8, при compress — сжимает gzip на лету.
+    """
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if compress else None
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= buffer_size:
+            block = b''.join(buffer)
+            buffer, size = [], 0
+            if compressor is not None:
+                block = compressor.compress(block)
+            if block:
+                yield block
+    block = b''.join(buffer)
+    if compressor is not None:
+        block = compressor.compress(block) + compressor.flush()
+    if block:
+        yield block
+
+
+def export_stream(fmt, compress=False, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Поток байтов выгрузки всего банка вопросов в формате fmt.
+    """
+    return encode_stream(RENDERERS[fmt](iter_export_items(chunk_size)), compress)
@@ -0,0 +1,38 @@
+import django_filters
+from django.db.models import Exists, OuterRef
+
+from .models import DIFFICULTY_CHOICES, Question, Answer
+
+
+class QuestionFilter(django_filters.FilterSet):
+    """
+    Фильтры списка вопросов: category, difficulty и has_correct_answer.
+    Категория задается числом, а не ModelChoiceFilter: проверка параметров
+    не обращается к базе, поэтому фильтр работает и в асинхронных представлениях.
+    """
+    category = django_filters.NumberFilter(field_name='category')
+    difficulty = django_filters.ChoiceFilter(choices=DIFFICULTY_CHOICES)
+    has_correct_answer = django_filters.BooleanFilter(method='filter_has_correct_answer')
+
+    class Meta:
+        model = Question
+        fields = ['category', 'difficulty', 'has_correct_answer']
+
+    def filter_has_correct_answer(self, queryset, name, value):
+        # Подзапрос идет по индексу (question, is_correct) ответов
+        correct = Exists(Answer.objects.filter(question=OuterRef('pk'), is_correct=True))
+        return queryset.filter(correct if value else ~correct)
+
+
+class AnswerFilter(django_filters.FilterSet):
+    """
+    Фильтры списка ответов: question, category и difficulty вопроса, is_correct.
+    """
+    question = django_filters.NumberFilter(field_name='question')
+    category = django_filters.NumberFilter(field_name='question__category')
+    difficulty = django_filters.ChoiceFilter(field_name='question__difficulty', choices=DIFFICULTY_CHOICES)
+    is_correct = django_filters.BooleanFilter()
+
+    class Meta:
+        model = Answer
+        fields = ['question', 'category', 'difficulty', 'is_correct']
@@ -0,0 +1,403 @@
+import hashlib
+import json
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from config.pagination import keyset_pages
+
+from .bulk import bulk_create_with_pks
+from .counters import adjust_category_counters
+from .models import DIFFICULTY_CHOICES, QuestionCategory, Question, Answer
+from .signals import notify_questions_changed
+
+READ_CHUNK_SIZE = 64 * 1024
+# Символы, после которых скаляр в массиве точно закончился
+SCALAR_END = ' \t\r\n,]'
+
+# Сложность в файле может быть задана кодом ('easy') или подписью ('Легкий')
+DIFFICULTY_ALIASES = {
+    **{value: value for value, _ in DIFFICULTY_CHOICES},
+    **{label.lower(): value for value, label in DIFFICULTY_CHOICES},
+    'лёгкий': 'easy',
+}
+
+
+class QuizDataError(ValueError):
+    """Ошибка формата входного файла с вопросами."""
+
+
+def detect_format(path):
+    """
+    Определяет формат файла по расширению: .ndjson/.jsonl — NDJSON, иначе JSON.
+    Суффикс .gz не учитывается.
+    """
+    path = str(path).lower()
+    if path.endswith('.gz'):
+        path = path[:-3]
+    return 'ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'json'
+
+
+def iter_json_array(fp, chunk_size=READ_CHUNK_SIZE):
+    """
+    Потоково читает JSON-массив верхнего уровня и отдает элементы по одному.
+    В памяти держится только текущий элемент и недочитанный хвост буфера.
+    """
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    eof = False
+    started = False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            eof = True
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    skip_whitespace()
+    if pos >= len(buf) or buf[pos] != '[':
+        raise QuizDataError("Ожидался JSON-массив вопросов")
+    pos += 1
+
+    while True:
+        skip_whitespace()
+        if pos >= len(buf):
+            raise QuizDataError("Неожиданный конец файла")
+        if buf[pos] == ']':
+            pos += 1
+            skip_whitespace()
+            if pos < len(buf):
+                raise QuizDataError("Лишние данные после JSON-массива")
+            return
+        if started:
+            if buf[pos] != ',':
+                raise QuizDataError(f"Ожидалась запятая, найдено {buf[pos]!r}")
+            pos += 1
+            skip_whitespace()
+        while True:
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+                # raw_decode может успешно разобрать начало обрезанного числа
+                # («1» из «1e-07»), поэтому число или литерал принимается, только
+                # если за ним уже виден разделитель или файл закончился.
+                if isinstance(item, (dict, list, str)) or eof or (end < len(buf) and buf[end] in SCALAR_END):
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise QuizDataError("Некорректный JSON в файле вопросов")
+            fill()
+        pos = end
+        started = True
+        yield item
+
+
+def iter_ndjson(fp):
+    """
+    Читает NDJSON: по одному JSON-объекту на строку, пустые строки пропускаются.
+    """
+    for line_no, line in enumerate(fp, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise QuizDataError(f"Строка {line_no}: некорректный JSON ({e})")
+
+
+def iter_quiz_items(fp, fmt='json'):
+    if fmt == 'ndjson':
+        return iter_ndjson(fp)
+    if fmt == 'json':
+        return iter_json_array(fp)
+    raise QuizDataError(f"Неизвестный формат: {fmt}")
+
+
+def parse_item(item):
+    """
+    Проверяет элемент файла и возвращает (категория, текст, сложность, ответы).
+    """
+    try:
+        answers = [
+            (answer['text'], bool(answer.get('is_correct', False)))
+            for answer in item['answers']
+        ]
+        return item['category'], item['question'], normalize_difficulty(item['difficulty']), answers
+    except (KeyError, TypeError) as e:
+        raise QuizDataError(f"Некорректный элемент: отсутствует поле {e}")
+
+
+def normalize_difficulty(value):
+    """
+    Приводит сложность из файла к значению поля Question.difficulty.
+    """
+    difficulty = DIFFICULTY_ALIASES.get(str(value).strip().lower())
+    if difficulty is None:
+        raise QuizDataError(f"Неизвестная сложность: {value!r}")
+    return difficulty
+
+
+def fingerprint(category, text, difficulty, answers):
+    """
+    Возвращает (ключ, хэш) элемента. Ключ определяет, какой это вопрос
+    (категория и текст), хэш — его полное содержимое вместе с ответами.
+    """
+    key = hashlib.sha256(
+        json.dumps([category, text], ensure_ascii=False).encode('utf-8')
+    ).hexdigest()
+    content_hash = hashlib.sha256(
+        json.dumps([category, text, difficulty, answers], ensure_ascii=False).encode('utf-8')
+    ).hexdigest()
+    return key, content_hash
+
+
+def chunked(values, size):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+class QuizBulkImporter:
+    """
+    Пакетная загрузка вопросов: вопросы и ответы вставляются через bulk_create
+    пачками по batch_size, каждая пачка — в своей транзакции. Категории
+    кэшируются в памяти, поэтому на категорию приходится не больше одного запроса.
+    """
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.items_processed = 0
+        self.questions_created = 0
+        self.answers_created = 0
+        self.categories_created = 0
+        self.started_at = time.monotonic()
+        self._categories = dict(QuestionCategory.objects.values_list('name', 'id'))
+        self._pending = []
+        self._touched_ids = []
+
+    def add(self, item):
+        self._pending.append(parse_item(item))
+        self.items_processed += 1
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        new_categories = []
+        self._touched_ids = []
+        try:
+            with transaction.atomic():
+                self._write_batch(pending, new_categories)
+        except Exception:
+            # Категории, созданные в откатившейся транзакции, в базе не сохранились
+            for name in new_categories:
+                self._categories.pop(name, None)
+            raise
+        self.categories_created += len(new_categories)
+        # bulk-операции не отправляют модельных сигналов, поэтому кэши оповещаем сами
+        notify_questions_changed(self._touched_ids)
+
+    def _write_batch(self, pending, new_categories):
+        self._create_questions(pending, new_categories)
+
+    def _create_questions(self, pending, new_categories):
+        questions = []
+        for category, text, difficulty, answers in pending:
+            import_key, content_hash = fingerprint(category, text, difficulty, answers)
+            questions.append(Question(
+                category_id=self._category_id(category, new_categories),
+                text=text,
+                difficulty=difficulty,
+                import_key=import_key,
+                content_hash=content_hash,
+            ))
+        bulk_create_with_pks(Question, questions, match_fields=('import_key',))
+        adjust_category_counters((question.category_id, question.difficulty, 1) for question in questions)
+        self._create_answers(zip(questions, pending))
+        self._touched_ids.extend(question.pk for question in questions)
+        self.questions_created += len(questions)
+
+    def _create_answers(self, questions_with_items):
+        answers = [
+            Answer(question_id=question.pk, text=text, is_correct=is_correct)
+            for question, (_, _, _, answers_data) in questions_with_items
+            for text, is_correct in answers_data
+        ]
+        Answer.objects.bulk_create(answers)
+        self.answers_created += len(answers)
+
+    def _category_id(self, name, new_categories):
+        category_id = self._categories.get(name)
+        if category_id is None:
+            category_id = QuestionCategory.objects.create(name=name).pk
+            self._categories[name] = category_id
+            new_categories.append(name)
+        return category_id
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started_at
+
+    @property
+    def rate(self):
+        return self.items_processed / self.elapsed if self.elapsed else 0.0
+
+
+class QuizSyncImporter(QuizBulkImporter):
+    """
+    Инкрементальная синхронизация банка вопросов с файлом. Отпечатки пачки
+    сверяются с колонками import_key/content_hash одним запросом: новые
+    вопросы вставляются, у измененных обновляются только отличающиеся поля и ответы, совпадающие
+    пропускаются. С delete_missing вопросы, которых нет в файле, удаляются
+    в finish(). Вопросы без import_key (созданные через API) не трогаются.
+    """
+
+    # Ограничение SQL Server — не больше 2100 параметров в запросе
+    lookup_chunk_size = 1000
+
+    def __init__(self, batch_size=1000, delete_missing=False):
+        super().__init__(batch_size=batch_size)
+        self.delete_missing = delete_missing
+        self.questions_updated = 0
+        self.questions_unchanged = 0
+        self.questions_deleted = 0
+        self._seen_keys = set()
+
+    def add(self, item):
+        parsed = parse_item(item)
+        self._seen_keys.add(fingerprint(*parsed)[0])
+        self._pending.append(parsed)
+        self.items_processed += 1
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def _write_batch(self, pending, new_categories):
+        # Повторы внутри пачки схлопываются: побеждает последний
+        items = {}
+        for parsed in pending:
+            items[fingerprint(*parsed)[0]] = parsed
+
+        existing = {}
+        duplicate_ids = []
+        for keys in chunked(items, self.lookup_chunk_size):
+            rows = (
+                Question.objects.filter(import_key__in=keys)
+                .order_by('id')
+                .values_list('import_key', 'id', 'content_hash', 'category_id', 'difficulty')
+            )
+            for import_key, question_id, content_hash, category_id, difficulty in rows:
+                if import_key in existing:
+                    duplicate_ids.append(question_id)
+                else:
+                    existing[import_key] = (question_id, content_hash, category_id, difficulty)
+
+        new_items = []
+        changed = []
+        counter_rows = []
+        now = timezone.now()
+        for import_key, parsed in items.items():
+            if import_key not in existing:
+                new_items.append(parsed)
+                continue
+            question_id, stored_hash, category_id, stored_difficulty = existing[import_key]
+            content_hash = fingerprint(*parsed)[1]
+            if content_hash == stored_hash:
+                self.questions_unchanged += 1
+                continue
+            changed.append((
+                Question(id=question_id, difficulty=parsed[2], content_hash=content_hash, updated_at=now), parsed
+            ))
+            # Категория входит в import_key, поэтому у измененного вопроса может поменяться только сложность
+            counter_rows.extend([(category_id, stored_difficulty, -1), (category_id, parsed[2], 1)])
+
+        self._create_questions(new_items, new_categories)
+
+        if changed:
+            changed_questions = [question for question, _ in changed]
+            # bulk_update не заполняет auto_now — updated_at задан выше
+            Question.objects.bulk_update(changed_questions, ['difficulty', 'content_hash', 'updated_at'])
+            adjust_category_counters(counter_rows)
+            self._sync_answers(changed, now)
+            self._touched_ids.extend(question.pk for question in changed_questions)
+            self.questions_updated += len(changed)
+
+        if duplicate_ids and self.delete_missing:
+            self._delete(duplicate_ids)
+
+    def _sync_answers(self, changed, now):
+        """
+        Приводит ответы измененных вопросов к файлу, не пересоздавая совпадающие:
+        ответ с тем же текстом сохраняет id (на него ссылаются попытки и кэш
+        ключей ответов), у него меняется только is_correct. Если поменялась
+        лишь сложность вопроса, запросов на запись ответов нет совсем.
+        """
+        stored = {}
+        for ids in chunked((question.pk for question, _ in changed), self.lookup_chunk_size):
+            rows = (
+                Answer.objects.filter(question_id__in=ids)
+                .order_by('id')
+                .values_list('question_id', 'id', 'text', 'is_correct')
+            )
+            for question_id, answer_id, text, is_correct in rows:
+                stored.setdefault(question_id, []).append((answer_id, text, is_correct))
+
+        to_create = []
+        to_update = []
+        to_delete = []
+        for question, (_, _, _, answers_data) in changed:
+            by_text = {}
+            for answer_id, text, is_correct in stored.get(question.pk, []):
+                by_text.setdefault(text, []).append((answer_id, is_correct))
+            for text, is_correct in answers_data:
+                matches = by_text.get(text)
+                if not matches:
+                    to_create.append(Answer(question_id=question.pk, text=text, is_correct=is_correct))
+                    continue
+                answer_id, stored_correct = matches.pop(0)
+                if stored_correct != is_correct:
+                    # bulk_update не заполняет auto_now
+                    to_update.append(Answer(id=answer_id, is_correct=is_correct, updated_at=now))
+            to_delete.extend(answer_id for matches in by_text.values() for answer_id, _ in matches)
+
+        for ids in chunked(to_delete, self.lookup_chunk_size):
+            Answer.objects.filter(id__in=ids).delete()
+        Answer.objects.bulk_update(to_update, ['is_correct', 'updated_at'], batch_size=self.lookup_chunk_size)
+        Answer.objects.bulk_create(to_create)
+        self.answers_created += len(to_create)
+
+    def finish(self):
+        """
+        Дописывает последнюю пачку и, если нужно, удаляет вопросы, которых нет в файле.
+        """
+        self.flush()
+        if not self.delete_missing:
+            return
+        rows = Question.objects.exclude(import_key=None).values_list('id', 'import_key')
+        missing_ids = [
+            question_id
+            for page in keyset_pages(rows, self.lookup_chunk_size * 10)
+            for question_id, import_key in page
+            if import_key not in self._seen_keys
+        ]
+        with transaction.atomic():
+            self._delete(missing_ids)
+
+    def _delete(self, question_ids):
+        for ids in chunked(question_ids, self.lookup_chunk_size):
+            Question.objects.filter(id__in=ids).delete()
+            self.questions_deleted += len(ids)
@@ -0,0 +1,235 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .answer_key import answer_key
+from .attempts import attempts_flushed
+from .models import AttemptAnswer, CategoryScore
+
+# Ограничение SQL Server — не больше 2100 параметров в запросе
+LOAD_CHUNK_SIZE = 1000
+
+
+class CategoryLeaderboard:
+    """
+    Таблица лидеров одной категории: отсортированный список (-correct, user_id).
+    Первые K мест читаются срезом, место пользователя — двоичным поиском.
+    Места считаются «спортивным» способом: при равном числе правильных ответов
+    место одно, следующее место пропускается.
+    """
+
+    def __init__(self, rows=()):
+        self._scores = {}  # id пользователя -> (answered, correct)
+        self._order = []
+        for user_id, answered, correct in rows:
+            self._scores[user_id] = (answered, correct)
+            self._order.append((-correct, user_id))
+        self._order.sort()
+
+    def __len__(self):
+        return len(self._order)
+
+    def add(self, user_id, answered, correct):
+        """
+        Прибавляет к результату пользователя answered ответов, из них correct правильных.
+        """
+        old_answered, old_correct = self._scores.get(user_id, (0, 0))
+        if user_id in self._scores:
+            del self._order[bisect_left(self._order, (-old_correct, user_id))]
+        self._scores[user_id] = (old_answered + answered, old_correct + correct)
+        insort(self._order, (-(old_correct + correct), user_id))
+
+    def top(self, limit):
+        """
+        Возвращает до limit строк (место, id пользователя, answered, correct).
+        """
+        rows = []
+        rank = 0
+        previous = None
+        for position, (negative_correct, user_id) in enumerate(self._order[:limit]):
+            if negative_correct != previous:
+                rank, previous = position + 1, negative_correct
+            answered, correct = self._scores[user_id]
+            rows.append((rank, user_id, answered, correct))
+        return rows
+
+    def rank(self, user_id):
+        """
+        Возвращает (место, answered, correct) или None, если пользователь не отвечал.
+        """
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        answered, correct = score
+        return bisect_left(self._order, (-correct,)) + 1, answered, correct
+
+
+class LeaderboardIndex:
+    """
+    Процессные таблицы лидеров по категориям. Агрегаты CategoryScore
+    обновляются приращениями при записи ответов из буфера попыток, здесь же
+    обновляются и уже загруженные таблицы. answered — число всех ответов,
+    correct — число разных вопросов, на которые пользователь ответил верно:
+    повторный правильный ответ на тот же вопрос результат не увеличивает. Таблица категории читается из базы
+    при первом обращении и перечитывается раз в QUIZ_LEADERBOARD_REFRESH_SECONDS,
+    чтобы подхватить ответы, записанные другими процессами.
+    """
+
+    def __init__(self, refresh_seconds=None):
+        self._refresh_seconds = refresh_seconds
+        self._boards = {}  # id категории -> (таблица, время загрузки)
+        self._lock = threading.Lock()
+
+    @property
+    def refresh_seconds(self):
+        if self._refresh_seconds is not None:
+            return self._refresh_seconds
+        return getattr(settings, 'QUIZ_LEADERBOARD_REFRESH_SECONDS', 60)
+
+    def top(self, category_id, limit):
+        return self.board(category_id).top(limit)
+
+    def rank(self, category_id, user_id):
+        return self.board(category_id).rank(user_id)
+
+    def board(self, category_id):
+        with self._lock:
+            loaded = self._boards.get(category_id)
+            if loaded is None or time.monotonic() - loaded[1] >= self.refresh_seconds:
+                # Загрузка под блокировкой: приращения, записанные во время чтения,
+                # иначе попали бы в таблицу дважды
+                rows = CategoryScore.objects.filter(category_id=category_id).values_list(
+                    'user_id', 'answered', 'correct'
+                )
+                loaded = self._boards[category_id] = (CategoryLeaderboard(rows), time.monotonic())
+            return loaded[0]
+
+    def record(self, answers):
+        """
+        Учитывает записанные AttemptAnswer: прибавляет их к CategoryScore
+        и к загруженным таблицам. Категории вопросов берутся из кэша ключа ответов.
+        """
+        entries = answer_key.get_many({answer.question_id for answer in answers})
+        batch_correct = Counter(
+            (answer.user_id, answer.question_id) for answer in answers if answer.is_correct
+        )
+        # Ответы пачки уже в базе: вопрос засчитывается, только если других
+        # правильных ответов пользователя на него нет
+        first_correct = {
+            pair for pair, count in _correct_counts(batch_correct).items() if count == batch_correct[pair]
+        }
+        deltas = {}
+        for answer in answers:
+            entry = entries.get(answer.question_id)
+            if entry is None:
+                continue
+            delta = deltas.setdefault((answer.user_id, entry.category_id), [0, 0])
+            delta[0] += 1
+            pair = (answer.user_id, answer.question_id)
+            if pair in first_correct:
+                first_correct.discard(pair)
+                delta[1] += 1
+        if not deltas:
+            return
+
+        with self._lock:
+            with transaction.atomic():
+                self._save(deltas)
+            for (user_id, category_id), (answered, correct) in deltas.items():
+                loaded = self._boards.get(category_id)
+                if loaded is not None:
+                    loaded[0].add(user_id, answered, correct)
+
+    def reset(self):
+        with self._lock:
+            self._boards.clear()
+
+    def _save(self, deltas):
+        existing = _existing_pairs(deltas)
+        missing = [pair for pair in deltas if pair not in existing]
+        for pair in existing:
+            _increment(pair, deltas[pair])
+        if not missing:
+            return
+        try:
+            with transaction.atomic():
+                CategoryScore.objects.bulk_create([
+                    CategoryScore(user_id=user_id, category_id=category_id,
+                                  answered=deltas[(user_id, category_id)][0],
+                                  correct=deltas[(user_id, category_id)][1])
+                    for user_id, category_id in missing
+                ])
+        except IntegrityError:
+            # Часть строк успел создать другой процесс — к ним прибавляем, остальные создаем
+            for user_id, category_id in missing:
+                answered, correct = deltas[(user_id, category_id)]
+                if not _increment((user_id, category_id), (answered, correct)):
+                    CategoryScore.objects.create(user_id=user_id, category_id=category_id,
+                                                 answered=answered, correct=correct)
+
+
+def _increment(pair, delta):
+    user_id, category_id = pair
+    answered, correct = delta
+    return CategoryScore.objects.filter(user_id=user_id, category_id=category_id).update(
+        answered=F('answered') + answered, correct=F('correct') + correct, updated_at=timezone.now(),
+    )
+
+
+def _existing_pairs(deltas):
+    user_ids = sorted({user_id for user_id, _ in deltas})
+    category_ids = {category_id for _, category_id in deltas}
+    existing = set()
+    for i in range(0, len(user_ids), LOAD_CHUNK_SIZE):
+        rows = CategoryScore.objects.filter(
+            user_id__in=user_ids[i:i + LOAD_CHUNK_SIZE], category_id__in=category_ids
+        ).values_list('user_id', 'category_id')
+        existing.update(pair for pair in rows if pair in deltas)
+    return existing
+
+
+def _correct_counts(pairs):
+    """
+    Число записанных правильных ответов по парам (id пользователя, id вопроса).
+    """
+    pairs = sorted(pairs)
+    counts = {}
+    # В запросе id пользователей и вопросов пачки — не больше LOAD_CHUNK_SIZE параметров
+    for i in range(0, len(pairs), LOAD_CHUNK_SIZE // 2):
+        chunk = pairs[i:i + LOAD_CHUNK_SIZE // 2]
+        rows = AttemptAnswer.objects.filter(
+            is_correct=True,
+            user_id__in={user_id for user_id, _ in chunk},
+            question_id__in={question_id for _, question_id in chunk},
+        ).values('user_id', 'question_id').annotate(count=Count('id')).values_list(
+            'user_id', 'question_id', 'count'
+        ).order_by()
+        counts.update(((user_id, question_id), count) for user_id, question_id, count in rows)
+    return {pair: counts.get(pair, 0) for pair in pairs}
+
+
+def compute_category_scores():
+    """
+    Полный пересчет результатов по всем записанным ответам:
+    {(id пользователя, id категории): (answered, correct)}, где correct —
+    число разных вопросов с правильным ответом.
+    """
+    rows = AttemptAnswer.objects.values('user_id', 'question__category_id').annotate(
+        answered=Count('id'), correct=Count('question_id', filter=Q(is_correct=True), distinct=True),
+    ).values_list('user_id', 'question__category_id', 'answered', 'correct').order_by()
+    return {(user_id, category_id): (answered, correct) for user_id, category_id, answered, correct in rows}
+
+
+leaderboards = LeaderboardIndex()
+
+
+@receiver(attempts_flushed)
+def update_leaderboards(sender, answers, **kwargs):
+    leaderboards.record(answers)
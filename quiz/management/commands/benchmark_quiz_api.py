@@ -0,0 +1,117 @@
+import asyncio
+import json
+import time
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+from quiz.models import Answer
+
+
+async def asgi_request(application, method, path, query_string=b'', body=b'', headers=()):
+    """
+    Выполняет один запрос к ASGI-приложению в этом же процессе и возвращает код ответа.
+    """
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode('utf-8'),
+        'query_string': query_string,
+        'headers': [(b'host', b'localhost'), (b'content-length', str(len(body)).encode('ascii')), *headers],
+        'server': ('localhost', 80),
+        'client': ('127.0.0.1', 0),
+    }
+    response = {}
+    finished = asyncio.Event()
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        await finished.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+        elif message['type'] == 'http.response.body' and not message.get('more_body'):
+            finished.set()
+
+    await application(scope, receive, send)
+    return response.get('status')
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+class Command(BaseCommand):
+    help = 'Compares requests per second and latency of sync and async quiz endpoints under ASGI'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help='Пользователь, от имени которого идут запросы')
+        parser.add_argument('--requests', type=int, default=500, help='Запросов на каждый эндпоинт и режим')
+        parser.add_argument('--concurrency', type=int, default=50, help='Одновременных запросов')
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f"Пользователь {options['username']} не найден")
+        answer = Answer.objects.order_by('id').first()
+        if answer is None:
+            raise CommandError("В базе нет ответов: загрузите данные викторины")
+
+        headers = (
+            (b'authorization', f'Bearer {AccessToken.for_user(user)}'.encode('ascii')),
+            (b'content-type', b'application/json'),
+        )
+        check_body = json.dumps({'question_id': answer.question_id, 'answer_id': answer.pk}).encode('utf-8')
+        cases = [
+            ('check_answer', 'POST', reverse('check_answer'), reverse('async-check-answer'), check_body),
+            ('questions', 'GET', reverse('question-list-create'), reverse('async-question-list'), b''),
+            ('categories', 'GET', reverse('category-list-create'), reverse('async-category-list'), b''),
+        ]
+
+        application = get_asgi_application()
+        self.stdout.write(f"{'эндпоинт':<14}{'режим':<7}{'запр./с':>10}{'p50, мс':>10}{'p99, мс':>10}{'ошибки':>8}")
+        for name, method, sync_path, async_path, body in cases:
+            for mode, path in (('sync', sync_path), ('async', async_path)):
+                rps, latencies, errors = async_to_sync(self._run)(
+                    application, method, path, body, headers, options['requests'], options['concurrency']
+                )
+                self.stdout.write(
+                    f"{name:<14}{mode:<7}{rps:>10.0f}{percentile(latencies, 0.5) * 1000:>10.2f}"
+                    f"{percentile(latencies, 0.99) * 1000:>10.2f}{errors:>8}"
+                )
+
+    async def _run(self, application, method, path, body, headers, total, concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        errors = 0
+
+        async def one(i):
+            nonlocal errors
+            # Уникальный параметр, чтобы GET не отдавался из кэша страниц
+            query_string = f'bench={i}'.encode('ascii') if method == 'GET' else b''
+            async with semaphore:
+                started = time.perf_counter()
+                status = await asgi_request(application, method, path, query_string, body, headers)
+                latencies.append(time.perf_counter() - started)
+            if status is None or status >= 400:
+                errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+        return total / elapsed if elapsed > 0 else 0.0, sorted(latencies), errors
@@ -0,0 +1,31 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from quiz.snapshot import BUILD_CHUNK_SIZE, Snapshot, build_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Builds a memory-mapped read-only snapshot of the quiz bank'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', default=None,
+                            help='Каталог снимков (по умолчанию QUIZ_SNAPSHOT_DIR)')
+        parser.add_argument('--chunk-size', type=int, default=BUILD_CHUNK_SIZE,
+                            help='Сколько вопросов читать за один запрос')
+        parser.add_argument('--keep', type=int, default=3, help='Сколько последних снимков хранить')
+
+    def handle(self, *args, **options):
+        directory = options['output_dir'] or settings.QUIZ_SNAPSHOT_DIR
+        if not directory:
+            raise CommandError("Не задан каталог снимков (QUIZ_SNAPSHOT_DIR)")
+
+        started = time.monotonic()
+        path = build_snapshot(directory, chunk_size=options['chunk_size'], keep=options['keep'])
+        snapshot = Snapshot(path)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Снимок {snapshot.build_id}: вопросов {snapshot.question_count}, "
+            f"{os.path.getsize(path)} байт за {time.monotonic() - started:.1f} с -> {path}"
+        ))
@@ -0,0 +1,27 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from quiz.search import SearchIndex
+
+
+class Command(BaseCommand):
+    help = 'Builds the full-text search index for quiz questions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=None,
+                            help='Куда сохранить индекс (по умолчанию QUIZ_SEARCH_INDEX_PATH)')
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Размер порции чтения из базы')
+
+    def handle(self, *args, **options):
+        path = options['output'] or settings.QUIZ_SEARCH_INDEX_PATH
+        if not path:
+            raise CommandError("Не задан путь к индексу (QUIZ_SEARCH_INDEX_PATH)")
+
+        started = time.monotonic()
+        index = SearchIndex.build(chunk_size=options['chunk_size'])
+        index.save(path)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Проиндексировано вопросов: {len(index)} за {time.monotonic() - started:.1f} с -> {path}"
+        ))
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from quiz.changes import compact_change_log
+
+
+class Command(BaseCommand):
+    help = 'Removes superseded change log entries and expired deletion records used by client sync'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int, default=settings.QUIZ_CHANGES_RETENTION_DAYS,
+                            help='Сколько дней хранить записи об удаленных объектах')
+
+    def handle(self, *args, **options):
+        if options['retention_days'] < 0:
+            raise CommandError("--retention-days не может быть отрицательным")
+        compaction = compact_change_log(options['retention_days'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Удалено записей журнала: {compaction.removed}; "
+            f"токены меньше {compaction.tombstones_before} требуют полной синхронизации"
+        ))
@@ -0,0 +1,45 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from quiz.exporters import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_stream
+
+
+class Command(BaseCommand):
+    help = 'Exports the quiz bank to JSON, NDJSON or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='-', help='Путь к файлу ("-" — стандартный вывод)')
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='json',
+                            help='Формат выгрузки; JSON и NDJSON читает load_quiz_data')
+        parser.add_argument('--gzip', action='store_true',
+                            help='Сжать gzip (включается автоматически для файлов .gz)')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+                            help='Сколько вопросов читать за один запрос')
+
+    def handle(self, *args, **options):
+        path = options['output']
+        compress = options['gzip'] or path.endswith('.gz')
+        stream = export_stream(options['format'], compress=compress, chunk_size=options['chunk_size'])
+
+        started = time.monotonic()
+        written = 0
+        if path == '-':
+            out = getattr(self.stdout, 'buffer', None) or sys.stdout.buffer
+            for block in stream:
+                out.write(block)
+                written += len(block)
+            out.flush()
+            return
+
+        try:
+            with open(path, 'wb') as f:
+                for block in stream:
+                    f.write(block)
+                    written += len(block)
+        except OSError as e:
+            raise CommandError(f"Не удалось записать файл: {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Выгружено {written} байт за {time.monotonic() - started:.1f} с -> {path}"
+        ))
@@ -1,26 +1,106 @@
-import json
-from django.core.management.base import BaseCommand
+import gzip
+
+from django.core.management.base import BaseCommand, CommandError
+from quiz.importers import QuizBulkImporter, QuizSyncImporter, QuizDataError, detect_format, fingerprint, \
+    iter_quiz_items, parse_item
 from quiz.models import QuestionCategory, Question, Answer
 
 
 class Command(BaseCommand):
     help = 'Loads quiz data from JSON file'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default='quiz_data.json', help='Путь к файлу с вопросами')
+        parser.add_argument('--format', choices=['auto', 'json', 'ndjson'], default='auto',
+                            help='Формат файла (по умолчанию определяется по расширению)')
+        parser.add_argument('--bulk', action='store_true',
+                            help='Пакетная загрузка через bulk_create, по транзакции на пачку')
+        parser.add_argument('--sync', action='store_true',
+                            help='Инкрементальная синхронизация: вставляются только новые вопросы, '
+                                 'измененные обновляются по хэшу содержимого')
+        parser.add_argument('--delete-missing', action='store_true',
+                            help='В режиме --sync удалить загруженные ранее вопросы, которых нет в файле')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Размер пачки в режимах --bulk и --sync')
+        parser.add_argument('--progress-every', type=int, default=10000,
+                            help='Как часто (в вопросах) печатать прогресс в режимах --bulk и --sync')
+
     def handle(self, *args, **options):
-        with open('quiz_data.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        if options['delete_missing'] and not options['sync']:
+            raise CommandError("--delete-missing используется только вместе с --sync")
 
-        for item in data:
-            category_name = item['category']
-            question_text = item['question']
-            answers_data = item['answers']
-            difficulty = item['difficulty']
+        fmt = options['format']
+        if fmt == 'auto':
+            fmt = detect_format(options['file'])
+
+        try:
+            # Файлы .gz (например, из export_quiz_data --gzip) читаются с распаковкой на лету
+            opener = gzip.open if options['file'].endswith('.gz') else open
+            with opener(options['file'], 'rt', encoding='utf-8') as f:
+                items = iter_quiz_items(f, fmt)
+                if options['sync']:
+                    self._sync(items, options)
+                elif options['bulk']:
+                    self._load_bulk(items, options)
+                else:
+                    self._load(items)
+        except OSError as e:
+            raise CommandError(f"Не удалось открыть файл: {e}")
+        except QuizDataError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS('Successfully loaded quiz data'))
+
+    def _load(self, items):
+        for item in items:
+            category_name, question_text, difficulty, answers_data = parse_item(item)
 
             category, _ = QuestionCategory.objects.get_or_create(name=category_name)
 
-            question = Question.objects.create(category=category, text=question_text, difficulty=difficulty)
+            import_key, content_hash = fingerprint(category_name, question_text, difficulty, answers_data)
+            question = Question.objects.create(category=category, text=question_text, difficulty=difficulty,
+                                               import_key=import_key, content_hash=content_hash)
 
-            for answer_data in answers_data:
-                Answer.objects.create(question=question, **answer_data)
+            for text, is_correct in answers_data:
+                Answer.objects.create(question=question, text=text, is_correct=is_correct)
 
-        self.stdout.write(self.style.SUCCESS('Successfully loaded quiz data'))
+    def _load_bulk(self, items, options):
+        importer = QuizBulkImporter(batch_size=self._batch_size(options))
+        self._feed(importer, items, options['progress_every'])
+        importer.flush()
+
+        self._report(importer)
+        self.stdout.write(
+            f"Создано категорий: {importer.categories_created}, "
+            f"вопросов: {importer.questions_created}, ответов: {importer.answers_created}"
+        )
+
+    def _sync(self, items, options):
+        importer = QuizSyncImporter(batch_size=self._batch_size(options),
+                                    delete_missing=options['delete_missing'])
+        self._feed(importer, items, options['progress_every'])
+        importer.finish()
+
+        self._report(importer)
+        self.stdout.write(
+            f"Новых вопросов: {importer.questions_created}, обновлено: {importer.questions_updated}, "
+            f"без изменений: {importer.questions_unchanged}, удалено: {importer.questions_deleted}"
+        )
+
+    def _batch_size(self, options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size должен быть положительным")
+        return options['batch_size']
+
+    def _feed(self, importer, items, progress_every):
+        next_report = progress_every
+        for item in items:
+            importer.add(item)
+            if progress_every and importer.items_processed >= next_report:
+                self._report(importer)
+                next_report += progress_every
+
+    def _report(self, importer):
+        self.stdout.write(
+            f"Обработано {importer.items_processed} вопросов "
+            f"за {importer.elapsed:.1f} с ({importer.rate:.0f} вопр./с)"
+        )
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from quiz.leaderboards import compute_category_scores, leaderboards
+from quiz.models import CategoryScore
+
+# Сколько расхождений выводить при --check
+MAX_REPORTED = 20
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds per-category leaderboard scores from recorded answers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Только сравнить сохраненные результаты с полным пересчетом')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Размер пачки при записи')
+
+    def handle(self, *args, **options):
+        expected = compute_category_scores()
+
+        if options['check']:
+            stored = {
+                (user_id, category_id): (answered, correct)
+                for user_id, category_id, answered, correct in CategoryScore.objects.values_list(
+                    'user_id', 'category_id', 'answered', 'correct'
+                ).iterator(chunk_size=10000)
+            }
+            mismatches = [
+                (pair, stored.get(pair), expected.get(pair))
+                for pair in sorted(set(stored) | set(expected))
+                if stored.get(pair) != expected.get(pair)
+            ]
+            for (user_id, category_id), actual, wanted in mismatches[:MAX_REPORTED]:
+                self.stdout.write(
+                    f"Пользователь {user_id}, категория {category_id}: сохранено {actual}, по ответам {wanted}"
+                )
+            if mismatches:
+                raise CommandError(f"Расхождений: {len(mismatches)}")
+            self.stdout.write(self.style.SUCCESS(f"Расхождений нет, результатов: {len(stored)}"))
+            return
+
+        with transaction.atomic():
+            CategoryScore.objects.all().delete()
+            CategoryScore.objects.bulk_create([
+                CategoryScore(user_id=user_id, category_id=category_id, answered=answered, correct=correct)
+                for (user_id, category_id), (answered, correct) in expected.items()
+            ], batch_size=options['batch_size'])
+        leaderboards.reset()
+
+        self.stdout.write(self.style.SUCCESS(f"Пересчитано результатов: {len(expected)}"))
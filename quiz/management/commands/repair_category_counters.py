@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from quiz.counters import compute_category_counters
+from quiz.models import QuestionCategory
+
+# Сколько расхождений выводить
+MAX_REPORTED = 20
+
+
+class Command(BaseCommand):
+    help = 'Recomputes denormalized question counters of categories from the questions table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Только сравнить сохраненные счетчики с полным пересчетом')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Размер пачки при записи')
+
+    def handle(self, *args, **options):
+        fields = QuestionCategory.COUNTER_FIELDS
+        with transaction.atomic():
+            # Блокировка категорий задерживает изменения счетчиков из других процессов до конца пересчета
+            rows = QuestionCategory.objects.select_for_update().order_by('id').values_list('id', *fields)
+            stored = {row[0]: dict(zip(fields, row[1:])) for row in rows}
+            expected = compute_category_counters()
+            mismatches = [
+                category_id for category_id in sorted(stored)
+                if category_id in expected and stored[category_id] != expected[category_id]
+            ]
+            for category_id in mismatches[:MAX_REPORTED]:
+                self.stdout.write(
+                    f"Категория {category_id}: сохранено {stored[category_id]}, по вопросам {expected[category_id]}"
+                )
+
+            if options['check']:
+                if mismatches:
+                    raise CommandError(f"Расхождений: {len(mismatches)}")
+                self.stdout.write(self.style.SUCCESS(f"Расхождений нет, категорий: {len(stored)}"))
+                return
+
+            QuestionCategory.objects.bulk_update(
+                [QuestionCategory(id=category_id, **expected[category_id]) for category_id in mismatches],
+                fields, batch_size=options['batch_size'],
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Исправлено категорий: {len(mismatches)} из {len(stored)}"))
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.12 on 2026-10-18 17:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('quiz', '0003_quiz_attempts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answered', models.PositiveIntegerField(default=0)),
+                ('correct', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='quiz.questioncategory')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_scores', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Результат по категории',
+                'verbose_name_plural': 'Результаты по категориям',
+                'indexes': [models.Index(fields=['category', '-correct'], name='quiz_category_score_rank')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='categoryscore',
+            constraint=models.UniqueConstraint(fields=('user', 'category'), name='quiz_category_score_user_category'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+import hashlib
+import json
+
+from django.db import migrations
+
+# Подписи, которые загрузчик раньше записывал в поле как есть
+LABELS = {
+    'легкий': 'easy',
+    'лёгкий': 'easy',
+    'средний': 'medium',
+    'сложный': 'hard',
+}
+
+
+def normalize_difficulty(apps, schema_editor):
+    Question = apps.get_model('quiz', 'Question')
+    Answer = apps.get_model('quiz', 'Answer')
+    questions = Question.objects.exclude(difficulty__in=['easy', 'medium', 'hard']).select_related('category')
+    for question in questions.iterator(chunk_size=1000):
+        difficulty = LABELS.get(question.difficulty.strip().lower())
+        if difficulty is None:
+            continue
+        question.difficulty = difficulty
+        if question.import_key:
+            # Хэш содержимого включает сложность: пересчитываем, чтобы --sync не считал вопрос измененным
+            answers = [
+                [text, is_correct] for text, is_correct in
+                Answer.objects.filter(question_id=question.pk).order_by('id').values_list('text', 'is_correct')
+            ]
+            question.content_hash = hashlib.sha256(json.dumps(
+                [question.category.name, question.text, difficulty, answers], ensure_ascii=False
+            ).encode('utf-8')).hexdigest()
+        question.save(update_fields=['difficulty', 'content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0005_question_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_difficulty, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.12 on 2026-10-18 17:42
+
+from django.db import migrations, models
+from django.db.models import Count
+
+DIFFICULTY_COUNTERS = {
+    'easy': 'easy_count',
+    'medium': 'medium_count',
+    'hard': 'hard_count',
+}
+
+
+def fill_counters(apps, schema_editor):
+    QuestionCategory = apps.get_model('quiz', 'QuestionCategory')
+    Question = apps.get_model('quiz', 'Question')
+    counters = {}
+    rows = Question.objects.values('category_id', 'difficulty').annotate(total=Count('id')).values_list(
+        'category_id', 'difficulty', 'total'
+    ).order_by()
+    for category_id, difficulty, total in rows:
+        values = counters.setdefault(category_id, {'question_count': 0})
+        values['question_count'] += total
+        if difficulty in DIFFICULTY_COUNTERS:
+            values[DIFFICULTY_COUNTERS[difficulty]] = total
+    for category_id, values in counters.items():
+        QuestionCategory.objects.filter(pk=category_id).update(**values)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0006_normalize_difficulty'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questioncategory',
+            name='easy_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='questioncategory',
+            name='hard_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='questioncategory',
+            name='medium_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='questioncategory',
+            name='question_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
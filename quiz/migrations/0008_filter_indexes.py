@@ -0,0 +1,25 @@
+# Generated by Django 4.2.12 on 2026-10-18 17:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0007_category_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(fields=['question', 'is_correct'], name='quiz_answer_question_correct'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['category', 'difficulty', 'id'], name='quiz_question_category_diff'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['difficulty', 'id'], name='quiz_question_difficulty'),
+        ),
+    ]
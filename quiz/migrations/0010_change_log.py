@@ -0,0 +1,75 @@
+# Generated by Django 4.2.12 on 2026-10-18 17:57
+
+from django.db import migrations, models
+import django.utils.timezone
+
+SEED_CHUNK_SIZE = 2000
+
+
+def seed_change_log(apps, schema_editor):
+    # Клиент с пустым токеном получает весь банк из журнала: заносим в него существующие объекты
+    ChangeLogEntry = apps.get_model('quiz', 'ChangeLogEntry')
+    for kind, model_name in (('category', 'QuestionCategory'), ('question', 'Question')):
+        model = apps.get_model('quiz', model_name)
+        last_id = 0
+        while True:
+            ids = list(
+                model.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:SEED_CHUNK_SIZE]
+            )
+            if not ids:
+                break
+            ChangeLogEntry.objects.bulk_create([ChangeLogEntry(kind=kind, object_id=object_id) for object_id in ids])
+            last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0009_catalog_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogCompaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('compacted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('removed', models.PositiveIntegerField(default=0)),
+                ('tombstones_before', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Сжатие журнала изменений',
+                'verbose_name_plural': 'Сжатия журнала изменений',
+            },
+        ),
+        migrations.AddField(
+            model_name='answer',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='questioncategory',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('category', 'Категория'), ('question', 'Вопрос')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Запись журнала изменений',
+                'verbose_name_plural': 'Журнал изменений',
+                'indexes': [models.Index(fields=['kind', 'object_id', 'id'], name='quiz_changelog_object')],
+            },
+        ),
+        migrations.RunPython(seed_change_log, migrations.RunPython.noop),
+    ]
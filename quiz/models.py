@@ -1,38 +1,104 @@
-from django.db import models
+import uuid
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+
+DIFFICULTY_CHOICES = [
+    ('easy', 'Легкий'),
+    ('medium', 'Средний'),
+    ('hard', 'Сложный'),
+]
 
 
 class QuestionCategory(models.Model):
+    # Поля со счетчиками вопросов категории
+    COUNTER_FIELDS = ('question_count', 'easy_count', 'medium_count', 'hard_count')
+
     name = models.CharField(max_length=100)
+    # Денормализованные счетчики: меняются только через F() в quiz.counters,
+    # пересчитываются командой repair_category_counters
+    question_count = models.IntegerField(default=0, editable=False)
+    easy_count = models.IntegerField(default=0, editable=False)
+    medium_count = models.IntegerField(default=0, editable=False)
+    hard_count = models.IntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Обычное сохранение не должно затирать счетчики значениями, прочитанными раньше
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Категория вопроса"
         verbose_name_plural = "Категории вопросов"
 
 
+class QuestionQuerySet(models.QuerySet):
+    def delete(self):
+        # Обработчик post_delete из quiz.counters складывает сюда удаленные вопросы,
+        # и счетчики категорий меняются одним UPDATE на категорию, а не на каждый вопрос
+        from .counters import adjust_category_counters
+
+        with transaction.atomic(using=self.db):
+            self._deleted_counter_keys = []
+            result = super().delete()
+            adjust_category_counters(
+                (category_id, difficulty, -1) for category_id, difficulty in self._deleted_counter_keys
+            )
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
 class Question(models.Model):
     category = models.ForeignKey(QuestionCategory, on_delete=models.CASCADE, related_name='questions')
     text = models.TextField()
-    difficulty = models.CharField(max_length=20, choices=[
-        ('easy', 'Легкий'),
-        ('medium', 'Средний'),
-        ('hard', 'Сложный'),
-    ])
+    difficulty = models.CharField(max_length=20, choices=DIFFICULTY_CHOICES)
+    # Отпечатки для инкрементальной загрузки: ключ — категория и текст, хэш — все содержимое
+    import_key = models.CharField(max_length=64, blank=True, null=True, db_index=True, editable=False)
+    content_hash = models.CharField(max_length=64, blank=True, null=True, editable=False)
+    # bulk_update не заполняет auto_now: пакетные пути передают время сами
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = QuestionQuerySet.as_manager()
 
     def __str__(self):
         return self.text
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Категория и сложность на момент загрузки: по ним quiz.counters узнает при save(),
+        # какие счетчики поменять, без лишнего запроса
+        if 'category_id' in instance.__dict__ and 'difficulty' in instance.__dict__:
+            instance._loaded_counter_key = (instance.category_id, instance.difficulty)
+        return instance
+
     class Meta:
         verbose_name = "Вопрос"
         verbose_name_plural = "Вопросы"
+        # Под фильтры списка вопросов (quiz.filters): id в конце отдает страницу в порядке ключа без сортировки
+        indexes = [
+            models.Index(fields=['category', 'difficulty', 'id'], name='quiz_question_category_diff'),
+            models.Index(fields=['difficulty', 'id'], name='quiz_question_difficulty'),
+        ]
 
 
 class Answer(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='answers')
     text = models.CharField(max_length=200)
     is_correct = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.text
@@ -40,3 +106,135 @@ class Answer(models.Model):
     class Meta:
         verbose_name = "Ответ"
         verbose_name_plural = "Ответы"
+        indexes = [
+            models.Index(fields=['question', 'is_correct'], name='quiz_answer_question_correct'),
+        ]
+
+
+class CatalogVersion(models.Model):
+    # Версии каталога викторины для ETag (quiz.versions). key — 'catalog', 'categories'
+    # или 'category:<id>'; version — случайная строка, новая при каждом изменении
+    key = models.CharField(max_length=50, primary_key=True)
+    version = models.CharField(max_length=32)
+
+    def __str__(self):
+        return f"{self.key}: {self.version}"
+
+    class Meta:
+        verbose_name = "Версия каталога"
+        verbose_name_plural = "Версии каталога"
+
+
+class ChangeLogEntry(models.Model):
+    # Журнал изменений для синхронизации клиентов (quiz.changes): id записи — токен
+    # синхронизации. Вопрос в журнале означает и изменение его ответов; удален объект
+    # или нет, видно по базе при выдаче
+    KIND_CHOICES = [
+        ('category', 'Категория'),
+        ('question', 'Вопрос'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.pk}: {self.kind} {self.object_id}"
+
+    class Meta:
+        verbose_name = "Запись журнала изменений"
+        verbose_name_plural = "Журнал изменений"
+        indexes = [
+            models.Index(fields=['kind', 'object_id', 'id'], name='quiz_changelog_object'),
+        ]
+
+
+class ChangeLogCompaction(models.Model):
+    # Сжатие журнала командой compact_change_log. Клиентам с токеном меньше
+    # tombstones_before нужна полная синхронизация: часть удалений из журнала убрана
+    compacted_at = models.DateTimeField(default=timezone.now)
+    removed = models.PositiveIntegerField(default=0)
+    tombstones_before = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.compacted_at}: {self.removed}"
+
+    class Meta:
+        verbose_name = "Сжатие журнала изменений"
+        verbose_name_plural = "Сжатия журнала изменений"
+
+
+class QuestionStats(models.Model):
+    # Заполняется командой compute_question_stats по записанным ответам пользователей
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    attempts = models.PositiveIntegerField(default=0)
+    correct_rate = models.FloatField()
+    # Точечно-бисериальная корреляция правильности ответа с общим результатом пользователя
+    discrimination = models.FloatField(blank=True, null=True)
+    suggested_difficulty = models.CharField(max_length=20, choices=DIFFICULTY_CHOICES, blank=True, null=True)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.question_id}: {self.correct_rate:.2f}"
+
+    class Meta:
+        verbose_name = "Статистика вопроса"
+        verbose_name_plural = "Статистика вопросов"
+
+
+class QuizAttempt(models.Model):
+    # id задается при проверке ответов, до записи в базу: строки пишутся отложенно пачками
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='quiz_attempts')
+    total = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.user} — {self.correct}/{self.total}"
+
+    class Meta:
+        verbose_name = "Попытка"
+        verbose_name_plural = "Попытки"
+
+
+class AttemptAnswer(models.Model):
+    attempt = models.ForeignKey(QuizAttempt, on_delete=models.CASCADE, related_name='answers', blank=True, null=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='attempt_answers')
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='attempt_answers')
+    answer = models.ForeignKey(Answer, on_delete=models.SET_NULL, related_name='attempt_answers',
+                               blank=True, null=True)
+    is_correct = models.BooleanField()
+    answered_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.user} — {self.question_id}: {self.is_correct}"
+
+    class Meta:
+        verbose_name = "Ответ пользователя"
+        verbose_name_plural = "Ответы пользователей"
+        indexes = [
+            models.Index(fields=['user', 'question'], name='quiz_attempt_user_question'),
+        ]
+
+
+class CategoryScore(models.Model):
+    # Агрегат для таблиц лидеров: обновляется при записи ответов, а не пересчитывается по запросу
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='category_scores')
+    category = models.ForeignKey(QuestionCategory, on_delete=models.CASCADE, related_name='scores')
+    answered = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user} — {self.category}: {self.correct}"
+
+    class Meta:
+        verbose_name = "Результат по категории"
+        verbose_name_plural = "Результаты по категориям"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'category'], name='quiz_category_score_user_category'),
+        ]
+        indexes = [
+            models.Index(fields=['category', '-correct'], name='quiz_category_score_rank'),
+        ]
@@ -1,7 +1,46 @@
+from django.core.paginator import InvalidPage
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 
+from config import pagination
+
 
 class QuizResultsSetPagination(PageNumberPagination):
     page_size = 5
     page_size_query_param = 'page_size'
     max_page_size = 100
+
+
+class AsyncQuizResultsSetPagination(QuizResultsSetPagination):
+    """
+    Та же пагинация для асинхронных представлений: COUNT и страница читаются
+    асинхронным ORM, формат ответа не меняется.
+    """
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # count у Paginator — cached_property: задаем заранее, иначе он выполнит синхронный запрос
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        self.page.object_list = [item async for item in self.page.object_list]
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
+
+
+class QuizCursorPagination(pagination.KeysetCursorPagination):
+    page_size = 5
+
+
+class CursorPaginationOptInMixin(pagination.CursorPaginationOptInMixin):
+    cursor_pagination_class = QuizCursorPagination
@@ -0,0 +1,113 @@
+import random
+import threading
+import time
+from array import array
+from bisect import bisect_right
+
+from django.conf import settings
+from django.dispatch import receiver
+
+from config.pagination import keyset_pages
+
+from .models import Question, Answer
+from .signals import questions_changed
+
+
+class QuestionPoolIndex:
+    """
+    Процессный индекс id вопросов по парам (категория, сложность) для выборки
+    случайных тестов без ORDER BY NEWID(). Индекс перестраивается одним проходом
+    по таблице после изменения вопросов и не реже раза в QUIZ_SAMPLER_REFRESH_SECONDS;
+    пока идет перестройка, остальные потоки пользуются старой версией.
+    """
+
+    def __init__(self, refresh_seconds=None):
+        self._refresh_seconds = refresh_seconds
+        self._pools = None
+        self._keys = []
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def refresh_seconds(self):
+        if self._refresh_seconds is not None:
+            return self._refresh_seconds
+        return getattr(settings, 'QUIZ_SAMPLER_REFRESH_SECONDS', 300)
+
+    def refresh(self):
+        pools = {}
+        rows = Question.objects.values_list('id', 'category_id', 'difficulty')
+        for page in keyset_pages(rows, 10000):
+            for question_id, category_id, difficulty in page:
+                pool = pools.get((category_id, difficulty))
+                if pool is None:
+                    pool = pools[(category_id, difficulty)] = array('q')
+                pool.append(question_id)
+        # Порядок ключей фиксирован, чтобы одинаковый seed давал одинаковый тест
+        self._keys = sorted(pools, key=lambda key: (key[0], key[1]))
+        self._pools = pools
+        self._built_at = time.monotonic()
+
+    def invalidate(self):
+        self._built_at = 0.0
+
+    def pools(self, category_id=None, difficulty=None):
+        self._refresh_if_stale()
+        pools, keys = self._pools, self._keys
+        return [
+            pools[key] for key in keys
+            if (category_id is None or key[0] == category_id)
+            and (difficulty is None or key[1] == difficulty)
+        ]
+
+    def sample(self, count, category_id=None, difficulty=None, seed=None, exclude=()):
+        """
+        Возвращает до count случайных id вопросов, не входящих в exclude.
+        Работает за O(count + len(exclude)): индексы выбираются из виртуальной
+        конкатенации подходящих пулов без их копирования.
+        """
+        pools = self.pools(category_id, difficulty)
+        offsets = []
+        total = 0
+        for pool in pools:
+            offsets.append(total)
+            total += len(pool)
+        if not total or count <= 0:
+            return []
+
+        exclude = set(exclude)
+        rng = random.Random(seed)
+        draw = min(total, count + len(exclude))
+        result = []
+        for index in rng.sample(range(total), draw):
+            pool_index = bisect_right(offsets, index) - 1
+            question_id = pools[pool_index][index - offsets[pool_index]]
+            if question_id not in exclude:
+                result.append(question_id)
+                if len(result) == count:
+                    break
+        return result
+
+    def _refresh_if_stale(self):
+        if self._pools is not None and time.monotonic() - self._built_at < self.refresh_seconds:
+            return
+        if self._pools is None:
+            with self._lock:
+                if self._pools is None:
+                    self.refresh()
+            return
+        if self._lock.acquire(blocking=False):
+            try:
+                self.refresh()
+            finally:
+                self._lock.release()
+
+
+question_pools = QuestionPoolIndex()
+
+
+@receiver(questions_changed)
+def invalidate_question_pools(sender, **kwargs):
+    # Ответы не влияют на пулы: они зависят только от категории и сложности вопросов
+    if sender is not Answer:
+        question_pools.invalidate()
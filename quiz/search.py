@@ -0,0 +1,348 @@
+import heapq
+import math
+import os
+import pickle
+import re
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.dispatch import receiver
+
+from config.pagination import keyset_pages
+
+from .models import Question, Answer
+from .signals import questions_changed
+
+TOKEN_RE = re.compile(r'\w+')
+
+STOP_WORDS = frozenset("""
+а без более бы был была были было быть в вам вас весь во вот все всего всех вы где да даже для до его ее
+если есть еще же за здесь и из или им их к как какая какие каким какое какой когда кто ли либо мне может
+мы на над надо наш не него нее нет ни них но ну о об однако он она они оно от очень по под при с со так
+также такой там те тем то того тоже той только том ты у уже хотя чего чей чем что чтобы чье чья эта эти
+это я
+""".split())
+
+# Минимальная доля общих триграмм, при которой слово считается опечаткой термина из индекса
+FUZZY_THRESHOLD = 0.3
+FUZZY_CANDIDATES = 3
+MAX_RESULTS = 1000
+# Ограничение SQL Server — не больше 2100 параметров в запросе
+LOAD_CHUNK_SIZE = 1000
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+VOWELS = 'аеиоуыэюя'
+
+
+def _endings(*groups):
+    """
+    Собирает окончания в список (окончание, нужна ли перед ним «а»/«я»),
+    длинные — первыми.
+    """
+    result = []
+    for words, after_a in groups:
+        result.extend((word, after_a) for word in words.split())
+    return sorted(result, key=lambda item: len(item[0]), reverse=True)
+
+
+PERFECTIVE_GERUND = _endings(('в вши вшись', True), ('ив ивши ившись ыв ывши ывшись', False))
+ADJECTIVE = _endings((
+    'ее ие ые ое ими ыми ей ий ый ой ем им ым ом его ого ему ому их ых ую юю ая яя ою ею', False
+))
+PARTICIPLE = _endings(('ем нн вш ющ щ', True), ('ивш ывш ующ', False))
+REFLEXIVE = _endings(('ся сь', False))
+VERB = _endings(
+    ('ла на ете йте ли й л ем н ло но ет ют ны ть ешь нно', True),
+    ('ила ыла ена ейте уйте ите или ыли ей уй ил ыл им ым ен ило ыло ено ят ует уют ит ыт ены ить ыть ишь ую ю',
+     False),
+)
+NOUN = _endings((
+    'а ев ов ие ье е иями ями ами еи ии и ией ей ой ий й иям ям ием ем ам ом о у ах иях ях ы ь ию ью ю ия ья я',
+    False,
+))
+SUPERLATIVE = _endings(('ейш ейше', False))
+DERIVATIONAL = _endings(('ост ость', False))
+
+
+def _strip_ending(word, endings):
+    for ending, after_a in endings:
+        if word.endswith(ending):
+            stem = word[:-len(ending)]
+            if after_a and not stem.endswith(('а', 'я')):
+                continue
+            return stem
+    return None
+
+
+def _region_after_vowel_consonant(word, start=0):
+    for i in range(start + 1, len(word)):
+        if word[i - 1] in VOWELS and word[i] not in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def stem(word):
+    """
+    Русский стеммер по алгоритму Snowball (Портер). Слова без кириллицы не меняются.
+    """
+    word = word.lower().replace('ё', 'е')
+    rv_start = next((i + 1 for i, char in enumerate(word) if char in VOWELS), len(word))
+    if rv_start >= len(word):
+        return word
+    prefix, rv = word[:rv_start], word[rv_start:]
+    r2_start = _region_after_vowel_consonant(word, _region_after_vowel_consonant(word)) - rv_start
+
+    # Шаг 1
+    stripped = _strip_ending(rv, PERFECTIVE_GERUND)
+    if stripped is not None:
+        rv = stripped
+    else:
+        rv = _strip_ending(rv, REFLEXIVE) or rv
+        stripped = _strip_ending(rv, ADJECTIVE)
+        if stripped is not None:
+            rv = _strip_ending(stripped, PARTICIPLE) or stripped
+        else:
+            stripped = _strip_ending(rv, VERB)
+            if stripped is None:
+                stripped = _strip_ending(rv, NOUN)
+            if stripped is not None:
+                rv = stripped
+
+    # Шаг 2
+    if rv.endswith('и'):
+        rv = rv[:-1]
+
+    # Шаг 3: словообразовательные окончания удаляются только целиком внутри R2
+    stripped = _strip_ending(rv, DERIVATIONAL)
+    if stripped is not None and len(stripped) >= max(r2_start, 0):
+        rv = stripped
+
+    # Шаг 4
+    if rv.endswith('нн'):
+        rv = rv[:-1]
+    else:
+        stripped = _strip_ending(rv, SUPERLATIVE)
+        if stripped is not None:
+            rv = stripped[:-1] if stripped.endswith('нн') else stripped
+        elif rv.endswith('ь'):
+            rv = rv[:-1]
+
+    return prefix + rv
+
+
+def tokenize(text):
+    """
+    Разбивает текст на основы слов без стоп-слов.
+    """
+    return [
+        stem(token) for token in TOKEN_RE.findall(text.lower().replace('ё', 'е'))
+        if token not in STOP_WORDS
+    ]
+
+
+def trigrams(term):
+    padded = f'${term}$'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """
+    Инвертированный индекс вопросов: основа слова -> {id вопроса: частота}.
+    Документ вопроса — его текст вместе с текстами ответов. Ранжирование —
+    BM25; основы, которых нет в индексе, сопоставляются похожим по триграммам
+    (для запросов с опечатками).
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._doc_terms = {}
+        self._doc_lengths = {}
+        self._total_length = 0
+        self._trigrams = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def add_document(self, doc_id, text):
+        terms = Counter(tokenize(text))
+        with self._lock:
+            self._remove(doc_id)
+            if not terms:
+                return
+            self._doc_terms[doc_id] = terms
+            length = sum(terms.values())
+            self._doc_lengths[doc_id] = length
+            self._total_length += length
+            for term, tf in terms.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    for trigram in trigrams(term):
+                        self._trigrams.setdefault(trigram, set()).add(term)
+                postings[doc_id] = tf
+
+    def remove_document(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def search(self, query, limit=MAX_RESULTS):
+        """
+        Возвращает до limit пар (id вопроса, оценка) по убыванию оценки.
+        """
+        with self._lock:
+            if not self._doc_terms:
+                return []
+            doc_count = len(self._doc_terms)
+            avg_length = self._total_length / doc_count
+            scores = {}
+            for term in set(tokenize(query)):
+                for matched, weight in self._expand(term):
+                    postings = self._postings[matched]
+                    idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for doc_id, tf in postings.items():
+                        norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lengths[doc_id] / avg_length)
+                        score = weight * idf * tf * (BM25_K1 + 1) / (tf + norm)
+                        scores[doc_id] = scores.get(doc_id, 0.0) + score
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(doc_id, round(score, 4)) for doc_id, score in best]
+
+    def save(self, path):
+        with self._lock:
+            state = (self._postings, self._doc_terms, self._doc_lengths, self._total_length, self._trigrams)
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        index = cls()
+        with open(path, 'rb') as f:
+            (index._postings, index._doc_terms, index._doc_lengths,
+             index._total_length, index._trigrams) = pickle.load(f)
+        return index
+
+    @classmethod
+    def build(cls, chunk_size=10000):
+        """
+        Строит индекс по базе страницами вопросов по chunk_size (keyset по id);
+        ответы страницы читаются одним запросом по диапазону id вопросов.
+        """
+        index = cls()
+        questions = Question.objects.values_list('id', 'text')
+        for page in keyset_pages(questions, chunk_size):
+            answers = {}
+            rows = Answer.objects.filter(question_id__gte=page[0][0], question_id__lte=page[-1][0]).order_by(
+                'question_id', 'id'
+            ).values_list('question_id', 'text')
+            for question_id, text in rows:
+                answers.setdefault(question_id, []).append(text)
+            for question_id, text in page:
+                index.add_document(question_id, '\n'.join([text, *answers.get(question_id, ())]))
+        return index
+
+    def _remove(self, doc_id):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                for trigram in trigrams(term):
+                    bucket = self._trigrams.get(trigram)
+                    if bucket is not None:
+                        bucket.discard(term)
+                        if not bucket:
+                            del self._trigrams[trigram]
+
+    def _expand(self, term):
+        if term in self._postings:
+            return [(term, 1.0)]
+        query_trigrams = trigrams(term)
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(self._trigrams.get(trigram, ()))
+        candidates = []
+        for candidate, common in shared.items():
+            similarity = common / (len(query_trigrams) + len(trigrams(candidate)) - common)
+            if similarity >= FUZZY_THRESHOLD:
+                candidates.append((candidate, similarity))
+        return heapq.nlargest(FUZZY_CANDIDATES, candidates, key=lambda item: (item[1], item[0]))
+
+
+class QuestionSearch:
+    """
+    Индекс поиска процесса. При первом обращении загружается из файла,
+    собранного командой build_search_index (или строится по базе, если файла нет),
+    и перечитывается, когда файл обновился. Изменения вопросов в этом процессе
+    применяются к индексу сразу через сигналы.
+    """
+
+    def __init__(self):
+        self._index = None
+        self._loaded_mtime = None
+        self._lock = threading.Lock()
+
+    @property
+    def path(self):
+        return getattr(settings, 'QUIZ_SEARCH_INDEX_PATH', None)
+
+    @property
+    def index(self):
+        mtime = self._file_mtime()
+        if self._index is None or (mtime is not None and mtime != self._loaded_mtime):
+            with self._lock:
+                if self._index is None or (mtime is not None and mtime != self._loaded_mtime):
+                    self._index = SearchIndex.load(self.path) if mtime is not None else SearchIndex.build()
+                    self._loaded_mtime = mtime
+        return self._index
+
+    def search(self, query, limit=MAX_RESULTS):
+        return self.index.search(query, limit)
+
+    def reindex(self, question_ids):
+        if self._index is None:
+            # Индекс еще не загружен — при загрузке изменения и так попадут в него
+            return
+        question_ids = list(question_ids)
+        documents = {}
+        for i in range(0, len(question_ids), LOAD_CHUNK_SIZE):
+            rows = Question.objects.filter(id__in=question_ids[i:i + LOAD_CHUNK_SIZE]).order_by(
+                'id', 'answers__id'
+            ).values_list('id', 'text', 'answers__text')
+            for question_id, text, answer_text in rows:
+                parts = documents.setdefault(question_id, [text])
+                if answer_text is not None:
+                    parts.append(answer_text)
+        for question_id in question_ids:
+            if question_id in documents:
+                self._index.add_document(question_id, '\n'.join(documents[question_id]))
+            else:
+                self._index.remove_document(question_id)
+
+    def reset(self):
+        with self._lock:
+            self._index = None
+            self._loaded_mtime = None
+
+    def _file_mtime(self):
+        if not self.path:
+            return None
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+
+question_search = QuestionSearch()
+
+
+@receiver(questions_changed)
+def reindex_questions(sender, question_ids, **kwargs):
+    question_search.reindex(question_ids)
@@ -1,20 +1,94 @@
 from rest_framework import serializers
-from .models import QuestionCategory, Question, Answer
+from .models import DIFFICULTY_CHOICES, QuestionCategory, Question, Answer, QuestionStats
 
 
 class QuestionCategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = QuestionCategory
-        fields = '__all__'
+        # updated_at отдает эндпоинт синхронизации (quiz.changes)
+        exclude = ('updated_at',)
+
+
+class QuestionStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = QuestionStats
+        fields = ('attempts', 'correct_rate', 'discrimination', 'suggested_difficulty', 'computed_at')
 
 
 class QuestionSerializer(serializers.ModelSerializer):
+    stats = QuestionStatsSerializer(read_only=True)
+
     class Meta:
         model = Question
-        fields = '__all__'
+        exclude = ('import_key', 'content_hash', 'updated_at')
 
 
 class AnswerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Answer
-        fields = '__all__'
+        exclude = ('updated_at',)
+
+
+class NestedAnswerSerializer(serializers.ModelSerializer):
+    """
+    Ответ внутри вопроса. Поле is_correct видно только сотрудникам.
+    """
+
+    class Meta:
+        model = Answer
+        fields = ('id', 'text', 'is_correct')
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if not (request and request.user.is_staff):
+            fields.pop('is_correct')
+        return fields
+
+
+class QuestionWithAnswersSerializer(serializers.ModelSerializer):
+    """
+    Вопрос вместе с категорией и ответами — для чтения одной страницей без N+1.
+    """
+    category_name = serializers.CharField(source='category.name', read_only=True)
+    answers = NestedAnswerSerializer(many=True, read_only=True)
+    stats = QuestionStatsSerializer(read_only=True)
+
+    class Meta:
+        model = Question
+        fields = ('id', 'category', 'category_name', 'text', 'difficulty', 'stats', 'answers')
+
+
+class BulkAnswerSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False, min_value=1)
+    text = serializers.CharField(max_length=200)
+    is_correct = serializers.BooleanField(default=False)
+
+
+class BulkQuestionSerializer(serializers.Serializer):
+    """
+    Элемент пакетной записи вопросов: с id — обновление, без id — создание.
+    Проверки здесь не обращаются к базе; существование категорий, вопросов
+    и ответов проверяется для всего пакета сразу (см. quiz.authoring).
+    """
+    id = serializers.IntegerField(required=False, min_value=1)
+    category = serializers.IntegerField(min_value=1)
+    text = serializers.CharField()
+    difficulty = serializers.ChoiceField(choices=DIFFICULTY_CHOICES)
+    # При обновлении answers — полный новый список ответов; без него ответы не меняются
+    answers = BulkAnswerSerializer(many=True, required=False)
+
+    def validate(self, attrs):
+        answers = attrs.get('answers')
+        if answers is None:
+            if 'id' not in attrs:
+                raise serializers.ValidationError({'answers': "Для нового вопроса нужны ответы"})
+            return attrs
+        if not any(answer['is_correct'] for answer in answers):
+            raise serializers.ValidationError({'answers': "Нужен хотя бы один правильный ответ"})
+        answer_ids = [answer['id'] for answer in answers if 'id' in answer]
+        if answer_ids and 'id' not in attrs:
+            raise serializers.ValidationError({'answers': "У ответов нового вопроса не может быть id"})
+        if len(answer_ids) != len(set(answer_ids)):
+            raise serializers.ValidationError({'answers': "Повторяющиеся id ответов"})
+        return attrs
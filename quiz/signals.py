@@ -0,0 +1,28 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from .models import Question, Answer
+
+# Отправляется, когда вопрос или его ответы изменились: question_ids — id затронутых вопросов,
+# category_ids — категории, из которых вопросы ушли (если известны).
+# Массовые операции (bulk_create/bulk_update) модельных сигналов не вызывают,
+# поэтому отправляют его сами.
+questions_changed = Signal()
+
+
+def notify_questions_changed(question_ids, sender=Question, category_ids=()):
+    question_ids = list(question_ids)
+    if question_ids:
+        questions_changed.send(sender=sender, question_ids=question_ids, category_ids=list(category_ids))
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def question_changed(sender, instance, **kwargs):
+    notify_questions_changed([instance.pk])
+
+
+@receiver(post_save, sender=Answer)
+@receiver(post_delete, sender=Answer)
+def answer_changed(sender, instance, **kwargs):
+    notify_questions_changed([instance.question_id], sender=Answer)
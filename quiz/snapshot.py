@@ -0,0 +1,349 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from config.pagination import keyset_pages
+
+from .models import QuestionCategory, Question, Answer, QuestionStats
+from .serializers import QuestionStatsSerializer
+from .signals import questions_changed
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'QUIZSNAP'
+# Версия формата файла: снимок другой версии не читается, запросы идут в базу
+FORMAT_VERSION = 2
+HEADER = struct.Struct('<8sIQI')  # сигнатура, версия формата, id сборки, длина манифеста
+POINTER_NAME = 'CURRENT'
+BUILD_CHUNK_SIZE = 2000
+
+# Колонки снимка: имя -> код типа array. Строки хранятся в общей таблице
+# и задаются парой колонок *_off (смещение) и *_len (длина в байтах UTF-8)
+COLUMNS = {
+    'cat_id': 'q', 'cat_name_off': 'Q', 'cat_name_len': 'I',
+    # Счетчики вопросов категории — в порядке QuestionCategory.COUNTER_FIELDS
+    'cat_question_count': 'q', 'cat_easy_count': 'q', 'cat_medium_count': 'q', 'cat_hard_count': 'q',
+    'q_id': 'q', 'q_category': 'q',
+    'q_text_off': 'Q', 'q_text_len': 'I',
+    'q_difficulty_off': 'Q', 'q_difficulty_len': 'I',
+    'q_stats_off': 'Q', 'q_stats_len': 'I',  # статистика в JSON, длина 0 — статистики нет
+    'q_answers': 'Q',  # ответы вопроса i — с q_answers[i] по q_answers[i + 1]
+    'a_id': 'q', 'a_correct': 'B', 'a_text_off': 'Q', 'a_text_len': 'I',
+}
+
+
+class SnapshotWriter:
+    """
+    Собирает колонки и таблицу строк и записывает их в файл снимка.
+    Короткие повторяющиеся строки (сложность, названия категорий) хранятся один раз.
+    """
+
+    def __init__(self):
+        self.columns = {name: array(typecode) for name, typecode in COLUMNS.items()}
+        self.strings = bytearray()
+        self._interned = {}
+
+    def add_string(self, prefix, value, intern=False):
+        if intern and value in self._interned:
+            offset, length = self._interned[value]
+        else:
+            data = value.encode('utf-8')
+            offset, length = len(self.strings), len(data)
+            self.strings += data
+            if intern:
+                self._interned[value] = (offset, length)
+        self.columns[f'{prefix}_off'].append(offset)
+        self.columns[f'{prefix}_len'].append(length)
+
+    def write(self, path, build_id):
+        layout = {}
+        position = 0
+        for name, column in self.columns.items():
+            layout[name] = [position, len(column)]
+            position = _align(position + len(column) * column.itemsize)
+        layout['strings'] = [position, len(self.strings)]
+        manifest = json.dumps(layout).encode('utf-8')
+
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, build_id, len(manifest)))
+            f.write(manifest)
+            f.write(b'\0' * (_align(f.tell()) - f.tell()))
+            data_start = f.tell()
+            for name, column in self.columns.items():
+                f.write(b'\0' * (data_start + layout[name][0] - f.tell()))
+                column.tofile(f)
+            f.write(b'\0' * (data_start + layout['strings'][0] - f.tell()))
+            f.write(self.strings)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _align(position, size=8):
+    return (position + size - 1) // size * size
+
+
+def build_snapshot(directory, chunk_size=BUILD_CHUNK_SIZE, keep=3):
+    """
+    Собирает снимок банка вопросов в directory и делает его текущим.
+    Файл получает имя по id сборки; указатель CURRENT подменяется атомарно
+    (os.replace), поэтому процессы видят либо старый снимок, либо новый целиком.
+    Возвращает путь к файлу снимка.
+    """
+    build_id = time.time_ns()
+    writer = SnapshotWriter()
+    columns = writer.columns
+
+    counter_fields = QuestionCategory.COUNTER_FIELDS
+    for category_id, name, *counters in QuestionCategory.objects.order_by('id').values_list(
+        'id', 'name', *counter_fields
+    ):
+        columns['cat_id'].append(category_id)
+        writer.add_string('cat_name', name)
+        for field, value in zip(counter_fields, counters):
+            columns[f'cat_{field}'].append(value)
+
+    questions = Question.objects.values_list('id', 'category_id', 'text', 'difficulty')
+    for page in keyset_pages(questions, chunk_size):
+        first_id, last_id = page[0][0], page[-1][0]
+        answers = {}
+        rows = Answer.objects.filter(question_id__gte=first_id, question_id__lte=last_id).order_by(
+            'question_id', 'id'
+        ).values_list('question_id', 'id', 'text', 'is_correct')
+        for question_id, answer_id, text, is_correct in rows:
+            answers.setdefault(question_id, []).append((answer_id, text, is_correct))
+        stats = {
+            item.question_id: json.dumps(QuestionStatsSerializer(item).data, ensure_ascii=False)
+            for item in QuestionStats.objects.filter(question_id__gte=first_id, question_id__lte=last_id)
+        }
+
+        for question_id, category_id, text, difficulty in page:
+            columns['q_id'].append(question_id)
+            columns['q_category'].append(category_id)
+            columns['q_answers'].append(len(columns['a_id']))
+            writer.add_string('q_text', text)
+            writer.add_string('q_difficulty', difficulty, intern=True)
+            writer.add_string('q_stats', stats.get(question_id, ''))
+            for answer_id, answer_text, is_correct in answers.get(question_id, ()):
+                columns['a_id'].append(answer_id)
+                columns['a_correct'].append(1 if is_correct else 0)
+                writer.add_string('a_text', answer_text)
+    columns['q_answers'].append(len(columns['a_id']))
+
+    os.makedirs(directory, exist_ok=True)
+    filename = f'quiz-{build_id}.snap'
+    path = os.path.join(directory, filename)
+    writer.write(f'{path}.tmp', build_id)
+    os.replace(f'{path}.tmp', path)
+
+    pointer = os.path.join(directory, POINTER_NAME)
+    with open(f'{pointer}.tmp', 'w', encoding='utf-8') as f:
+        f.write(filename)
+    os.replace(f'{pointer}.tmp', pointer)
+
+    _prune(directory, keep)
+    return path
+
+
+def _prune(directory, keep):
+    """
+    Удаляет старые снимки, кроме keep последних. Файлы, которые еще отображены
+    другими процессами, в POSIX удаляются безопасно, а в Windows пропускаются.
+    """
+    snapshots = sorted(name for name in os.listdir(directory) if name.startswith('quiz-') and name.endswith('.snap'))
+    for name in snapshots[:-keep] if keep > 0 else []:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
+
+
+class Snapshot:
+    """
+    Снимок, отображенный в память. Колонки — memoryview над mmap без копирования,
+    поэтому все процессы, открывшие один файл, делят одни и те же страницы.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, version, self.build_id, manifest_length = HEADER.unpack_from(view)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемый снимок {path}: {magic!r}, версия {version}")
+        layout = json.loads(bytes(view[HEADER.size:HEADER.size + manifest_length]))
+        data_start = _align(HEADER.size + manifest_length)
+
+        self.path = path
+        self.columns = {}
+        for name, typecode in COLUMNS.items():
+            offset, count = layout[name]
+            start = data_start + offset
+            self.columns[name] = view[start:start + count * array(typecode).itemsize].cast(typecode)
+        offset, length = layout['strings']
+        self._strings = view[data_start + offset:data_start + offset + length]
+
+    @property
+    def question_count(self):
+        return len(self.columns['q_id'])
+
+    def string(self, prefix, index):
+        offset = self.columns[f'{prefix}_off'][index]
+        return str(self._strings[offset:offset + self.columns[f'{prefix}_len'][index]], 'utf-8')
+
+    def category_index(self, category_id):
+        ids = self.columns['cat_id']
+        index = bisect_left(ids, category_id)
+        return index if index < len(ids) and ids[index] == category_id else None
+
+    def question_index(self, question_id):
+        ids = self.columns['q_id']
+        index = bisect_left(ids, question_id)
+        return index if index < len(ids) and ids[index] == question_id else None
+
+    def category(self, index):
+        """
+        Категория в формате QuestionCategorySerializer.
+        """
+        item = {'id': self.columns['cat_id'][index], 'name': self.string('cat_name', index)}
+        for field in QuestionCategory.COUNTER_FIELDS:
+            item[field] = self.columns[f'cat_{field}'][index]
+        return item
+
+    def question(self, index):
+        """
+        Вопрос в формате QuestionSerializer.
+        """
+        stats_length = self.columns['q_stats_len'][index]
+        return {
+            'id': self.columns['q_id'][index],
+            'stats': json.loads(self.string('q_stats', index)) if stats_length else None,
+            'text': self.string('q_text', index),
+            'difficulty': self.string('q_difficulty', index),
+            'category': self.columns['q_category'][index],
+        }
+
+    def question_with_answers(self, index, staff=False):
+        """
+        Вопрос в формате QuestionWithAnswersSerializer; is_correct — только для сотрудников.
+        """
+        item = self.question(index)
+        category_index = self.category_index(item['category'])
+        item['category_name'] = self.string('cat_name', category_index) if category_index is not None else None
+        answers = []
+        starts = self.columns['q_answers']
+        for answer_index in range(starts[index], starts[index + 1]):
+            answer = {'id': self.columns['a_id'][answer_index], 'text': self.string('a_text', answer_index)}
+            if staff:
+                answer['is_correct'] = bool(self.columns['a_correct'][answer_index])
+            answers.append(answer)
+        item['answers'] = answers
+        return item
+
+
+class SnapshotRows:
+    """
+    Ленивая последовательность строк снимка для пагинатора: строки собираются
+    только для запрошенного среза.
+    """
+
+    def __init__(self, count, render):
+        self._count = count
+        self._render = render
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self._render(index) for index in range(*key.indices(self._count))]
+        if key < 0:
+            key += self._count
+        if not 0 <= key < self._count:
+            raise IndexError(key)
+        return self._render(key)
+
+
+class SnapshotStore:
+    """
+    Текущий снимок процесса. Указатель CURRENT проверяется при каждом обращении
+    (один stat); когда он меняется, новый снимок отображается в память, а старый
+    освобождается после последнего запроса, который им пользуется. После изменения
+    вопросов в этом процессе снимок не используется, пока не появится собранный позже.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._pointer_mtime = None
+        self._changed_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'QUIZ_SNAPSHOT_ENABLED', False)
+
+    @property
+    def directory(self):
+        return getattr(settings, 'QUIZ_SNAPSHOT_DIR', None)
+
+    def current(self):
+        """
+        Возвращает Snapshot или None, если снимком пользоваться нельзя.
+        """
+        if not (self.enabled and self.directory):
+            return None
+        pointer = os.path.join(self.directory, POINTER_NAME)
+        try:
+            mtime = os.stat(pointer).st_mtime_ns
+        except OSError:
+            return None
+        if mtime != self._pointer_mtime:
+            with self._lock:
+                if mtime != self._pointer_mtime:
+                    self._snapshot = self._load(pointer)
+                    self._pointer_mtime = mtime
+        snapshot = self._snapshot
+        if snapshot is None or (self._changed_at is not None and snapshot.build_id <= self._changed_at):
+            return None
+        return snapshot
+
+    def mark_changed(self):
+        self._changed_at = time.time_ns()
+
+    def reset(self):
+        with self._lock:
+            self._snapshot = None
+            self._pointer_mtime = None
+            self._changed_at = None
+
+    def _load(self, pointer):
+        try:
+            with open(pointer, encoding='utf-8') as f:
+                filename = f.read().strip()
+            return Snapshot(os.path.join(self.directory, filename))
+        except (OSError, ValueError) as e:
+            logger.warning("Снимок банка вопросов не загружен: %s", e)
+            return None
+
+
+quiz_snapshot = SnapshotStore()
+
+
+@receiver(questions_changed)
+def snapshot_questions_changed(sender, question_ids, **kwargs):
+    quiz_snapshot.mark_changed()
+
+
+@receiver(post_save, sender=QuestionCategory)
+@receiver(post_delete, sender=QuestionCategory)
+def snapshot_category_changed(sender, **kwargs):
+    quiz_snapshot.mark_changed()
@@ -0,0 +1,138 @@
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from config.pagination import keyset_pages
+
+from .models import AttemptAnswer, Question, QuestionStats
+from .versions import catalog_versions
+
+# Границы доли правильных ответов для предлагаемой сложности
+EASY_RATE = 0.7
+HARD_RATE = 0.4
+# Ограничение SQL Server — не больше 2100 параметров в запросе
+WRITE_BATCH_SIZE = 1000
+
+
+def iter_attempt_chunks(chunk_size, max_id):
+    """
+    Читает ответы пользователей с id <= max_id порциями по chunk_size
+    (keyset по id) и отдает их массивами (user_id, question_id, is_correct).
+    """
+    last_id = 0
+    while last_id < max_id:
+        rows = list(
+            AttemptAnswer.objects.filter(id__gt=last_id, id__lte=max_id).order_by('id')
+            .values_list('id', 'user_id', 'question_id', 'is_correct')[:chunk_size]
+        )
+        if not rows:
+            return
+        data = np.array(rows, dtype=np.int64)
+        last_id = int(data[-1, 0])
+        yield data[:, 1], data[:, 2], data[:, 3]
+
+
+def _accumulate(total, index, weights=None):
+    """
+    Прибавляет к массиву total суммы weights по индексам index, расширяя его при необходимости.
+    """
+    sums = np.bincount(index, weights=weights)
+    if len(sums) > len(total):
+        total = np.concatenate([total, np.zeros(len(sums) - len(total))])
+    total[:len(sums)] += sums
+    return total
+
+
+class QuestionStatsEngine:
+    """
+    Считает статистику вопросов за два прохода по ответам пользователей.
+    Первый проход собирает число ответов и правильных ответов по пользователям
+    и по вопросам, второй — суммы общих результатов пользователей по каждому
+    вопросу, из которых получается точечно-бисериальная корреляция
+    (дискриминативность). Все вычисления над порцией — векторные, через bincount.
+    """
+
+    def __init__(self, chunk_size=100000, min_attempts=None):
+        self.chunk_size = chunk_size
+        self.min_attempts = (
+            min_attempts if min_attempts is not None else getattr(settings, 'QUIZ_STATS_MIN_ATTEMPTS', 30)
+        )
+        self.rows_read = 0
+
+    def compute(self):
+        """
+        Возвращает список несохраненных QuestionStats по всем вопросам, на которые отвечали.
+        """
+        # Ответы, записанные во время расчета, во втором проходе не учитываем
+        max_id = AttemptAnswer.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+
+        user_answered, user_correct = np.zeros(0), np.zeros(0)
+        answered, correct = np.zeros(0), np.zeros(0)
+        for users, questions, is_correct in iter_attempt_chunks(self.chunk_size, max_id):
+            user_answered = _accumulate(user_answered, users)
+            user_correct = _accumulate(user_correct, users, is_correct)
+            answered = _accumulate(answered, questions)
+            correct = _accumulate(correct, questions, is_correct)
+            self.rows_read += len(users)
+
+        user_score = np.divide(user_correct, user_answered, out=np.zeros_like(user_correct),
+                               where=user_answered > 0)
+        score_sum, score_sq_sum, correct_score_sum = np.zeros(0), np.zeros(0), np.zeros(0)
+        for users, questions, is_correct in iter_attempt_chunks(self.chunk_size, max_id):
+            scores = user_score[users]
+            score_sum = _accumulate(score_sum, questions, scores)
+            score_sq_sum = _accumulate(score_sq_sum, questions, scores * scores)
+            correct_score_sum = _accumulate(correct_score_sum, questions, scores * is_correct)
+
+        return self._build(answered, correct, score_sum, score_sq_sum, correct_score_sum)
+
+    def _build(self, answered, correct, score_sum, score_sq_sum, correct_score_sum):
+        question_ids = np.flatnonzero(answered)
+        n = answered[question_ids]
+        n_correct = correct[question_ids]
+        rate = n_correct / n
+
+        mean = score_sum[question_ids] / n
+        std = np.sqrt(np.maximum(score_sq_sum[question_ids] / n - mean * mean, 0.0))
+        n_wrong = n - n_correct
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_correct = correct_score_sum[question_ids] / n_correct
+            mean_wrong = (score_sum[question_ids] - correct_score_sum[question_ids]) / n_wrong
+            discrimination = (mean_correct - mean_wrong) / std * np.sqrt(rate * (1 - rate))
+        enough = n >= self.min_attempts
+        has_discrimination = enough & (n_correct > 0) & (n_wrong > 0) & (std > 1e-12)
+
+        suggested = np.select([rate >= EASY_RATE, rate >= HARD_RATE], ['easy', 'medium'], 'hard')
+
+        now = timezone.now()
+        return [
+            QuestionStats(
+                question_id=int(question_id),
+                attempts=int(attempts),
+                correct_rate=round(float(question_rate), 4),
+                discrimination=round(float(question_discrimination), 4) if has_value else None,
+                suggested_difficulty=str(difficulty) if is_enough else None,
+                computed_at=now,
+            )
+            for question_id, attempts, question_rate, question_discrimination, has_value, difficulty, is_enough
+            in zip(question_ids, n, rate, discrimination, has_discrimination, suggested, enough)
+        ]
+
+
+def save_question_stats(stats):
+    """
+    Заменяет всю таблицу статистики одним пакетом в транзакции.
+    Вопросы, удаленные во время расчета, пропускаются. Возвращает число записанных строк.
+    """
+    with transaction.atomic():
+        existing = set()
+        for page in keyset_pages(Question.objects.values_list('id', flat=True), 10000):
+            existing.update(page)
+        stats = [item for item in stats if item.question_id in existing]
+        QuestionStats.objects.all().delete()
+        QuestionStats.objects.bulk_create(stats, batch_size=WRITE_BATCH_SIZE)
+        # Статистика входит в ответы эндпоинтов вопросов всех категорий
+        catalog_versions.touch(everything=True)
+    return len(stats)
@@ -1,7 +1,12 @@
 from django.urls import path
 from .views import QuestionCategoryListCreateAPIView, QuestionCategoryRetrieveUpdateDestroyAPIView, \
     QuestionListCreateAPIView, QuestionRetrieveUpdateDestroyAPIView, \
-    AnswerListCreateAPIView, AnswerRetrieveUpdateDestroyAPIView, check_answer
+    AnswerListCreateAPIView, AnswerRetrieveUpdateDestroyAPIView, check_answer, check_answers, quiz_metrics, \
+    QuestionWithAnswersListAPIView, QuestionWithAnswersRetrieveAPIView, generate_quiz, \
+    search_questions, category_leaderboard, category_leaderboard_me, export_quiz, bulk_questions, \
+    quiz_changes
+from .async_views import AsyncCheckAnswerView, AsyncQuestionCategoryListAPIView, \
+    AsyncQuestionCategoryRetrieveAPIView, AsyncQuestionListAPIView, AsyncQuestionRetrieveAPIView
 
 
 urlpatterns = [
@@ -9,7 +14,25 @@ urlpatterns = [
     path('categories/<int:pk>/', QuestionCategoryRetrieveUpdateDestroyAPIView.as_view(), name='category-detail'),
     path('questions/', QuestionListCreateAPIView.as_view(), name='question-list-create'),
     path('questions/<int:pk>/', QuestionRetrieveUpdateDestroyAPIView.as_view(), name='question-detail'),
+    path('questions/bulk/', bulk_questions, name='question-bulk'),  # Пакетная запись вопросов с ответами
+    path('questions/full/', QuestionWithAnswersListAPIView.as_view(), name='question-full-list'),
+    path('questions/full/<int:pk>/', QuestionWithAnswersRetrieveAPIView.as_view(), name='question-full-detail'),
     path('answers/', AnswerListCreateAPIView.as_view(), name='answer-list-create'),
     path('answers/<int:pk>/', AnswerRetrieveUpdateDestroyAPIView.as_view(), name='answer-detail'),
     path('check_answer/', check_answer, name='check_answer'),  # Добавляем URL для проверки ответа
+    path('check_answers/', check_answers, name='check_answers'),  # Пакетная проверка ответов теста
+    path('generate/', generate_quiz, name='generate-quiz'),  # Случайный тест
+    path('search/', search_questions, name='search-questions'),  # Поиск по вопросам и ответам
+    path('leaderboards/<int:category_id>/', category_leaderboard, name='category-leaderboard'),
+    path('leaderboards/<int:category_id>/me/', category_leaderboard_me, name='category-leaderboard-me'),
+    path('export/', export_quiz, name='export-quiz'),  # Выгрузка банка вопросов
+    path('changes/', quiz_changes, name='quiz-changes'),  # Изменения для офлайн-клиентов
+    path('metrics/', quiz_metrics, name='quiz-metrics'),
+    # Асинхронные варианты эндпоинтов для запуска под ASGI
+    path('async/check_answer/', AsyncCheckAnswerView.as_view(), name='async-check-answer'),
+    path('async/categories/', AsyncQuestionCategoryListAPIView.as_view(), name='async-category-list'),
+    path('async/categories/<int:pk>/', AsyncQuestionCategoryRetrieveAPIView.as_view(),
+         name='async-category-detail'),
+    path('async/questions/', AsyncQuestionListAPIView.as_view(), name='async-question-list'),
+    path('async/questions/<int:pk>/', AsyncQuestionRetrieveAPIView.as_view(), name='async-question-detail'),
 ]
@@ -0,0 +1,177 @@
+import threading
+import uuid
+from functools import partial
+
+from django.db import IntegrityError, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils.cache import parse_etags, patch_cache_control
+
+from .models import QuestionCategory, Question, CatalogVersion
+from .signals import questions_changed
+
+CATALOG_KEY = 'catalog'
+# Общая часть версий всех категорий: меняется, когда нельзя понять, какие категории затронуты
+CATEGORIES_KEY = 'categories'
+# Ограничение SQL Server — не больше 2100 параметров в запросе
+LOAD_CHUNK_SIZE = 1000
+
+
+def category_key(category_id):
+    return f'category:{category_id}'
+
+
+class PendingChanges:
+    """
+    Изменения каталога, накопленные в транзакции до ее фиксации.
+    """
+
+    def __init__(self):
+        self.category_ids = set()
+        self.question_ids = set()
+        self.deleted_ids = set()
+        self.everything = False
+        self.saved = False
+
+
+class CatalogVersions:
+    """
+    Версии каталога викторины для ETag: общая версия и версии категорий.
+    Изменения вопросов, ответов и категорий копятся до фиксации транзакции
+    и записываются одним пакетом (transaction.on_commit), поэтому каскадное
+    удаление тысяч строк меняет версии несколькими запросами, а читатель
+    не получит новую версию раньше новых данных.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def get(self, category_id=None):
+        """
+        Текущая версия каталога или категории — одним запросом по первичному ключу.
+        """
+        keys = self._keys(category_id)
+        rows = dict(CatalogVersion.objects.filter(key__in=keys).values_list('key', 'version'))
+        return '.'.join(rows.get(key, '0') for key in keys)
+
+    async def aget(self, category_id=None):
+        keys = self._keys(category_id)
+        rows = {key: version async for key, version in
+                CatalogVersion.objects.filter(key__in=keys).values_list('key', 'version')}
+        return '.'.join(rows.get(key, '0') for key in keys)
+
+    def touch(self, category_ids=(), question_ids=(), deleted_ids=(), everything=False):
+        """
+        Отмечает изменение: категории, вопросы (их категории определятся при записи),
+        удаленные вопросы (их категории должны быть в category_ids) или весь каталог.
+        """
+        connection = transaction.get_connection()
+        local = self._local
+        pending = getattr(local, 'pending', None)
+        # Список хуков соединения пересоздается при фиксации и откате транзакции:
+        # если он другой, накопленное относится к завершенной транзакции
+        new = (pending is None or pending.saved or not connection.in_atomic_block
+               or local.hooks is not connection.run_on_commit)
+        if new:
+            pending = local.pending = PendingChanges()
+            local.hooks = connection.run_on_commit
+        pending.category_ids.update(category_ids)
+        pending.question_ids.update(question_ids)
+        pending.deleted_ids.update(deleted_ids)
+        pending.everything = pending.everything or everything
+        if new:
+            # Вне транзакции on_commit вызывает функцию сразу
+            transaction.on_commit(partial(self._save, pending), robust=True)
+
+    def _save(self, pending):
+        pending.saved = True
+        categories = set(pending.category_ids)
+        everything = pending.everything
+        question_ids = sorted(pending.question_ids - pending.deleted_ids)
+        if question_ids and not everything:
+            found = 0
+            for i in range(0, len(question_ids), LOAD_CHUNK_SIZE):
+                rows = Question.objects.filter(id__in=question_ids[i:i + LOAD_CHUNK_SIZE]).values_list(
+                    'category_id', flat=True
+                )
+                for category_id in rows:
+                    categories.add(category_id)
+                    found += 1
+            # Вопрос удален так, что его категория неизвестна: меняем версии всех категорий
+            everything = found < len(question_ids)
+
+        keys = [CATALOG_KEY]
+        if everything:
+            keys.append(CATEGORIES_KEY)
+        keys.extend(category_key(category_id) for category_id in sorted(categories))
+        self._write(keys, uuid.uuid4().hex)
+
+    def _write(self, keys, version):
+        for i in range(0, len(keys), LOAD_CHUNK_SIZE):
+            chunk = keys[i:i + LOAD_CHUNK_SIZE]
+            with transaction.atomic():
+                if CatalogVersion.objects.filter(key__in=chunk).update(version=version) == len(chunk):
+                    continue
+                existing = set(CatalogVersion.objects.filter(key__in=chunk).values_list('key', flat=True))
+                try:
+                    with transaction.atomic():
+                        CatalogVersion.objects.bulk_create([
+                            CatalogVersion(key=key, version=version) for key in chunk if key not in existing
+                        ])
+                except IntegrityError:
+                    # Часть строк успел создать другой процесс
+                    CatalogVersion.objects.filter(key__in=chunk).update(version=version)
+
+    @staticmethod
+    def _keys(category_id):
+        if category_id is None:
+            return [CATALOG_KEY]
+        return [CATEGORIES_KEY, category_key(category_id)]
+
+
+def catalog_etag(version, *parts):
+    """
+    Сильный ETag по версии каталога и признакам представления (формат, права).
+    """
+    return '"%s"' % '-'.join([version, *parts])
+
+
+def etag_matches(request, etag):
+    etags = parse_etags(request.headers.get('If-None-Match', ''))
+    return etags == ['*'] or etag in etags
+
+
+def set_etag(response, etag):
+    response['ETag'] = etag
+    # Клиент перепроверяет ответ по ETag; общий кэш страниц (CacheMiddleware) ответы
+    # с max-age=0 не хранит — иначе он отдавал бы сохраненный 304 и устаревшие данные
+    patch_cache_control(response, no_cache=True, max_age=0)
+    return response
+
+
+catalog_versions = CatalogVersions()
+
+
+@receiver(questions_changed)
+def versions_questions_changed(sender, question_ids, category_ids=(), **kwargs):
+    catalog_versions.touch(category_ids=category_ids, question_ids=question_ids)
+
+
+@receiver(post_save, sender=Question)
+def versions_question_saved(sender, instance, **kwargs):
+    # Прежние категорию и сложность вопроса запоминает quiz.counters перед сохранением
+    before = getattr(instance, '_saved_counter_key', None)
+    if before is not None and before[0] != instance.category_id:
+        catalog_versions.touch(category_ids=[before[0]])
+
+
+@receiver(post_delete, sender=Question)
+def versions_question_deleted(sender, instance, **kwargs):
+    catalog_versions.touch(category_ids=[instance.category_id], deleted_ids=[instance.pk])
+
+
+@receiver(post_save, sender=QuestionCategory)
+@receiver(post_delete, sender=QuestionCategory)
+def versions_category_changed(sender, instance, **kwargs):
+    catalog_versions.touch(category_ids=[instance.pk])
+
@@ -1,59 +1,460 @@
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.shortcuts import get_object_or_404
 from .models import QuestionCategory
-from .serializers import QuestionCategorySerializer, QuestionSerializer, AnswerSerializer
-from .paginators import QuizResultsSetPagination
+from .serializers import QuestionCategorySerializer, QuestionSerializer, AnswerSerializer, \
+    QuestionWithAnswersSerializer, BulkQuestionSerializer
+from .paginators import QuizResultsSetPagination, CursorPaginationOptInMixin
 from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework import status
 from .models import Question, Answer
-from rest_framework.decorators import api_view
+from django.db.models import Prefetch
+from django.http import Http404, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control, never_cache
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from . import changes, checking, exporters
+from .authoring import MAX_BULK_QUESTIONS, BulkQuestionWriter
+from .filters import QuestionFilter, AnswerFilter
+from .answer_key import answer_key
+from .sampling import question_pools
+from .search import question_search
+from .attempts import attempt_buffer
+from .leaderboards import leaderboards
+from .snapshot import SnapshotRows, quiz_snapshot
+from .versions import catalog_etag, catalog_versions, etag_matches, set_etag
+from .models import AttemptAnswer
 
 
 @api_view(['POST'])
 def check_answer(request):
+    data = request.data if isinstance(request.data, dict) else {}
+    question, is_correct, error = checking.check_answer(data.get('question_id'), data.get('answer_id'))
+    if error == checking.ERROR_QUESTION_NOT_FOUND:
+        return Response({"error": error}, status=status.HTTP_404_NOT_FOUND)
+    if error:
+        return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+    attempt_buffer.record_answer(
+        request.user.pk, int(data['question_id']), int(data['answer_id']), is_correct
+    )
+    return Response({
+        "question_text": question.text,
+        "is_correct": is_correct
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+def check_answers(request):
+    """
+    Проверка всех ответов теста за один запрос.
+    Ошибки по отдельным парам возвращаются в результатах, а не прерывают проверку.
+    """
+    items = request.data.get('answers') if isinstance(request.data, dict) else None
+    if not isinstance(items, list) or not items:
+        return Response({"error": "Ожидается непустой список answers"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > checking.MAX_BATCH_SIZE:
+        return Response({"error": f"Не больше {checking.MAX_BATCH_SIZE} ответов за запрос"},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    results = checking.check_answer_batch(items)
+    checked = [
+        (int(result['question_id']), int(result['answer_id']), result['is_correct'])
+        for result in results if 'is_correct' in result
+    ]
+    attempt_id = attempt_buffer.record_attempt(request.user.pk, checked) if checked else None
+    return Response({
+        "attempt_id": attempt_id,
+        "results": results,
+        "total": len(results),
+        "score": sum(1 for result in results if result.get('is_correct')),
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+@never_cache
+def quiz_metrics(request):
+    """
+    Счетчики процессных кэшей викторины (для администраторов).
+    """
+    return Response({
+        "answer_key": answer_key.stats(),
+        "attempt_buffer": attempt_buffer.stats(),
+    })
+
+
+@api_view(['GET'])
+@never_cache
+def quiz_changes(request):
+    """
+    Изменения банка вопросов после токена since (0 — полная выгрузка) пачками до limit записей.
+    Клиент сохраняет token ответа и повторяет запрос, пока more истинно.
+    """
+    since = request.query_params.get('since', '0')
     try:
-        question_id = request.data.get('question_id')
-        answer_id = request.data.get('answer_id')
-
-        question = Question.objects.get(id=question_id)
-        answer = Answer.objects.get(id=answer_id, question=question)
-
-        return Response({
-            "question_text": question.text,
-            "is_correct": answer.is_correct
-        }, status=status.HTTP_200_OK)
-
-    except Question.DoesNotExist:
-        return Response({"error": "Вопрос не найден"}, status=status.HTTP_404_NOT_FOUND)
-    except Answer.DoesNotExist:
-        return Response({"error": "Ответ не связан с вопросом"}, status=status.HTTP_400_BAD_REQUEST)
-    except Exception:
+        changes.parse_token(since)
+        limit = int(request.query_params.get('limit', changes.DEFAULT_BATCH_SIZE))
+    except ValueError:
+        return Response({"error": "Неверные данные"}, status=status.HTTP_400_BAD_REQUEST)
+    if not 1 <= limit <= changes.MAX_BATCH_SIZE:
         return Response({"error": "Неверные данные"}, status=status.HTTP_400_BAD_REQUEST)
 
+    try:
+        data = changes.changes_since(since, limit, staff=request.user.is_staff)
+    except changes.ChangesUnavailable:
+        return Response({"error": "Токен устарел, нужна полная синхронизация (since=0)"},
+                        status=status.HTTP_410_GONE)
+    return Response(data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_quiz(request):
+    """
+    Потоковая выгрузка всего банка вопросов с ответами (для администраторов).
+    type — json (по умолчанию), ndjson или csv; gzip=1 — сжать на лету.
+    Параметр format не используется: его занимает выбор рендерера DRF.
+    """
+    fmt = request.query_params.get('type', 'json')
+    if fmt not in exporters.EXPORT_FORMATS:
+        return Response({"error": f"type должен быть одним из: {', '.join(exporters.EXPORT_FORMATS)}"},
+                        status=status.HTTP_400_BAD_REQUEST)
+    compress = request.query_params.get('gzip') in ('1', 'true')
+
+    filename = f'quiz_export.{fmt}'
+    if compress:
+        response = StreamingHttpResponse(exporters.export_stream(fmt, compress=True),
+                                         content_type='application/gzip')
+        filename += '.gz'
+    else:
+        response = StreamingHttpResponse(exporters.export_stream(fmt),
+                                         content_type=f'{exporters.CONTENT_TYPES[fmt]}; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+class SnapshotReadMixin:
+    """
+    Отдает list и retrieve из снимка банка вопросов (QUIZ_SNAPSHOT_ENABLED), не обращаясь
+    к базе за данными викторины. Аутентификация и права проверяются как обычно.
+    Если снимка нет или запросу нужна база (курсорная пагинация, фильтры), работает ORM.
+    """
+    snapshot_kind = None  # 'category', 'question' или 'question_full'
 
-class QuestionCategoryListCreateAPIView(generics.ListCreateAPIView):
+    def get_snapshot(self):
+        params = self.request.query_params
+        if params.get('pagination') == 'cursor' or 'cursor' in params:
+            return None
+        filterset_class = getattr(self, 'filterset_class', None)
+        if filterset_class is not None and any(name in params for name in filterset_class.base_filters):
+            return None
+        return quiz_snapshot.current()
+
+    def snapshot_render(self, snapshot):
+        if self.snapshot_kind == 'category':
+            return snapshot.category
+        if self.snapshot_kind == 'question':
+            return snapshot.question
+        staff = self.request.user.is_staff
+        return lambda index: snapshot.question_with_answers(index, staff=staff)
+
+    def list(self, request, *args, **kwargs):
+        snapshot = self.get_snapshot()
+        if snapshot is None:
+            return super().list(request, *args, **kwargs)
+        prefix = 'cat' if self.snapshot_kind == 'category' else 'q'
+        rows = SnapshotRows(len(snapshot.columns[f'{prefix}_id']), self.snapshot_render(snapshot))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(list(page))
+        return Response(rows[:])
+
+    def retrieve(self, request, *args, **kwargs):
+        snapshot = self.get_snapshot()
+        if snapshot is None:
+            return super().retrieve(request, *args, **kwargs)
+        if self.snapshot_kind == 'category':
+            index = snapshot.category_index(int(kwargs['pk']))
+        else:
+            index = snapshot.question_index(int(kwargs['pk']))
+        if index is None:
+            raise Http404(f"No {self.get_queryset().model._meta.object_name} matches the given query.")
+        return Response(self.snapshot_render(snapshot)(index))
+
+
+class CatalogETagMixin:
+    """
+    Условный GET для каталога: list и retrieve отдают сильный ETag по версии
+    каталога (quiz.versions), а на совпавший If-None-Match отвечают 304,
+    не выполняя основной запрос. Стоит перед SnapshotReadMixin: ответы из снимка
+    помечаются id его сборки и не требуют запросов к базе.
+    """
+    # Ответ зависит от прав пользователя (is_correct видят только сотрудники)
+    etag_staff_dependent = False
+
+    def get_catalog_version(self):
+        return catalog_versions.get()
+
+    def get_etag(self):
+        get_snapshot = getattr(self, 'get_snapshot', None)
+        snapshot = get_snapshot() if get_snapshot is not None else None
+        version = f'snapshot{snapshot.build_id}' if snapshot is not None else self.get_catalog_version()
+        parts = [self.request.accepted_renderer.format]
+        if self.etag_staff_dependent:
+            parts.append('staff' if self.request.user.is_staff else 'member')
+        return catalog_etag(version, *parts)
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(super().retrieve, request, *args, **kwargs)
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        # Версия читается до данных: изменение между ними даст лишнюю загрузку, но не устаревший 304
+        etag = self.get_etag()
+        if etag_matches(request, etag):
+            return set_etag(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            set_etag(response, etag)
+        return response
+
+
+class QuestionCategoryListCreateAPIView(CatalogETagMixin, SnapshotReadMixin, generics.ListCreateAPIView):
     queryset = QuestionCategory.objects.all()
     serializer_class = QuestionCategorySerializer
+    snapshot_kind = 'category'
 
 
-class QuestionCategoryRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class QuestionCategoryRetrieveUpdateDestroyAPIView(CatalogETagMixin, SnapshotReadMixin,
+                                                   generics.RetrieveUpdateDestroyAPIView):
     queryset = QuestionCategory.objects.all()
     serializer_class = QuestionCategorySerializer
+    snapshot_kind = 'category'
+
+    def get_catalog_version(self):
+        return catalog_versions.get(int(self.kwargs['pk']))
 
 
-class QuestionListCreateAPIView(generics.ListCreateAPIView):
-    queryset = Question.objects.all()
+class QuestionListCreateAPIView(CatalogETagMixin, SnapshotReadMixin, CursorPaginationOptInMixin,
+                                generics.ListCreateAPIView):
+    queryset = Question.objects.select_related('stats').order_by('id')
     serializer_class = QuestionSerializer
     pagination_class = QuizResultsSetPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = QuestionFilter
+    snapshot_kind = 'question'
 
+    def get_catalog_version(self):
+        # Список одной категории меняется только вместе с ее версией
+        category = self.request.query_params.get('category', '')
+        return catalog_versions.get(int(category)) if category.isdigit() else catalog_versions.get()
 
-class QuestionRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Question.objects.all()
+
+class QuestionRetrieveUpdateDestroyAPIView(CatalogETagMixin, SnapshotReadMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Question.objects.select_related('stats')
     serializer_class = QuestionSerializer
+    snapshot_kind = 'question'
+
+
+@api_view(['POST'])
+def bulk_questions(request):
+    """
+    Пакетное создание и обновление вопросов с вложенными ответами.
+    Весь пакет проверяется до записи и пишется одной транзакцией;
+    в results — id вопросов и их ответов в порядке запроса.
+    """
+    items = request.data
+    if not isinstance(items, list) or not items:
+        return Response({"error": "Ожидается непустой список вопросов"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > MAX_BULK_QUESTIONS:
+        return Response({"error": f"Не больше {MAX_BULK_QUESTIONS} вопросов за запрос"},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    serializer = BulkQuestionSerializer(data=items, many=True)
+    if not serializer.is_valid():
+        return Response({"errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+    writer = BulkQuestionWriter(serializer.validated_data)
+    if not writer.validate():
+        return Response({"errors": writer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    results = writer.save()
+    created = sum(1 for item in serializer.validated_data if 'id' not in item)
+    return Response({
+        "results": results,
+        "created": created,
+        "updated": len(results) - created,
+    }, status=status.HTTP_201_CREATED)
+
+
+def questions_with_answers():
+    """
+    Вопросы с категорией и ответами: страница читается фиксированным числом запросов.
+    """
+    return Question.objects.select_related('category', 'stats').prefetch_related(
+        Prefetch('answers', queryset=Answer.objects.order_by('id'))
+    ).order_by('id')
+
+
+# Ответ зависит от пользователя (is_correct видят только сотрудники),
+# поэтому общий кэш страниц (CacheMiddleware) хранить его не должен
+@method_decorator(cache_control(private=True), name='dispatch')
+class QuestionWithAnswersListAPIView(CatalogETagMixin, SnapshotReadMixin, generics.ListAPIView):
+    serializer_class = QuestionWithAnswersSerializer
+    etag_staff_dependent = True
+    pagination_class = QuizResultsSetPagination
+    snapshot_kind = 'question_full'
+
+    def get_queryset(self):
+        return questions_with_answers()
+
+
+@method_decorator(cache_control(private=True), name='dispatch')
+class QuestionWithAnswersRetrieveAPIView(CatalogETagMixin, SnapshotReadMixin, generics.RetrieveAPIView):
+    serializer_class = QuestionWithAnswersSerializer
+    etag_staff_dependent = True
+    snapshot_kind = 'question_full'
+
+    def get_queryset(self):
+        return questions_with_answers()
+
+
+MAX_GENERATED_QUESTIONS = 100
+
+
+@api_view(['GET'])
+@cache_control(private=True)
+def generate_quiz(request):
+    """
+    Случайный тест из count вопросов с фильтрами category и difficulty.
+    Одинаковый seed дает одинаковый тест; exclude — id уже показанных вопросов через запятую,
+    exclude_seen=1 — исключить вопросы, на которые пользователь уже отвечал.
+    """
+    params = request.query_params
+    try:
+        count = int(params.get('count', 10))
+        category_id = int(params['category']) if params.get('category') else None
+        exclude = [int(value) for value in params.get('exclude', '').split(',') if value.strip()]
+    except ValueError:
+        return Response({"error": "Неверные данные"}, status=status.HTTP_400_BAD_REQUEST)
+    if not 1 <= count <= MAX_GENERATED_QUESTIONS:
+        return Response({"error": f"count должен быть от 1 до {MAX_GENERATED_QUESTIONS}"},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    difficulty = params.get('difficulty') or None
+    if params.get('exclude_seen') in ('1', 'true'):
+        # Только вопросы из запрошенного пула: вся история ответов пользователя здесь не нужна
+        seen = AttemptAnswer.objects.filter(user=request.user)
+        if category_id is not None:
+            seen = seen.filter(question__category_id=category_id)
+        if difficulty is not None:
+            seen = seen.filter(question__difficulty=difficulty)
+        exclude.extend(seen.values_list('question_id', flat=True).distinct())
+
+    seed = params.get('seed') or uuid.uuid4().hex
+    question_ids = question_pools.sample(
+        count, category_id=category_id, difficulty=difficulty, seed=seed, exclude=exclude
+    )
+    questions = {question.pk: question for question in questions_with_answers().filter(id__in=question_ids)}
+    # Сохраняем порядок выборки; вопросы, удаленные после перестройки индекса, пропускаем
+    ordered = [questions[question_id] for question_id in question_ids if question_id in questions]
+
+    serializer = QuestionWithAnswersSerializer(ordered, many=True, context={'request': request})
+    return Response({
+        "seed": seed,
+        "count": len(ordered),
+        "questions": serializer.data,
+    })
+
+
+@api_view(['GET'])
+@cache_control(private=True)
+def search_questions(request):
+    """
+    Полнотекстовый поиск по вопросам и ответам (параметр q), результаты по убыванию релевантности.
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({"error": "Укажите строку поиска q"}, status=status.HTTP_400_BAD_REQUEST)
+
+    paginator = QuizResultsSetPagination()
+    page = paginator.paginate_queryset(question_search.search(query), request)
+    questions = questions_with_answers().in_bulk([question_id for question_id, _ in page])
+
+    results = []
+    for question_id, score in page:
+        question = questions.get(question_id)
+        if question is None:
+            continue
+        item = QuestionWithAnswersSerializer(question, context={'request': request}).data
+        item['score'] = score
+        results.append(item)
+    return paginator.get_paginated_response(results)
+
+
+MAX_LEADERBOARD_SIZE = 100
+
+
+@api_view(['GET'])
+def category_leaderboard(request, category_id):
+    """
+    Лучшие пользователи категории по числу правильных ответов (limit, по умолчанию 100).
+    """
+    category = get_object_or_404(QuestionCategory, pk=category_id)
+    try:
+        limit = int(request.query_params.get('limit', MAX_LEADERBOARD_SIZE))
+    except ValueError:
+        return Response({"error": "Неверные данные"}, status=status.HTTP_400_BAD_REQUEST)
+    if not 1 <= limit <= MAX_LEADERBOARD_SIZE:
+        return Response({"error": f"limit должен быть от 1 до {MAX_LEADERBOARD_SIZE}"},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    rows = leaderboards.top(category.pk, limit)
+    users = get_user_model().objects.only('username').in_bulk([user_id for _, user_id, _, _ in rows])
+    return Response({
+        "category": category.pk,
+        "results": [
+            {
+                "rank": rank,
+                "user_id": user_id,
+                "username": users[user_id].username if user_id in users else None,
+                "correct": correct,
+                "answered": answered,
+            }
+            for rank, user_id, answered, correct in rows
+        ],
+    })
+
+
+@api_view(['GET'])
+@cache_control(private=True)
+def category_leaderboard_me(request, category_id):
+    """
+    Место текущего пользователя в таблице лидеров категории.
+    """
+    category = get_object_or_404(QuestionCategory, pk=category_id)
+    board = leaderboards.board(category.pk)
+    rank, answered, correct = board.rank(request.user.pk) or (None, 0, 0)
+    return Response({
+        "category": category.pk,
+        "rank": rank,
+        "correct": correct,
+        "answered": answered,
+        "participants": len(board),
+    })
 
 
 class AnswerListCreateAPIView(generics.ListCreateAPIView):
-    queryset = Answer.objects.all()
+    queryset = Answer.objects.order_by('id')
     serializer_class = AnswerSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = AnswerFilter
 
 
 class AnswerRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
@@ -0,0 +1,137 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+# Блок чтения, если сервер не поддерживает wsgi.file_wrapper (sendfile)
+BLOCK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class FileRange:
+    """
+    Файл, читаемый с текущей позиции не дальше length байт. fileno отдает
+    дескриптор исходного файла: wsgi.file_wrapper (gunicorn) передает диапазон
+    через os.sendfile с позиции файла на Content-Length байт без копирования в Python.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Диапазон из заголовка Range: (start, end) включительно, None — отдать файл целиком
+    (нет заголовка, несколько диапазонов, неверный синтаксис), ValueError — диапазон вне файла.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-N — последние N байт
+        length = int(last)
+        if not length:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start > end:
+        if last and int(last) < start:
+            return None
+        raise ValueError(header)
+    return start, end
+
+
+def file_etag(size, modified):
+    return '"%x-%x"' % (size, int(modified.timestamp() * 1000000))
+
+
+def if_range_matches(request, etag, last_modified):
+    """
+    If-Range: диапазон отдается, только если файл не менялся (сильный ETag или точная дата).
+    """
+    value = request.headers.get('If-Range')
+    if not value:
+        return True
+    if value.startswith(('"', 'W/"')):
+        return value == etag
+    return parse_http_date_safe(value) == last_modified
+
+
+def serve_file(request, field_file):
+    """
+    Отдает файл поля с поддержкой Range/If-Range и условных запросов.
+    Время ответа не зависит от размера файла: читаются только метаданные,
+    данные идут через sendfile, либо их отдает веб-сервер (X-Accel-Redirect).
+    """
+    return serve_stored(request, field_file.storage, field_file.name)
+
+
+def serve_stored(request, storage, name):
+    """
+    То же для файла хранилища по имени (например, миниатюры в default_storage).
+    """
+    size = storage.size(name)
+    modified = storage.get_modified_time(name)
+    etag = file_etag(size, modified)
+    last_modified = int(modified.timestamp())
+    filename = os.path.basename(name)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+
+    prefix = settings.SECTIONS_ACCEL_REDIRECT_PREFIX
+    if prefix:
+        # Права уже проверены; файл и диапазоны отдает nginx из internal-location
+        response = HttpResponse(content_type=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        # У DedupStorage имя в поле и путь файла на диске различаются
+        internal_name = storage.internal_name(name) if hasattr(storage, 'internal_name') else name
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(internal_name)
+        response['Content-Disposition'] = content_disposition_header(False, filename)
+    else:
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if byte_range is not None and not if_range_matches(request, etag, last_modified):
+            byte_range = None
+        start, end = byte_range or (0, size - 1)
+
+        file = storage.open(name, 'rb')
+        file.seek(start)
+        response = FileResponse(FileRange(file, end - start + 1), filename=filename)
+        response.block_size = BLOCK_SIZE
+        response['Content-Length'] = end - start + 1
+        if byte_range is not None:
+            response.status_code = 206
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
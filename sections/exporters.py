@@ -0,0 +1,91 @@
+import os
+import re
+import time
+import zipfile
+
+from config.pagination import keyset_pages
+
+from .models import Content
+
+# Сколько записей содержимого читать за один запрос
+EXPORT_CHUNK_SIZE = 100
+# Размер блока чтения файла; буфер архива отдается клиенту после каждого блока
+READ_BLOCK_SIZE = 64 * 1024
+UNSAFE_NAME_RE = re.compile(r'[\\/:*?"<>|\x00-\x1f]+')
+
+
+class ArchiveBuffer:
+    """
+    Поток только для записи, куда zipfile пишет архив. Накопленное забирает
+    drain(), поэтому в памяти держится не больше одного блока. Без seek/tell
+    zipfile пишет записи с дескрипторами данных и заголовки не переписывает.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        if self.chunks:
+            data = b''.join(self.chunks)
+            self.chunks = []
+            yield data
+
+
+def safe_name(value, default):
+    value = UNSAFE_NAME_RE.sub('_', value).strip(' .')
+    return value[:100] or default
+
+
+def iter_section_contents(section, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Содержимое раздела по одному, страницами по id.
+    """
+    contents = Content.objects.filter(section=section).only('id', 'title', 'text', 'file')
+    for page in keyset_pages(contents, chunk_size):
+        yield from page
+
+
+def section_archive(section):
+    """
+    Отдает ZIP-архив раздела блоками по мере чтения записей и файлов.
+    Тексты сжимаются, файлы кладутся без сжатия (обычно это уже сжатые PDF и картинки).
+    Файлы, пропавшие из хранилища, пропускаются.
+    """
+    buffer = ArchiveBuffer()
+    root = safe_name(section.title, f'section-{section.pk}')
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+        if section.description:
+            archive.writestr(f'{root}/README.txt', section.description)
+            yield from buffer.drain()
+
+        for content in iter_section_contents(section):
+            prefix = f'{root}/{content.id}-{safe_name(content.title, "content")}'
+            if content.text:
+                archive.writestr(f'{prefix}.txt', content.text)
+                yield from buffer.drain()
+            if not content.file:
+                continue
+            try:
+                source = content.file.storage.open(content.file.name, 'rb')
+            except FileNotFoundError:
+                continue
+            with source:
+                filename = safe_name(os.path.basename(content.file.name), 'file')
+                info = zipfile.ZipInfo(f'{prefix}/{filename}', date_time=time.localtime()[:6])
+                info.compress_type = zipfile.ZIP_STORED
+                info.external_attr = 0o644 << 16
+                # Размер заранее нужен zipfile, чтобы выбрать ZIP64 для больших файлов
+                info.file_size = source.size
+                with archive.open(info, 'w') as entry:
+                    for block in source.chunks(READ_BLOCK_SIZE):
+                        entry.write(block)
+                        yield from buffer.drain()
+            yield from buffer.drain()
+    yield from buffer.drain()
@@ -0,0 +1,51 @@
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from sections import uploads
+from sections.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = 'Deletes chunked upload sessions that received no data for a while, with their partial files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=settings.SECTIONS_UPLOAD_SESSION_TTL_HOURS,
+                            help='Сколько часов без новых кусков сеанс считается брошенным')
+        parser.add_argument('--dry-run', action='store_true', help='Только показать, что будет удалено')
+
+    def handle(self, *args, **options):
+        if options['hours'] < 0:
+            raise CommandError("--hours не может быть отрицательным")
+
+        removed = 0
+        for session in uploads.stale_sessions(options['hours']).iterator():
+            if not options['dry_run']:
+                uploads.discard(session)
+            removed += 1
+
+        # Временные файлы без сеанса остаются, если процесс упал между записью и удалением
+        orphans = []
+        directory = Path(settings.SECTIONS_UPLOAD_DIR)
+        if directory.is_dir():
+            paths = {}
+            for path in directory.glob('*.part'):
+                try:
+                    paths[uuid.UUID(path.stem)] = path
+                except ValueError:
+                    continue
+            ids = list(paths)
+            known = set()
+            # Ограничение SQL Server — не больше 2100 параметров в запросе
+            for i in range(0, len(ids), 1000):
+                known.update(UploadSession.objects.filter(pk__in=ids[i:i + 1000]).values_list('pk', flat=True))
+            orphans = [path for session_id, path in paths.items() if session_id not in known]
+            if not options['dry_run']:
+                for path in orphans:
+                    path.unlink(missing_ok=True)
+
+        prefix = "Будет удалено" if options['dry_run'] else "Удалено"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} сеансов: {removed}, временных файлов без сеанса: {len(orphans)}"
+        ))
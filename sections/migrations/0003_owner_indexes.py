@@ -0,0 +1,21 @@
+# Generated by Django 4.2.12 on 2026-10-18 18:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sections', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['section', 'id'], name='sections_content_section'),
+        ),
+        migrations.AddIndex(
+            model_name='section',
+            index=models.Index(fields=['owner', 'id'], name='sections_section_owner'),
+        ),
+    ]
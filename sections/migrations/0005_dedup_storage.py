@@ -0,0 +1,33 @@
+# Generated by Django 4.2.12 on 2026-10-18 18:14
+
+from django.db import migrations, models
+import files.fields
+import files.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sections', '0004_upload_sessions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('size', models.BigIntegerField()),
+                ('refcount', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Блоб',
+                'verbose_name_plural': 'Блобы',
+            },
+        ),
+        migrations.AlterField(
+            model_name='content',
+            name='file',
+            field=files.fields.DedupFileField(blank=True, max_length=255, null=True, storage=files.storage.dedup_storage, upload_to='content_files/'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Blob переехал в приложение files: таблица переименовывается, модель
+    удаляется только из состояния sections (создается в files.0001_initial).
+    """
+
+    dependencies = [
+        ('sections', '0005_dedup_storage'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.AlterModelTable(name='Blob', table='files_blob'),
+            ],
+            state_operations=[
+                migrations.DeleteModel(name='Blob'),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.12 on 2026-10-18 18:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sections', '0006_move_blob_to_files'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='finalizing_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
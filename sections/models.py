@@ -1,6 +1,10 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from files.fields import DedupFileField
+
 User = get_user_model()
 
 
@@ -16,18 +20,79 @@ class Section(models.Model):
     class Meta:
         verbose_name = "Раздел"
         verbose_name_plural = "Разделы"
+        indexes = [
+            models.Index(fields=['owner', 'id'], name='sections_section_owner'),
+        ]
+
+
+class ContentQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        Содержимое, доступное пользователю: суперпользователю — все,
+        остальным — только из своих разделов (фильтр по владельцу в SQL).
+        """
+        if user.is_superuser:
+            return self
+        return self.filter(section__owner=user)
 
 
 class Content(models.Model):
     section = models.ForeignKey(Section, on_delete=models.CASCADE, related_name='contents')
     title = models.CharField(max_length=200)
     text = models.TextField(blank=True)
-    file = models.FileField(upload_to='content_files/', blank=True, null=True)
+    file = DedupFileField(upload_to='content_files/', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ContentQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
     class Meta:
         verbose_name = "Содержимое"
         verbose_name_plural = "Содержимое"
+        indexes = [
+            # Список содержимого своих разделов по порядку id без сортировки всей выборки
+            models.Index(fields=['section', 'id'], name='sections_content_section'),
+        ]
+
+
+class UploadSession(models.Model):
+    """
+    Загрузка файла содержимого по кускам: куски пишутся во временный файл
+    в SECTIONS_UPLOAD_DIR в любом порядке, finalize переносит его в Content.file.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=200)
+    size = models.BigIntegerField()
+    # Ожидаемый SHA-256 файла (hex), если клиент его знает
+    sha256 = models.CharField(max_length=64, blank=True)
+    # Когда начался finalize: после этого куски не принимаются, а второй finalize отклоняется
+    finalizing_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.filename
+
+    class Meta:
+        verbose_name = "Сеанс загрузки"
+        verbose_name_plural = "Сеансы загрузки"
+        indexes = [
+            models.Index(fields=['updated_at'], name='sections_upload_updated'),
+        ]
+
+
+class UploadChunk(models.Model):
+    """
+    Принятый диапазон байтов [start, end] сеанса загрузки.
+    """
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='chunks')
+    start = models.BigIntegerField()
+    end = models.BigIntegerField()
+
+    class Meta:
+        verbose_name = "Кусок загрузки"
+        verbose_name_plural = "Куски загрузки"
@@ -1,7 +1,17 @@
 from rest_framework.pagination import PageNumberPagination
 
+from config import pagination
+
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
+
+
+class StandardCursorPagination(pagination.KeysetCursorPagination):
+    page_size = 10
+
+
+class CursorPaginationOptInMixin(pagination.CursorPaginationOptInMixin):
+    cursor_pagination_class = StandardCursorPagination
@@ -3,9 +3,15 @@ from rest_framework import permissions
 
 class IsOwner(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        return obj.owner == request.user
+        # Сравнение по owner_id не загружает пользователя-владельца
+        return obj.owner_id == request.user.pk
 
 
 class IsSectionOwner(permissions.BasePermission):
+    """
+    Доступ к содержимому своего раздела. Раздел должен быть загружен
+    вместе с объектом (select_related('section')), иначе проверка — лишний запрос.
+    """
+
     def has_object_permission(self, request, view, obj):
-        return request.user.is_superuser or obj.section.owner == request.user
+        return request.user.is_superuser or obj.section.owner_id == request.user.pk
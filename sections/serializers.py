@@ -1,5 +1,9 @@
+from django.conf import settings
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Section, Content
+from files.thumbnails import derivative_urls
+from .models import Section, Content, UploadSession
+from . import uploads
 
 
 class SectionSerializer(serializers.ModelSerializer):
@@ -11,6 +15,50 @@ class SectionSerializer(serializers.ModelSerializer):
 
 
 class ContentSerializer(serializers.ModelSerializer):
+    # Скачивание с проверкой прав и поддержкой Range
+    download_url = serializers.SerializerMethodField()
+    # Уменьшенные копии изображения; None, пока они не построены
+    derivatives = serializers.SerializerMethodField()
+
     class Meta:
         model = Content
         fields = '__all__'
+        # Файл читается только через download_url: прямая ссылка в MEDIA_URL обходила бы проверку прав
+        extra_kwargs = {'file': {'write_only': True}}
+
+    def get_download_url(self, obj):
+        if not obj.file:
+            return None
+        url = reverse('content-download', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_derivatives(self, obj):
+        def url(size, ext):
+            return reverse('content-derivative', args=[obj.pk, size, ext])
+
+        return derivative_urls(obj.file, self.context.get('request'), url)
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    missing = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'content', 'filename', 'size', 'sha256', 'missing', 'created_at', 'updated_at']
+
+    def get_missing(self, obj):
+        return uploads.missing_ranges(obj)
+
+    def validate_size(self, value):
+        if not 1 <= value <= settings.SECTIONS_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"Размер файла должен быть от 1 до {settings.SECTIONS_UPLOAD_MAX_SIZE} байт"
+            )
+        return value
+
+    def validate_sha256(self, value):
+        value = value.lower()
+        if value and (len(value) != 64 or any(char not in '0123456789abcdef' for char in value)):
+            raise serializers.ValidationError("Ожидается SHA-256 в шестнадцатеричном виде")
+        return value
@@ -0,0 +1,179 @@
+import hashlib
+import os
+import re
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import UploadSession, UploadChunk
+
+# Размер блока при записи кусков и подсчете хэша: тело запроса не читается в память целиком
+BLOCK_SIZE = 64 * 1024
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class UploadError(Exception):
+    """
+    Ошибка клиента при загрузке: неверный диапазон, неполный файл, несовпавший хэш.
+    """
+
+
+class UploadConflict(UploadError):
+    """
+    Сеанс уже завершается другим запросом.
+    """
+
+
+class SessionFile(File):
+    """
+    Собранный файл сеанса. temporary_file_path позволяет хранилищу перенести
+    файл на место, а не копировать его по блокам; sha256 — уже посчитанный хэш,
+    чтобы DedupStorage не читал файл второй раз.
+    """
+
+    def __init__(self, file, sha256=None):
+        super().__init__(file)
+        self.sha256 = sha256
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def session_path(session):
+    return Path(settings.SECTIONS_UPLOAD_DIR) / f'{session.pk}.part'
+
+
+def start_session(session):
+    """
+    Создает пустой временный файл сеанса; место на диске занимают только записанные куски.
+    """
+    path = session_path(session)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+
+
+def parse_content_range(header, size):
+    """
+    Разбирает «Content-Range: bytes start-end/total» и возвращает (start, end) включительно.
+    """
+    match = CONTENT_RANGE_RE.match(header or '')
+    if match is None:
+        raise UploadError("Ожидается заголовок Content-Range: bytes start-end/total")
+    start, end, total = (int(value) for value in match.groups())
+    if total != size:
+        raise UploadError(f"Размер файла в Content-Range должен быть {size}")
+    if start > end or end >= size:
+        raise UploadError("Неверный диапазон Content-Range")
+    if end - start + 1 > settings.SECTIONS_UPLOAD_CHUNK_MAX_SIZE:
+        raise UploadError(f"Кусок больше {settings.SECTIONS_UPLOAD_CHUNK_MAX_SIZE} байт")
+    return start, end
+
+
+def write_chunk(session, start, end, stream):
+    """
+    Пишет тело запроса в файл сеанса с позиции start блоками по BLOCK_SIZE.
+    Кусок учитывается только если тело совпало с диапазоном по длине.
+    """
+    if stream is None:
+        raise UploadError("Пустое тело запроса")
+    if session.finalizing_at is not None:
+        raise UploadConflict("Загрузка уже завершается")
+    remaining = end - start + 1
+    with open(session_path(session), 'r+b') as target:
+        target.seek(start)
+        while remaining:
+            block = stream.read(min(BLOCK_SIZE, remaining))
+            if not block:
+                break
+            target.write(block)
+            remaining -= len(block)
+        if remaining or stream.read(1):
+            raise UploadError("Длина тела не совпадает с диапазоном Content-Range")
+    UploadChunk.objects.create(session=session, start=start, end=end)
+    UploadSession.objects.filter(pk=session.pk).update(updated_at=timezone.now())
+
+
+def missing_ranges(session):
+    """
+    Недостающие диапазоны [start, end] файла сеанса по принятым кускам.
+    """
+    missing = []
+    position = 0
+    for start, end in session.chunks.order_by('start', 'end').values_list('start', 'end'):
+        if start > position:
+            missing.append([position, start - 1])
+        position = max(position, end + 1)
+    if position < session.size:
+        missing.append([position, session.size - 1])
+    return missing
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def finalize(session):
+    """
+    Проверяет полноту и хэш файла, переносит его в Content.file и закрывает сеанс.
+    Возвращает (content, sha256). Под блокировкой сеанс только помечается как
+    завершающийся: хэш и перенос файла размером в гигабайты идут вне транзакции,
+    а строка содержимого сохраняется отдельной короткой транзакцией.
+    """
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().select_related('content').get(pk=session.pk)
+        if session.finalizing_at is not None:
+            raise UploadConflict("Загрузка уже завершается")
+        if missing_ranges(session):
+            raise UploadError("Загружены не все куски файла")
+        session.finalizing_at = timezone.now()
+        UploadSession.objects.filter(pk=session.pk).update(finalizing_at=session.finalizing_at)
+
+    path = session_path(session)
+    try:
+        sha256 = file_sha256(path)
+    except Exception:
+        UploadSession.objects.filter(pk=session.pk).update(finalizing_at=None)
+        raise
+    if session.sha256 and session.sha256 != sha256:
+        discard(session)
+        raise UploadError("SHA-256 файла не совпадает с заявленным, загрузку нужно начать заново")
+
+    content = session.content
+    try:
+        with open(path, 'rb') as source:
+            content.file.save(os.path.basename(session.filename), SessionFile(source, sha256=sha256), save=False)
+    except Exception:
+        UploadSession.objects.filter(pk=session.pk).update(finalizing_at=None)
+        raise
+    try:
+        with transaction.atomic():
+            content.save(update_fields=['file'])
+            session.delete()
+    except Exception:
+        # Ссылку на блоб хранилище уже взяло, а строка содержимого не сохранилась
+        content.file.storage.delete(content.file.name)
+        raise
+    # Хранилище на другом диске копирует файл, а не переносит
+    path.unlink(missing_ok=True)
+    return content, sha256
+
+
+def discard(session):
+    """
+    Удаляет сеанс вместе с временным файлом.
+    """
+    path = session_path(session)
+    session.delete()
+    path.unlink(missing_ok=True)
+
+
+def stale_sessions(hours):
+    return UploadSession.objects.filter(updated_at__lt=timezone.now() - timedelta(hours=hours))
@@ -1,11 +1,21 @@
 from django.urls import path
 from .views import SectionListCreateAPIView, SectionRetrieveUpdateDestroyAPIView, \
-    ContentListCreateAPIView, ContentRetrieveUpdateDestroyAPIView
+    ContentListCreateAPIView, ContentRetrieveUpdateDestroyAPIView, UploadSessionCreateAPIView, \
+    UploadSessionAPIView, UploadSessionFinalizeAPIView, ContentDownloadAPIView, \
+    ContentDerivativeAPIView, SectionExportAPIView
 
 
 urlpatterns = [
     path('sections/', SectionListCreateAPIView.as_view(), name='section-list-create'),
     path('sections/<int:pk>/', SectionRetrieveUpdateDestroyAPIView.as_view(), name='section-detail'),
+    path('sections/<int:pk>/export/', SectionExportAPIView.as_view(), name='section-export'),  # ZIP-архив раздела
     path('contents/', ContentListCreateAPIView.as_view(), name='content-list-create'),
     path('contents/<int:pk>/', ContentRetrieveUpdateDestroyAPIView.as_view(), name='content-detail'),
+    path('contents/<int:pk>/download/', ContentDownloadAPIView.as_view(), name='content-download'),
+    path('contents/<int:pk>/derivatives/<int:size>.<str:ext>', ContentDerivativeAPIView.as_view(),
+         name='content-derivative'),  # Миниатюры изображения с проверкой прав
+    # Загрузка файла содержимого по кускам
+    path('uploads/', UploadSessionCreateAPIView.as_view(), name='upload-session-create'),
+    path('uploads/<uuid:pk>/', UploadSessionAPIView.as_view(), name='upload-session-detail'),
+    path('uploads/<uuid:pk>/finalize/', UploadSessionFinalizeAPIView.as_view(), name='upload-session-finalize'),
 ]
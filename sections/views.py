@@ -1,12 +1,23 @@
-from rest_framework import generics, permissions
-from .models import Section, Content
-from .serializers import SectionSerializer, ContentSerializer
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import NotFound
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.response import Response
+from .models import Section, Content, UploadSession
+from .serializers import SectionSerializer, ContentSerializer, UploadSessionSerializer
+from . import downloads, exporters, uploads
+from files.thumbnails import derivative_file_name
 from .permissions import IsOwner, IsSectionOwner
-from .paginators import StandardResultsSetPagination
+from .paginators import StandardResultsSetPagination, CursorPaginationOptInMixin
 from django.core.exceptions import PermissionDenied
+from django.core.files.storage import default_storage
+from django.http import Http404, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
 
 
-class SectionListCreateAPIView(generics.ListCreateAPIView):
+# Ответы зависят от пользователя: общий кэш страниц (CacheMiddleware) их хранить не должен
+@method_decorator(cache_control(private=True), name='dispatch')
+class SectionListCreateAPIView(CursorPaginationOptInMixin, generics.ListCreateAPIView):
     queryset = Section.objects.all()
     serializer_class = SectionSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -16,29 +27,169 @@ class SectionListCreateAPIView(generics.ListCreateAPIView):
         serializer.save(owner=self.request.user)
 
     def get_queryset(self):
-        return Section.objects.filter(owner=self.request.user)
+        # owner нужен сериализатору (owner.username) — берем его тем же запросом
+        return Section.objects.filter(owner=self.request.user).select_related('owner').order_by('id')
 
 
+@method_decorator(cache_control(private=True), name='dispatch')
 class SectionRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Section.objects.all()
+    queryset = Section.objects.select_related('owner')
     serializer_class = SectionSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwner]
 
 
-class ContentListCreateAPIView(generics.ListCreateAPIView):
-    queryset = Content.objects.all()
+@method_decorator(cache_control(private=True), name='dispatch')
+class ContentListCreateAPIView(CursorPaginationOptInMixin, generics.ListCreateAPIView):
+    queryset = Content.objects.order_by('id')
     serializer_class = ContentSerializer
     permission_classes = [permissions.IsAuthenticated, IsSectionOwner]  # Тут было только IsAuthenticated!
     pagination_class = StandardResultsSetPagination
 
+    def get_queryset(self):
+        # Список ограничен своими разделами в SQL; has_object_permission для списка не вызывается
+        return Content.objects.visible_to(self.request.user).order_by('id')
+
     def perform_create(self, serializer):
         section = serializer.validated_data['section']
-        if section.owner != self.request.user and not self.request.user.is_superuser:
+        if section.owner_id != self.request.user.pk and not self.request.user.is_superuser:
             raise PermissionDenied("Вы не можете добавлять контент в чужой раздел")
         serializer.save()
 
 
+@method_decorator(cache_control(private=True), name='dispatch')
 class ContentRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Content.objects.all()
+    # Раздел читается тем же запросом: IsSectionOwner проверяет владельца без дополнительных запросов
+    queryset = Content.objects.select_related('section')
     serializer_class = ContentSerializer
     permission_classes = [permissions.IsAuthenticated, IsSectionOwner]
+
+    def get_queryset(self):
+        # Чужое содержимое — 404, а не 403: ответ не выдает, что такой id существует
+        return Content.objects.visible_to(self.request.user).select_related('section')
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """
+    Файл отдается при любом Accept; ошибки рендерятся первым рендерером (JSON).
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+@method_decorator(cache_control(private=True), name='dispatch')
+class ContentDownloadAPIView(generics.RetrieveAPIView):
+    """
+    Скачивание файла содержимого владельцем раздела: Range/If-Range, условные запросы.
+    """
+    queryset = Content.objects.select_related('section')
+    permission_classes = [permissions.IsAuthenticated, IsSectionOwner]
+    content_negotiation_class = IgnoreClientContentNegotiation
+
+    def get_queryset(self):
+        return Content.objects.visible_to(self.request.user).select_related('section')
+
+    def get(self, request, *args, **kwargs):
+        content = self.get_object()
+        if not content.file:
+            raise Http404
+        return downloads.serve_file(request, content.file)
+
+
+@method_decorator(cache_control(private=True), name='dispatch')
+class ContentDerivativeAPIView(ContentDownloadAPIView):
+    """
+    Миниатюра изображения содержимого с теми же правами, что и скачивание файла.
+    """
+
+    def get(self, request, *args, **kwargs):
+        content = self.get_object()
+        name = derivative_file_name(content.file, kwargs['size'], kwargs['ext'])
+        if name is None:
+            raise Http404
+        return downloads.serve_stored(request, default_storage, name)
+
+
+@method_decorator(cache_control(private=True), name='dispatch')
+class SectionExportAPIView(generics.RetrieveAPIView):
+    """
+    Потоковая выгрузка раздела со всем содержимым (тексты и файлы) одним ZIP-архивом.
+    """
+    queryset = Section.objects.all()
+    permission_classes = [permissions.IsAuthenticated, IsOwner]
+    content_negotiation_class = IgnoreClientContentNegotiation
+
+    def get(self, request, *args, **kwargs):
+        section = self.get_object()
+        response = StreamingHttpResponse(exporters.section_archive(section), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="section-{section.pk}.zip"'
+        return response
+
+
+@method_decorator(cache_control(private=True), name='dispatch')
+class UploadSessionCreateAPIView(generics.CreateAPIView):
+    """
+    Начало загрузки файла содержимого по кускам: content, filename, size и необязательный sha256.
+    """
+    serializer_class = UploadSessionSerializer
+
+    def perform_create(self, serializer):
+        content = serializer.validated_data['content']
+        if content.section.owner_id != self.request.user.pk and not self.request.user.is_superuser:
+            # Как и деталь содержимого: чужой id не отличается от несуществующего
+            raise NotFound("Содержимое не найдено")
+        session = serializer.save(owner=self.request.user)
+        uploads.start_session(session)
+
+
+@method_decorator(cache_control(private=True), name='dispatch')
+class UploadSessionAPIView(generics.RetrieveDestroyAPIView):
+    """
+    GET — недостающие диапазоны, PUT с Content-Range — кусок файла, DELETE — отмена загрузки.
+    """
+    serializer_class = UploadSessionSerializer
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(owner=self.request.user)
+
+    def put(self, request, *args, **kwargs):
+        session = self.get_object()
+        try:
+            start, end = uploads.parse_content_range(request.headers.get('Content-Range'), session.size)
+            # Тело читается из потока запроса блоками; request.data не трогаем, чтобы DRF его не буферизовал
+            uploads.write_chunk(session, start, end, request.stream)
+        except uploads.UploadConflict as error:
+            return Response({"error": str(error)}, status=status.HTTP_409_CONFLICT)
+        except uploads.UploadError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"missing": uploads.missing_ranges(session)})
+
+    def perform_destroy(self, instance):
+        uploads.discard(instance)
+
+
+@method_decorator(cache_control(private=True), name='dispatch')
+class UploadSessionFinalizeAPIView(generics.GenericAPIView):
+    """
+    Завершение загрузки: проверка полноты и SHA-256, файл переносится в Content.file.
+    """
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(owner=self.request.user)
+
+    def post(self, request, *args, **kwargs):
+        session = self.get_object()
+        try:
+            content, sha256 = uploads.finalize(session)
+        except UploadSession.DoesNotExist:
+            raise Http404
+        except uploads.UploadConflict as error:
+            return Response({"error": str(error)}, status=status.HTTP_409_CONFLICT)
+        except uploads.UploadError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        data = ContentSerializer(content, context=self.get_serializer_context()).data
+        data['sha256'] = sha256
+        return Response(data)
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.12 on 2026-10-18 18:14
+
+from django.db import migrations
+import files.fields
+import files.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='profile_picture',
+            field=files.fields.DedupImageField(blank=True, max_length=255, null=True, storage=files.storage.dedup_storage, upload_to='profile_pictures/', verbose_name='Фото профиля'),
+        ),
+    ]
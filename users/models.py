@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
 
+from files.fields import DedupImageField
+
 
 class User(AbstractUser):
     phone_regex = RegexValidator(
@@ -10,7 +12,7 @@ class User(AbstractUser):
     )
     phone_number = models.CharField(validators=[phone_regex], max_length=17, blank=True, null=True, verbose_name="Номер телефона")
     birth_date = models.DateField(blank=True, null=True, verbose_name="Дата рождения")
-    profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True, verbose_name="Фото профиля")
+    profile_picture = DedupImageField(upload_to='profile_pictures/', blank=True, null=True, verbose_name="Фото профиля")
 
     class Meta:
         verbose_name = "Пользователь"